@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Round-trip benchmark of the routine serialization paths: the Xopt ones
+(json through the Python json module, pure Python yaml) against the ones
+of badger.serialization.
+
+    python scripts/benchmark_serialization.py [n_points] [n_repeats]
+"""
+
+import json
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import yaml
+from xopt import VOCS, Xopt
+from xopt.generators.random import RandomGenerator
+
+from badger.environment import BaseEnvironment
+from badger.routine import Routine
+from badger.serialization import load_yaml, pack, unpack
+
+
+class BenchmarkEnv(BaseEnvironment):
+    name = "benchmark"
+    variables = {f"x{i}": [0, 1] for i in range(10)}
+    observables = ["f"]
+
+    def get_variables(self, variable_names):
+        return {name: 0.5 for name in variable_names}
+
+    def set_variables(self, variable_inputs):
+        pass
+
+    def get_observables(self, observable_names):
+        return {"f": 0.0}
+
+
+def make_routine(n_points: int) -> Routine:
+    vocs = VOCS(variables=BenchmarkEnv.variables, objectives={"f": "MINIMIZE"})
+    routine = Routine(
+        name="benchmark",
+        generator=RandomGenerator(vocs=vocs),
+        environment=BenchmarkEnv(),
+    )
+
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.random((n_points, 11)), columns=vocs.variable_names + ["f"])
+    data["xopt_runtime"] = rng.random(n_points)
+    data["xopt_error"] = False
+    data["timestamp"] = time.time() + np.arange(n_points)
+    data["live"] = 1
+    routine.add_data(data)
+
+    return routine
+
+
+def timeit(func, n_repeats: int) -> float:
+    best = float("inf")
+    for _ in range(n_repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main():
+    n_points = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    n_repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    routine = make_routine(n_points)
+    legacy_yaml = yaml.dump(json.loads(Xopt.json(routine)))
+    fast_yaml = routine.yaml()
+    payload = (routine.data, routine.generator)
+
+    cases = {
+        "json (Xopt)": lambda: Xopt.json(routine),
+        "json (badger)": lambda: routine.json(),
+        "yaml dump (Xopt)": lambda: yaml.dump(json.loads(Xopt.json(routine))),
+        "yaml dump (badger)": lambda: routine.yaml(),
+        "yaml load (PyYAML)": lambda: yaml.safe_load(legacy_yaml),
+        "yaml load (badger)": lambda: load_yaml(fast_yaml),
+        "ipc (pickle)": lambda: pickle.loads(pickle.dumps(payload)),
+        "ipc (badger)": lambda: unpack(pack(payload)),
+    }
+
+    print(f"{n_points} points, best of {n_repeats}")
+    for name, func in cases.items():
+        print(f"{name:>30}: {1e3 * timeit(func, n_repeats):10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
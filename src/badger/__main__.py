@@ -10,6 +10,9 @@ from badger.actions.install import plugin_install
 from badger.actions.uninstall import plugin_remove
 from badger.actions.intf import show_intf
 from badger.actions.config import config_settings
+from badger.actions.archive import manage_archive
+from badger.actions.db import manage_db
+from badger.actions.stats import show_stats
 from badger.log import setup_logging
 
 logger = logging.getLogger("badger")
@@ -134,6 +137,63 @@ def main():
     parser_config.add_argument("key", nargs="?", type=str, default=None)
     parser_config.set_defaults(func=config_settings)
 
+    # Parser for the 'archive' command
+    parser_archive = subparsers.add_parser("archive", help="Badger run archive")
+    parser_archive.add_argument(
+        "action",
+        choices=["migrate", "reindex", "maintain"],
+        help="migrate: convert the yaml runs to the columnar format, "
+        "reindex: rebuild the index of the runs, "
+        "maintain: compact, compress and prune the archive",
+    )
+    parser_archive.set_defaults(func=manage_archive)
+
+    # Parser for the 'db' command
+    parser_db = subparsers.add_parser("db", help="Badger database")
+    parser_db.add_argument(
+        "action",
+        choices=["migrate"],
+        help="migrate: import the routines and runs of the legacy databases",
+    )
+    parser_db.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only count the routines and runs to migrate",
+    )
+    parser_db.set_defaults(func=manage_db)
+
+    # Parser for the 'stats' command
+    parser_stats = subparsers.add_parser(
+        "stats", help="Statistics over the archived runs"
+    )
+    parser_stats.add_argument(
+        "metric",
+        type=str,
+        help="figure of the runs: best, n_points, n_feasible, n_errors, "
+        "evals_to_best, evals_to_converge or duration",
+    )
+    parser_stats.add_argument(
+        "-b",
+        "--by",
+        nargs="+",
+        default=["environment"],
+        help="group the runs by: environment, generator, routine_id, name, "
+        "objective, day, week, month or year",
+    )
+    parser_stats.add_argument(
+        "-a", "--agg", type=str, default="mean", help="aggregation, like max or median"
+    )
+    parser_stats.add_argument("-e", "--environment", type=str, default=None)
+    parser_stats.add_argument("-G", "--generator", type=str, default=None)
+    parser_stats.add_argument(
+        "--since", type=str, default=None, help="such as 2024 or 2024-05-17"
+    )
+    parser_stats.add_argument("--until", type=str, default=None)
+    parser_stats.add_argument(
+        "-w", "--workers", type=int, default=None, help="number of worker processes"
+    )
+    parser_stats.set_defaults(func=show_stats)
+
     args = parser.parse_args()
 
     setup_logging(args)
@@ -0,0 +1,36 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def manage_archive(args):
+    try:
+        from badger.archive import get_archive_root, migrate_archive, rebuild_index
+        from badger.archive_maintenance import ArchiveMaintainer, maintain_archive
+
+        get_archive_root()  # check the archive root
+    except Exception as e:
+        logger.error(e)
+        return
+
+    if args.action == "migrate":
+
+        def on_progress(filename, converted):
+            if converted:
+                print(f"Converted {filename}")
+
+        n_converted = migrate_archive(on_progress)
+        print(f"{n_converted} run(s) converted to the columnar format.")
+    elif args.action == "reindex":
+        n_runs = rebuild_index()
+        print(f"{n_runs} run(s) indexed.")
+    elif args.action == "maintain":
+        kwargs = ArchiveMaintainer.from_settings().kwargs
+        kwargs["rate"] = None  # run at full speed from the command line
+        report = maintain_archive(**kwargs)
+        print(
+            f"{report['tmp_removed']} temporary run(s) removed, "
+            f"{report['deleted']} run(s) deleted, "
+            f"{report['compacted']} run(s) compacted, "
+            f"{report['bytes_saved'] / 1e6:.1f} MB saved."
+        )
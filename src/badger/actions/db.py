@@ -0,0 +1,42 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def manage_db(args):
+    try:
+        from badger.db import (
+            get_db,
+            legacy_migration_pending,
+            migrate_legacy_databases,
+        )
+        from badger.errors import BadgerConfigError
+
+        if get_db() is None:
+            raise BadgerConfigError("Please set the BADGER_DB_ROOT env var!")
+        pending = legacy_migration_pending()
+    except Exception as e:
+        logger.error(e)
+        return
+
+    if args.action == "migrate":
+        if not pending:
+            print("No legacy database to migrate.")
+            return
+
+        if args.dry_run:
+            report = migrate_legacy_databases(dry_run=True)
+            print(
+                f"{report['routines']} routine(s) and {report['runs']} run(s) "
+                f"to migrate, {report['run_files']} run file(s) to rewrite."
+            )
+            return
+
+        def on_progress(n_done, n_total):
+            print(f"Migrated {n_done}/{n_total} record(s)")
+
+        report = migrate_legacy_databases(on_progress=on_progress)
+        print(
+            f"{report['routines']} routine(s) and {report['runs']} run(s) "
+            f"migrated, {report['run_files']} run file(s) rewritten."
+        )
@@ -7,7 +7,9 @@ logger = logging.getLogger(__name__)
 
 def show_env(args):
     try:
-        from badger.factory import list_env, get_env
+        from badger.factory import get_plugin_root, list_env, get_env
+
+        get_plugin_root()  # check the plugin root
     except Exception as e:
         logger.error(e)
         return
@@ -17,7 +19,7 @@ def show_env(args):
         return
 
     try:
-        _, configs = get_env(args.env_name)
+        _, configs = get_env(args.env_name, lazy=True)
     except Exception as e:
         logger.error(e)
         try:
@@ -1,12 +1,10 @@
 import logging
-import requests
 import tarfile
 import shutil
 import os
 from os.path import exists
 
 import yaml
-from tqdm.auto import tqdm
 
 from badger.settings import init_settings
 
@@ -31,6 +29,8 @@ def plugin_install(args):
     # This is just a temp solution
     # Should tell the users to use the install command a conda env is needed
     from conda.cli.python_api import run_command, Commands
+    import requests
+    from tqdm.auto import tqdm
 
     hist = {
         "generator": "generators",
@@ -7,7 +7,9 @@ logger = logging.getLogger(__name__)
 
 def show_intf(args):
     try:
-        from badger.factory import list_intf, get_intf
+        from badger.factory import get_plugin_root, list_intf, get_intf
+
+        get_plugin_root()  # check the plugin root
     except Exception as e:
         logger.error(e)
         return
@@ -1,6 +1,5 @@
 import logging
 
-import pandas as pd
 import yaml
 
 from badger.utils import yprint
@@ -17,6 +16,7 @@ def show_routine(args):
     return
 
     try:
+        import pandas as pd
         from badger.db import load_routine, list_routine
         from badger.actions.run import run_n_archive
     except Exception as e:
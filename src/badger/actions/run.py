@@ -11,6 +11,7 @@ from badger.core import run_routine as run
 from badger.routine import Routine
 from badger.settings import init_settings
 from badger.errors import BadgerRunTerminated
+from badger.recorder import RECORDING_EXT
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +20,14 @@ def run_n_archive(
     routine: Routine, yes=False, save=False, verbose=2, sleep=0, flush_prompt=False
 ):
     try:
-        from badger.archive import archive_run
+        from badger.archive import (
+            archive_run,
+            get_archive_root,
+            get_run_location,
+            start_run_log,
+        )
+
+        get_archive_root()  # check the archive root
     except Exception as e:
         logger.error(e)
         return
@@ -29,6 +37,7 @@ def run_n_archive(
         "states": None,
         "ts_last_dump": None,
         "paused": False,
+        "run_log": None,
     }
 
     def handler(*args):
@@ -72,11 +81,15 @@ def run_n_archive(
         ts_last_dump = storage["ts_last_dump"]
         if (ts_last_dump is None) or (ts_float - ts_last_dump > dump_period):
             storage["ts_last_dump"] = ts_float
-            _run = archive_run(routine, storage["states"])
+            # Append the new rows only, the run is archived in full at the end
+            if storage["run_log"] is None:
+                storage["run_log"] = start_run_log(routine)
+            else:
+                storage["run_log"].append(routine.data)
             # Try dump the interface logs
             try:
-                path = _run["path"]
-                filename = _run["filename"][:-4] + "pickle"
+                path, fname = get_run_location(routine)
+                filename = os.path.splitext(fname)[0] + RECORDING_EXT
                 routine.environment.interface.dump_recording(
                     os.path.join(path, filename)
                 )
@@ -108,7 +121,7 @@ def run_n_archive(
         # Try dump the interface logs
         try:
             path = _run["path"]
-            filename = _run["filename"][:-4] + "pickle"
+            filename = os.path.splitext(_run["filename"])[0] + RECORDING_EXT
             routine.environment.interface.stop_recording(os.path.join(path, filename))
         except Exception:
             pass
@@ -0,0 +1,31 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def show_stats(args):
+    try:
+        from badger.analytics import aggregate
+    except Exception as e:
+        logger.error(e)
+        return
+
+    try:
+        result = aggregate(
+            args.metric,
+            by=args.by,
+            agg=args.agg,
+            environment=args.environment,
+            generator=args.generator,
+            since=args.since,
+            until=args.until,
+            workers=args.workers,
+        )
+    except ValueError as e:
+        logger.error(e)
+        return
+
+    if result.empty:
+        print("No archived run matches.")
+    else:
+        print(result.to_string(index=False))
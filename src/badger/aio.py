@@ -0,0 +1,82 @@
+import asyncio
+import os
+import threading
+from typing import Any, Coroutine
+
+# Badger drives coroutines on a single background event loop per process, so
+# async interfaces keep their connections bound to one loop no matter which
+# thread (GUI, run subprocess, xopt evaluator) issues the channel I/O
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_pid: int | None = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get the background event loop that drives Badger's async I/O.
+
+    The loop runs forever in a daemon thread and is created lazily. A new loop
+    is created after the process forks, since the thread does not survive it.
+
+    Returns
+    -------
+    asyncio.AbstractEventLoop
+        The running background event loop.
+    """
+    global _loop, _loop_pid
+
+    with _loop_lock:
+        if _loop is None or _loop.is_closed() or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            thread = threading.Thread(
+                target=_loop.run_forever, name="badger-event-loop", daemon=True
+            )
+            thread.start()
+
+        return _loop
+
+
+def run_sync(coro: Coroutine) -> Any:
+    """
+    Run a coroutine on the Badger event loop and block until it is done.
+
+    This is the async-to-sync adapter used by the synchronous interface and
+    environment API. It must not be called from a coroutine running on the
+    Badger event loop itself, await the coroutine there instead.
+
+    Parameters
+    ----------
+    coro : Coroutine
+        The coroutine to run.
+
+    Returns
+    -------
+    Any
+        The result of the coroutine.
+    """
+    loop = get_event_loop()
+
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+
+    if running_loop is loop:
+        coro.close()
+        raise RuntimeError(
+            "run_sync can not be called from the Badger event loop, "
+            "await the coroutine instead"
+        )
+
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+async def run_in_thread(func, *args, **kwargs) -> Any:
+    """
+    Run a blocking callable in a worker thread and await its result.
+
+    This is the sync-to-async adapter used by the async interface and
+    environment API when only the synchronous methods are implemented.
+    """
+    return await asyncio.to_thread(func, *args, **kwargs)
@@ -0,0 +1,392 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from xopt.vocs import OBJECTIVE_WEIGHT, VOCS, get_feasibility_data
+
+from badger.archive_index import vocs_from_config
+from badger.arrays import restore_array_refs
+from badger.columnar import data_from_dict, load_run_data
+from badger.serialization import load_yaml
+
+logger = logging.getLogger(__name__)
+
+# A run has converged once its best value is within that fraction of the
+# total improvement (from the first feasible point) of its final best value
+CONVERGENCE_TOLERANCE = 0.01
+
+# Runs summarized per process pool task, and below which no pool is started
+CHUNK_SIZE = 16
+MIN_PARALLEL_RUNS = 64
+# Runs are loaded one per task, in parallel from that many runs on
+MIN_PARALLEL_LOADS = 4
+
+# Column of the run file name in the data of several runs
+RUN_COLUMN = "run"
+
+# Periods the runs can be grouped by, as strftime formats of their creation
+PERIODS = {
+    "day": "%Y-%m-%d",
+    "week": "%G-W%V",  # ISO week
+    "month": "%Y-%m",
+    "year": "%Y",
+}
+
+
+def _process_pool(workers: Optional[int]) -> ProcessPoolExecutor:
+    # Forking a process running Qt or other threads (the GUI loads runs off
+    # the main thread) can deadlock the children, so they are spawned
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def summarize_history(vocs: VOCS, data: Optional[pd.DataFrame]) -> Dict:
+    """
+    The figures of an optimization history that analytics queries are
+    about: number of feasible and failed evaluations, evaluations to the
+    best point and to convergence, and duration.
+
+    Only single objective runs have an objective, direction and
+    evaluation counts.
+    """
+    summary = {}
+    if data is None or data.empty:
+        return summary
+
+    data = data.sort_index()
+    if "xopt_error" in data:
+        summary["n_errors"] = int(data["xopt_error"].astype(bool).sum())
+    if "timestamp" in data:
+        timestamps = pd.to_numeric(data["timestamp"], errors="coerce")
+        summary["duration"] = float(timestamps.max() - timestamps.min())
+
+    if vocs.n_objectives != 1 or vocs.objective_names[0] not in data:
+        return summary
+
+    name = vocs.objective_names[0]
+    weight = OBJECTIVE_WEIGHT[type(vocs.objectives[name]).__name__]
+    summary["objective"] = name
+    summary["direction"] = "MINIMIZE" if weight > 0 else "MAXIMIZE"
+
+    # Scores to minimize, infeasible points left out
+    feasible = get_feasibility_data(vocs, data)["feasible"].to_numpy(dtype=bool)
+    scores = weight * pd.to_numeric(data[name], errors="coerce").to_numpy(float)
+    scores[~feasible] = np.nan
+    valid = ~np.isnan(scores)
+    summary["n_feasible"] = int(valid.sum())
+    if not valid.any():
+        return summary
+
+    best = np.nanmin(scores)
+    running_best = np.fmin.accumulate(np.where(valid, scores, np.inf))
+    tolerance = CONVERGENCE_TOLERANCE * (scores[valid][0] - best)
+    summary["evals_to_best"] = int(np.argmax(scores == best)) + 1
+    summary["evals_to_converge"] = int(np.argmax(running_best <= best + tolerance)) + 1
+
+    return summary
+
+
+def read_run(filename: str) -> Tuple[Dict, Optional[pd.DataFrame]]:
+    """
+    The config and data of an archived run, read from its files without
+    building the routine, so that it can run in a worker process.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the run yaml file.
+    """
+    with open(filename, "r") as f:
+        config = load_yaml(f)
+    data = config.pop("data", None)
+    if isinstance(data, dict):  # run archived the old way
+        data = data_from_dict(data)
+    else:
+        data = load_run_data(filename)
+
+    return config, data
+
+
+def summarize_run(filename: str) -> Dict:
+    """
+    Summary of an archived run, see summarize_history. Only reads the run
+    files, so it can run in a worker process.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the run yaml file.
+    """
+    summary = {"filename": os.path.basename(filename)}
+    try:
+        config, data = read_run(filename)
+        summary.update(summarize_history(vocs_from_config(config), data))
+    except Exception as e:
+        # Stored all the same, so that the run is not read again until it
+        # changes
+        logger.warning(f"Failed to summarize run {filename}: {e}")
+
+    return summary
+
+
+def refresh_summaries(workers: Optional[int] = None, on_progress=None) -> int:
+    """
+    Summarize the archived runs that are new or changed since the last
+    refresh, in parallel, and store the summaries in the archive index.
+
+    Parameters
+    ----------
+    workers : int, optional
+        Number of worker processes, the number of CPUs by default. 1 to
+        summarize the runs in this process.
+    on_progress : callable, optional
+        Called as on_progress(n_done, n_total) as the runs are summarized.
+
+    Returns
+    -------
+    int
+        Number of runs summarized.
+    """
+    from badger.archive import ARCHIVE_INDEX, ensure_index
+
+    ensure_index()
+    stale = ARCHIVE_INDEX.stale_summaries()
+    filenames = [run["fullpath"] for run in stale]
+
+    if workers == 1 or len(filenames) < MIN_PARALLEL_RUNS:
+        executor = None
+        results = map(summarize_run, filenames)
+    else:
+        executor = _process_pool(workers)
+        results = executor.map(summarize_run, filenames, chunksize=CHUNK_SIZE)
+
+    summaries = []
+    try:
+        for i, (run, summary) in enumerate(zip(stale, results)):
+            summary["mtime"] = run["mtime"]
+            summaries.append(summary)
+            if on_progress is not None:
+                on_progress(i + 1, len(stale))
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        # Whatever was done is kept, an interrupted refresh goes on from there
+        ARCHIVE_INDEX.add_summaries(summaries)
+
+    return len(summaries)
+
+
+def _read_run_data(
+    filename: str, columns: Optional[List[str]] = None
+) -> Optional[pd.DataFrame]:
+    _, data = read_run(filename)
+    if data is None:
+        return None
+    if columns is not None:
+        data = data[[name for name in columns if name in data]]
+
+    return restore_array_refs(data)
+
+
+def load_runs_data(
+    runs: Sequence[str],
+    columns: Optional[Sequence[str]] = None,
+    workers: Optional[int] = None,
+    on_progress=None,
+    stop_event: Optional[threading.Event] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    Load the data of several archived runs at once, in parallel, as a
+    single DataFrame, such as to compare runs or to warm start a routine
+    with the data of past ones. Only the run files are read, no routine is
+    built.
+
+    Parameters
+    ----------
+    runs : list of str
+        File names of the runs, or paths of the run yaml files.
+    columns : list of str, optional
+        Only load these columns, if the runs have them.
+    workers : int, optional
+        Number of worker processes, the number of CPUs by default. 1 to
+        load the runs in this process.
+    on_progress : callable, optional
+        Called as on_progress(n_done, n_total) as the runs are loaded.
+    stop_event : threading.Event, optional
+        The loading is cancelled when it is set.
+
+    Returns
+    -------
+    pandas.DataFrame or None
+        The data of the runs, in the order of the runs, with the file name
+        of the run each row comes from in the "run" column. The runs that
+        fail to load are left out. None if the loading was cancelled.
+    """
+    from badger.archive import get_run_filename
+
+    filenames = [run if os.path.isfile(run) else get_run_filename(run) for run in runs]
+    if columns is not None:
+        columns = list(columns)
+    stop_event = stop_event or threading.Event()
+
+    frames = [None] * len(filenames)
+
+    def add(i, get_data):
+        try:
+            frames[i] = get_data()
+        except Exception as e:
+            logger.warning(f"Failed to load run {filenames[i]}: {e}")
+
+    if workers == 1 or len(filenames) < MIN_PARALLEL_LOADS:
+        for i, filename in enumerate(filenames):
+            if stop_event.is_set():
+                return None
+            add(i, lambda: _read_run_data(filename, columns))
+            if on_progress is not None:
+                on_progress(i + 1, len(filenames))
+    else:
+        executor = _process_pool(workers)
+        try:
+            futures = {
+                executor.submit(_read_run_data, filename, columns): i
+                for i, filename in enumerate(filenames)
+            }
+            for n_done, future in enumerate(as_completed(futures), 1):
+                if stop_event.is_set():
+                    return None
+                add(futures[future], future.result)
+                if on_progress is not None:
+                    on_progress(n_done, len(filenames))
+        finally:
+            # Do not wait for the runs being loaded when cancelled
+            executor.shutdown(wait=not stop_event.is_set(), cancel_futures=True)
+
+    if stop_event.is_set():
+        return None
+
+    frames = [
+        data.assign(**{RUN_COLUMN: os.path.basename(filename)})
+        for filename, data in zip(filenames, frames)
+        if data is not None
+    ]
+    if not frames:
+        return pd.DataFrame(columns=[RUN_COLUMN])
+
+    data = pd.concat(frames, ignore_index=True)
+
+    return data[[RUN_COLUMN] + [name for name in data if name != RUN_COLUMN]]
+
+
+def query_summaries(
+    environment: Optional[str] = None,
+    generator: Optional[str] = None,
+    routine_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    refresh: bool = True,
+    workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Summaries of the archived runs, one row per run: the index entry (see
+    ArchiveIndex.query) and the summary (see summarize_history), plus the
+    day, week, month and year the run was created in.
+
+    Parameters
+    ----------
+    environment, generator, routine_id : str, optional
+        Only the runs of this environment, generator or routine.
+    since, until : str, optional
+        Only the runs created in this range (inclusive), as time stamps in
+        the archive format (YYYY-MM-DD-HHMMSS) or a prefix of one.
+    refresh : bool
+        Summarize the new and changed runs first.
+    workers : int, optional
+        Number of worker processes of the refresh.
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    from badger.archive import ARCHIVE_INDEX
+
+    if refresh:
+        refresh_summaries(workers)
+
+    conditions, params = [], []
+    for column, value in [
+        ("environment", environment),
+        ("generator", generator),
+        ("routine_id", routine_id),
+    ]:
+        if value is not None:
+            conditions.append(f"r.{column} = ?")
+            params.append(value)
+    if since is not None:
+        conditions.append("r.created >= ?")
+        params.append(since)
+    if until is not None:
+        conditions.append("r.created < ?")
+        params.append(until + "\x7f")
+
+    summaries = ARCHIVE_INDEX.read_summaries(" and ".join(conditions) or "1", params)
+    created = pd.to_datetime(summaries["created"], format="%Y-%m-%d-%H%M%S")
+    for period, fmt in PERIODS.items():
+        summaries[period] = created.dt.strftime(fmt)
+
+    return summaries
+
+
+def aggregate(
+    metric: str,
+    by: Sequence[str] = ("environment",),
+    agg: str = "mean",
+    **filters,
+) -> pd.DataFrame:
+    """
+    Aggregate a figure of the archived runs over groups of runs, such as
+    the best objective value per environment per week:
+
+        aggregate("best", by=["environment", "week"], agg="max")
+
+    or the median evaluations to convergence of a generator:
+
+        aggregate("evals_to_converge", by=["generator"], agg="median")
+
+    Parameters
+    ----------
+    metric : str
+        A column of query_summaries, such as "best", "n_points",
+        "evals_to_best", "evals_to_converge" or "duration".
+    by : list of str
+        Columns of query_summaries to group the runs by, including the
+        periods "day", "week", "month" and "year".
+    agg : str
+        A pandas aggregation: "mean", "median", "min", "max", "sum",
+        "std", "count"...
+    **filters
+        Arguments of query_summaries.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per group, with the group columns, the aggregated metric
+        and the number of runs with a value for it ("n_runs").
+    """
+    summaries = query_summaries(**filters)
+    by = list(by)
+    for column in by + [metric]:
+        if column not in summaries:
+            raise ValueError(f"Unknown run figure {column}")
+
+    values = pd.to_numeric(summaries[metric], errors="coerce")
+    grouped = values.groupby([summaries[column] for column in by], dropna=False)
+    result = grouped.agg([agg, "count"])
+    result.columns = [metric, "n_runs"]
+
+    return result.reset_index()
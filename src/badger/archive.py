@@ -1,45 +1,117 @@
 import os
+import sqlite3
 import time
 import warnings
 import logging
+from copy import deepcopy
+from typing import Dict, List, Optional, Union
 
-from badger.utils import ts_float_to_str
+from pandas import DataFrame
+from xopt import VOCS
+from xopt.pydantic import remove_none_values
+
+from badger.utils import LazyAttributes, ts_float_to_str
 from badger.settings import init_settings
 from badger.routine import Routine
+from badger.serialization import dump_yaml, load_yaml, routine_to_dict
 from badger.errors import BadgerConfigError
+from badger.recorder import RECORDING_EXT
+from badger.arrays import ARRAYS_EXT, find_array_refs, restore_array_refs
+from badger.archive_index import ArchiveIndex, summarize_data, vocs_from_config
+from badger.columnar import (
+    DATA_EXT,
+    DATA_LOG_EXT,
+    DataLog,
+    data_from_dict,
+    load_run_data,
+    save_data,
+)
 
 logger = logging.getLogger(__name__)
 
 
-# Check badger optimization run archive root
-config_singleton = init_settings()
-BADGER_ARCHIVE_ROOT = config_singleton.read_value("BADGER_ARCHIVE_ROOT")
-if BADGER_ARCHIVE_ROOT is None:
-    raise BadgerConfigError("Please set the BADGER_ARCHIVE_ROOT env var!")
-elif not os.path.exists(BADGER_ARCHIVE_ROOT):
-    os.makedirs(BADGER_ARCHIVE_ROOT)
-    logger.info(f"Badger run root {BADGER_ARCHIVE_ROOT} created")
+def init_archive_root() -> str:
+    """
+    Check the badger optimization run archive root of the settings, and
+    create it if needed.
+    """
+    root = init_settings().read_value("BADGER_ARCHIVE_ROOT")
+    if root is None:
+        raise BadgerConfigError("Please set the BADGER_ARCHIVE_ROOT env var!")
+    elif not os.path.exists(root):
+        os.makedirs(root)
+        logger.info(f"Badger run root {root} created")
 
+    return root
 
-def archive_run(routine, states=None):
-    # routine: Routine
 
-    data = routine.sorted_data
-    data_dict = data.to_dict("list")
+# Read from the settings on first use rather than on import
+_lazy = LazyAttributes(
+    globals(),
+    {
+        "BADGER_ARCHIVE_ROOT": init_archive_root,
+        "ARCHIVE_INDEX": lambda: ArchiveIndex(get_archive_root()),
+    },
+)
+__getattr__ = _lazy.load
+
+
+def get_archive_root() -> str:
+    return _lazy.get("BADGER_ARCHIVE_ROOT")
+
+
+def get_archive_index() -> ArchiveIndex:
+    return _lazy.get("ARCHIVE_INDEX")
+
+
+# The files stored next to the run yaml file, if any: the interface recording
+# (pickled for older runs), the array observables and the columnar data
+RUN_FILE_EXTS = [RECORDING_EXT, ".pickle", ARRAYS_EXT, DATA_EXT, DATA_LOG_EXT]
+
+
+def get_run_location(routine, data_dict=None):
+    # Directory and file name the routine is archived to
     if hasattr(routine, "creation_ts"):
         suffix = routine.creation_ts
     else:  # compatibility with old routines
+        if data_dict is None:
+            data_dict = routine.sorted_data.to_dict("list")
         ts_float = data_dict["timestamp"][0]  # time of the first evaluated point
         suffix = ts_float_to_str(ts_float, "lcls-fname")
     tokens = suffix.split("-")
     first_level = tokens[0]
     second_level = f"{tokens[0]}-{tokens[1]}"
     third_level = f"{tokens[0]}-{tokens[1]}-{tokens[2]}"
-    path = os.path.join(BADGER_ARCHIVE_ROOT, first_level, second_level, third_level)
+    path = os.path.join(get_archive_root(), first_level, second_level, third_level)
     env_name = routine.environment.name
     # algo_name = routine.generator.name
     fname = f"{env_name}-{suffix}.yaml"
 
+    return path, fname
+
+
+def attach_arrays(routine):
+    # Stream the array observables of a new run to its archive location, so
+    # other processes (the GUI) can map them while the run goes on
+    if routine.arrays is None or routine.creation_ts is None:
+        return
+
+    path, fname = get_run_location(routine)
+    os.makedirs(path, exist_ok=True)
+    # The arrays of the data kept from a previous run are carried over
+    refs = [] if routine.data is None else find_array_refs(routine.data)
+    routine.arrays.attach(
+        os.path.join(path, os.path.splitext(fname)[0] + ARRAYS_EXT), keep=refs
+    )
+
+
+def archive_run(routine, states=None):
+    # routine: Routine
+
+    data = routine.sorted_data
+    data_dict = data.to_dict("list")
+    path, fname = get_run_location(routine, data_dict)
+
     run = {
         "filename": fname,
         "routine": routine,
@@ -49,7 +121,10 @@ def archive_run(routine, states=None):
         run["system_states"] = states
 
     os.makedirs(path, exist_ok=True)
-    routine.dump(os.path.join(path, fname))
+    dump_run(routine, os.path.join(path, fname), data)
+    if routine.arrays is not None:
+        routine.arrays.save(os.path.join(path, os.path.splitext(fname)[0] + ARRAYS_EXT))
+    _index_run(os.path.join(path, fname), routine, data)
 
     # Temporarily add path information
     # Do not save this info in database or on disk
@@ -58,16 +133,168 @@ def archive_run(routine, states=None):
     return run
 
 
-def clear_tmp_runs():
-    path = os.path.join(BADGER_ARCHIVE_ROOT, ".tmp")
+def _write_config(config: dict, filename: str):
+    tmp_filename = f"{filename}.tmp"
+    with open(tmp_filename, "w") as f:
+        dump_yaml(config, f)
+    os.replace(tmp_filename, filename)
+
+
+def dump_run(routine, filename, data=None):
+    """
+    Save a run as its routine config (yaml, without the data) and the run
+    data in a columnar file next to it.
+    """
+    if data is None:
+        data = routine.sorted_data
+
+    # The data goes first, a config without its data file would look empty
+    stem = os.path.splitext(filename)[0]
+    if data is not None:
+        save_data(data, stem + DATA_EXT)
+    _dump_config(routine, filename)
+
+    # The rows logged during the run are all in the data file now
+    try:
+        os.remove(stem + DATA_LOG_EXT)
+    except FileNotFoundError:
+        pass
+
+
+def _dump_config(routine, filename):
+    config = routine_to_dict(
+        routine,
+        serialize_torch=routine.serialize_torch,
+        serialize_inline=routine.serialize_inline,
+        include_data=False,
+    )
+    _write_config(config, filename)
+
+
+def start_run_log(routine) -> DataLog:
+    """
+    Start archiving a run in progress: the routine config is written once,
+    then every append of the returned log writes the new rows only. The run
+    is compacted into a data file by archive_run once it is over.
+    """
+    path, fname = get_run_location(routine)
+    os.makedirs(path, exist_ok=True)
+    filename = os.path.join(path, fname)
+
+    run_log = DataLog(os.path.splitext(filename)[0] + DATA_LOG_EXT)
+    if routine.data is not None:
+        run_log.append(routine.data)
+    _dump_config(routine, filename)
+    # Runs in progress are listed too, the final archive_run updates them
+    _index_run(filename, routine, routine.data)
+
+    return run_log
+
+
+def get_run_files(filename: str) -> List[str]:
+    """
+    Paths of the files of the run saved in filename (the yaml file), the
+    yaml file included, that exist.
+    """
+    stem = os.path.splitext(filename)[0]
+    files = [filename] + [stem + ext for ext in RUN_FILE_EXTS]
+
+    return [f for f in files if os.path.exists(f)]
+
+
+def get_run_size(filename: str) -> int:
+    return sum(os.path.getsize(f) for f in get_run_files(filename))
+
+
+def _index_run(filename, routine, data):
+    try:
+        get_archive_index().add(
+            filename,
+            environment=routine.environment.name,
+            generator=routine.generator.name,
+            routine_id=routine.id,
+            name=routine.name,
+            size=get_run_size(filename),
+            **summarize_data(routine.vocs, data),
+        )
+    except sqlite3.Error as e:
+        # The run is archived all the same, rebuild_index picks it up
+        logger.warning(f"Failed to index run {filename}: {e}")
+
+
+def migrate_run(filename: str) -> bool:
+    """
+    Convert a run archived as a single yaml file (routine and data) to the
+    columnar format, in place.
+
+    Returns
+    -------
+    bool
+        True if the run was converted, False if there was nothing to do.
+    """
+    with open(filename, "r") as f:
+        config = load_yaml(f)
+
+    data_dict = config.pop("data", None)
+    if not isinstance(data_dict, dict):
+        return False
+
+    save_data(data_from_dict(data_dict), os.path.splitext(filename)[0] + DATA_EXT)
+    _write_config(config, filename)
+
+    return True
+
+
+def migrate_archive(on_progress=None) -> int:
+    """
+    Convert all the yaml runs in the archive to the columnar format.
+
+    Parameters
+    ----------
+    on_progress : callable, optional
+        Called as on_progress(filename, converted) after each run.
+
+    Returns
+    -------
+    int
+        Number of runs converted.
+    """
+    n_converted = 0
+    for filename in walk_runs():
+        try:
+            converted = migrate_run(filename)
+        except Exception as e:
+            logger.warning(f"Failed to migrate run {filename}: {e}")
+            converted = False
+        n_converted += converted
+        if on_progress is not None:
+            on_progress(filename, converted)
+
+    return n_converted
+
+
+def clear_tmp_runs(max_age: Optional[float] = None) -> int:
+    """
+    Remove the temporary runs, or only the ones older than max_age seconds.
+    Returns the number of files removed.
+    """
+    path = os.path.join(get_archive_root(), ".tmp")
+    n_removed = 0
     if os.path.exists(path):
+        now = time.time()
         for f in os.listdir(path):
-            os.remove(os.path.join(path, f))
+            filename = os.path.join(path, f)
+            if max_age is not None and now - os.path.getmtime(filename) < max_age:
+                continue
+            os.remove(filename)
+            n_removed += 1
+
+    return n_removed
 
 
 def save_tmp_run(routine):
     # routine: Routine
-    path = os.path.join(BADGER_ARCHIVE_ROOT, ".tmp")
+    path = os.path.join(get_archive_root(), ".tmp")
     suffix = time.strftime("%Y-%m-%d-%H%M%S")
     fname = f".tmp-BadgerOpt-{suffix}.yaml"
 
@@ -77,19 +304,24 @@ def save_tmp_run(routine):
     return fname
 
 
-def list_run():
-    runs = {}
+def walk_runs() -> List[str]:
+    """
+    The run files in the archive tree, latest first, found by walking the
+    year/month/day directories. Use get_runs to list the runs, this is for
+    the maintenance tasks that have to see every file.
+    """
+    run_list = []
     # Get years, latest first
     years = sorted(
         [
             p
-            for p in os.listdir(BADGER_ARCHIVE_ROOT)
-            if os.path.isdir(os.path.join(BADGER_ARCHIVE_ROOT, p))
+            for p in os.listdir(get_archive_root())
+            if os.path.isdir(os.path.join(get_archive_root(), p))
         ],
         reverse=True,
     )
     for year in years:
-        path_year = os.path.join(BADGER_ARCHIVE_ROOT, year)
+        path_year = os.path.join(get_archive_root(), year)
         months = sorted(
             [
                 p
@@ -98,7 +330,6 @@ def list_run():
             ],
             reverse=True,
         )
-        runs[year] = {}
         for month in months:
             path_month = os.path.join(path_year, month)
             days = sorted(
@@ -109,63 +340,318 @@ def list_run():
                 ],
                 reverse=True,
             )
-            runs[year][month] = {}
             for day in days:
                 path_day = os.path.join(path_month, day)
                 files = [
-                    p for p in os.listdir(path_day) if os.path.splitext(p)[1] == ".yaml"
+                    os.path.join(path_day, p)
+                    for p in os.listdir(path_day)
+                    if os.path.splitext(p)[1] == ".yaml"
                 ]
-                files = [
-                    os.path.join(path_day, f) for f in files
-                ]  # Save the full path into the result arr
-                files = sorted(
-                    files,
-                    key=lambda f: os.path.getmtime(os.path.join(path_day, f)),
-                    reverse=True,
-                )
-                runs[year][month][day] = files
+                run_list += sorted(files, key=os.path.getmtime, reverse=True)
+
+    return run_list
+
+
+def rebuild_index(on_progress=None) -> int:
+    """
+    Index all the runs in the archive tree, replacing the current index.
+
+    Parameters
+    ----------
+    on_progress : callable, optional
+        Called as on_progress(filename) after each run.
+
+    Returns
+    -------
+    int
+        Number of runs indexed.
+    """
+
+    def entries():
+        for filename in walk_runs():
+            try:
+                run = ArchivedRun(filename)
+                fields = {
+                    "environment": run.environment_name,
+                    "generator": run.generator_name,
+                    "routine_id": run.config.get("id"),
+                    "name": run.name,
+                    "size": get_run_size(filename),
+                    **summarize_data(run.vocs, run.data),
+                }
+            except Exception as e:
+                # Listed all the same, loading it tells what is wrong
+                logger.warning(f"Failed to read run {filename}: {e}")
+                fields = {}
+            if on_progress is not None:
+                on_progress(filename)
+
+            yield filename, fields
+
+    return get_archive_index().rebuild(entries())
+
+
+def ensure_index():
+    """
+    Build the archive index if it does not exist yet.
+    """
+    if not get_archive_index().is_built:
+        # Archive written before the index, or by an older Badger
+        rebuild_index()
+
+
+def get_run_periods(prefix: Optional[str] = None) -> List[str]:
+    """
+    The years the archived runs were created in, latest first. Or, given a
+    year ("2024"), its months ("2024-05"), and given a month, its days
+    ("2024-05-17").
+    """
+    ensure_index()
+    length = 4 if prefix is None else {4: 7, 7: 10}[len(prefix)]
+
+    return get_archive_index().periods(length, prefix)
+
+
+def count_runs() -> int:
+    ensure_index()
+
+    return get_archive_index().count()
+
+
+def query_runs(
+    environment: Optional[str] = None,
+    routine_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> List[Dict]:
+    """
+    The archived runs matching the filters, latest first, with their index
+    entries (environment, generator, routine_id, name, created, started,
+    finished, n_points, best, fullpath). See ArchiveIndex.query.
+    """
+    ensure_index()
+
+    return get_archive_index().query(
+        environment=environment,
+        routine_id=routine_id,
+        since=since,
+        until=until,
+        limit=limit,
+    )
+
+
+def list_run():
+    # Runs as {year: {month: {day: [run files]}}}, latest first
+    runs = {}
+    for filename in get_runs():
+        path_day = os.path.dirname(filename)
+        path_month = os.path.dirname(path_day)
+        year = os.path.basename(os.path.dirname(path_month))
+        month = os.path.basename(path_month)
+        day = os.path.basename(path_day)
+        runs.setdefault(year, {}).setdefault(month, {}).setdefault(day, [])
+        runs[year][month][day].append(filename)
 
     return runs
 
 
-def get_runs():
-    runs = list_run()
-    run_list = []
-    for year, months in runs.items():
-        for month, days in months.items():
-            for day, files in days.items():
-                for run_fname in files:
-                    run_list.append(run_fname)
+def get_runs(**filters) -> List[str]:
+    """
+    Full paths of the archived runs, latest first.
 
-    return run_list
+    Parameters
+    ----------
+    **filters
+        Filters of query_runs (environment, routine_id, since, until, limit).
+    """
+    try:
+        return [run["fullpath"] for run in query_runs(**filters)]
+    except sqlite3.Error as e:
+        if filters:
+            raise
+        logger.warning(f"Archive index unavailable, walking the archive: {e}")
+
+        return walk_runs()
 
 
-def load_run(run_fname: str) -> Routine:
+def get_run_filename(run_fname: str) -> str:
     if run_fname.startswith(".tmp"):  # temp run file
-        filename = os.path.join(BADGER_ARCHIVE_ROOT, ".tmp", run_fname)
-    else:
-        tokens = run_fname.split("-")
-        first_level = tokens[1]
-        second_level = f"{tokens[1]}-{tokens[2]}"
-        third_level = f"{tokens[1]}-{tokens[2]}-{tokens[3]}"
+        return os.path.join(get_archive_root(), ".tmp", run_fname)
+
+    tokens = run_fname.split("-")
+    first_level = tokens[1]
+    second_level = f"{tokens[1]}-{tokens[2]}"
+    third_level = f"{tokens[1]}-{tokens[2]}-{tokens[3]}"
+
+    return os.path.join(
+        get_archive_root(), first_level, second_level, third_level, run_fname
+    )
 
-        filename = os.path.join(
-            BADGER_ARCHIVE_ROOT, first_level, second_level, third_level, run_fname
-        )
 
-    # TODO: create utility function to catch warnings to remove code
-    # duplication
-    with warnings.catch_warnings(record=True) as caught_warnings:
-        routine = Routine.from_file(filename)
+class ArchivedRun:
+    """
+    Handle on an archived run that only reads the routine config up front.
 
-        # Check if any user warnings were caught
-        for warning in caught_warnings:
-            if issubclass(warning.category, UserWarning):
-                pass
-            else:
-                print(f"Caught warning: {warning.message}")
+    The metadata and VOCS are available right away, the data is read on
+    first access, and the full Routine (generator, environment, interface)
+    is only built when an attribute that needs it is accessed. Attributes
+    that are not defined here are looked up on that Routine.
 
-    return routine
+    Parameters
+    ----------
+    filename : str
+        Path of the run yaml file.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+        with open(filename, "r") as f:
+            # The config is small once the data is out, but old runs are not
+            config = load_yaml(f)
+        self.config = remove_none_values(config)
+
+        self._data = self.config.pop("data", None)  # dict for old runs
+        self._vocs = None
+        self._routine = None
+
+    def __getattr__(self, name):
+        # Only called for the attributes not found on the handle itself
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        return getattr(self.routine, name)
+
+    @property
+    def name(self) -> str:
+        return self.config.get("name")
+
+    @property
+    def description(self) -> str:
+        return self.config.get("description", "")
+
+    @property
+    def creation_ts(self) -> str:
+        return self.config.get("creation_ts")
+
+    @property
+    def environment_name(self) -> str:
+        return self.config["environment"]["name"]
+
+    @property
+    def generator_name(self) -> str:
+        generator = self.config["generator"]
+
+        return generator if isinstance(generator, str) else generator["name"]
+
+    @property
+    def vocs(self) -> VOCS:
+        if self._routine is not None:
+            return self._routine.vocs
+
+        if self._vocs is None:
+            self._vocs = vocs_from_config(self.config)
+
+        return self._vocs
+
+    @property
+    def data(self) -> DataFrame:
+        if self._routine is not None:
+            return self._routine.data
+
+        if not isinstance(self._data, DataFrame):
+            self._data = self._load_data()
+
+        return self._data
+
+    @data.setter
+    def data(self, value: DataFrame):
+        if self._routine is not None:
+            self._routine.data = value
+        else:
+            self._data = value
+
+    @property
+    def sorted_data(self) -> DataFrame:
+        if self._routine is not None:
+            return self._routine.sorted_data
+
+        # The loaders sort the data already
+        data = self.data
+
+        return None if data is None else data.copy(deep=False)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._routine is not None
+
+    @property
+    def routine(self) -> Routine:
+        """
+        The full Routine, built on first access.
+        """
+        if self._routine is None:
+            config = deepcopy(self.config)  # the validation consumes it
+            data = self.data
+            if data is not None:
+                config["data"] = data.copy()
+
+            # TODO: create utility function to catch warnings to remove code
+            # duplication
+            with warnings.catch_warnings(record=True) as caught_warnings:
+                routine = Routine.model_validate(config)
+
+                # Check if any user warnings were caught
+                for warning in caught_warnings:
+                    if issubclass(warning.category, UserWarning):
+                        pass
+                    else:
+                        print(f"Caught warning: {warning.message}")
+
+            arrays_filename = os.path.splitext(self.filename)[0] + ARRAYS_EXT
+            if os.path.exists(arrays_filename):
+                routine.arrays.attach(arrays_filename)
+
+            self._routine = routine
+
+        return self._routine
+
+    def _load_data(self) -> Optional[DataFrame]:
+        if isinstance(self._data, dict):
+            data = data_from_dict(self._data)
+        else:
+            data = load_run_data(self.filename)
+            if data is None:
+                return None
+
+        return restore_array_refs(data)
+
+
+def load_run(run_fname: str, lazy: bool = False) -> Union[Routine, ArchivedRun]:
+    """
+    Load an archived run.
+
+    Parameters
+    ----------
+    run_fname : str
+        File name of the run, or path of a run file.
+    lazy : bool
+        Return an ArchivedRun handle instead of the Routine, so that only
+        the parts of the run actually used are loaded. Browsing the runs
+        this way never instantiates an environment or an interface.
+
+    Returns
+    -------
+    Routine or ArchivedRun
+    """
+    if os.path.isfile(run_fname):
+        filename = run_fname
+    else:
+        filename = get_run_filename(run_fname)
+    run = ArchivedRun(filename)
+
+    return run if lazy else run.routine
 
 
 def update_run(routine: Routine):
@@ -173,22 +659,23 @@ def update_run(routine: Routine):
 
 
 def delete_run(run_fname):
-    tokens = run_fname.split("-")
-    first_level = tokens[1]
-    second_level = f"{tokens[1]}-{tokens[2]}"
-    third_level = f"{tokens[1]}-{tokens[2]}-{tokens[3]}"
+    prefix = os.path.dirname(get_run_filename(run_fname))
 
-    prefix = os.path.join(BADGER_ARCHIVE_ROOT, first_level, second_level, third_level)
-
-    # Try remove the pickle file (could exist or not)
-    pickle_fname = os.path.splitext(run_fname)[0] + ".pickle"
-    try:
-        os.remove(os.path.join(prefix, pickle_fname))
-    except FileNotFoundError:
-        pass
+    # Try remove the interface recording (could exist or not), older runs
+    # have it pickled, the array observables and the columnar data
+    for ext in RUN_FILE_EXTS:
+        recording_fname = os.path.splitext(run_fname)[0] + ext
+        try:
+            os.remove(os.path.join(prefix, recording_fname))
+        except FileNotFoundError:
+            pass
 
     # Remove the yaml data file
     os.remove(os.path.join(prefix, run_fname))
+    try:
+        get_archive_index().remove(run_fname)
+    except sqlite3.Error as e:
+        logger.warning(f"Failed to remove run {run_fname} from the index: {e}")
 
 
 def get_base_run_filename(run_filename):
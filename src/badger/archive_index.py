@@ -0,0 +1,537 @@
+import logging
+import os
+import sqlite3
+from copy import deepcopy
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from xopt.vocs import VOCS, select_best
+
+from badger.database import Database, split_statements
+
+logger = logging.getLogger(__name__)
+
+# The index lives in the archive root, so it always describes the tree it is
+# in, whichever Badger instance (or Badger version) wrote the runs
+INDEX_FILENAME = ".index.db"
+SCHEMA_VERSION = 3
+
+# Number of changes kept in the change log, a reader that fell further
+# behind starts over from the run table
+MAX_CHANGES = 1000
+
+SCHEMA = """
+create table if not exists meta (key text primary key, value);
+create table if not exists run (
+    filename text primary key,
+    path text,
+    environment text,
+    generator text,
+    routine_id text,
+    name text,
+    created text,
+    started real,
+    finished real,
+    n_points integer,
+    best real,
+    mtime real,
+    size integer,
+    maintained real
+);
+create index if not exists run_created on run (created);
+create index if not exists run_environment on run (environment, created);
+create index if not exists run_routine_id on run (routine_id, created);
+create table if not exists summary (
+    filename text primary key,
+    mtime real,
+    objective text,
+    direction text,
+    n_feasible integer,
+    n_errors integer,
+    evals_to_best integer,
+    evals_to_converge integer,
+    duration real
+);
+create table if not exists change (
+    seq integer primary key autoincrement,
+    filename text,
+    kind text
+);
+"""
+
+# Statements dropping an index written by another version of Badger
+RESET_SCHEMA = """
+drop table run;
+drop table meta;
+drop table change;
+drop table if exists content;
+drop table if exists summary;
+"""
+
+# Figures of the runs that take their data to compute, see badger.analytics
+SUMMARY_FIELDS = [
+    "filename",
+    "mtime",  # of the run when summarized, the summary is stale if it changed
+    "objective",
+    "direction",
+    "n_feasible",
+    "n_errors",
+    "evals_to_best",
+    "evals_to_converge",
+    "duration",
+]
+
+# Kinds of changes to the index
+ADDED = "added"
+MODIFIED = "modified"
+REMOVED = "removed"
+RESET = "reset"  # rebuilt, any of the runs may have changed
+
+RUN_FIELDS = [
+    "filename",
+    "path",
+    "environment",
+    "generator",
+    "routine_id",
+    "name",
+    "created",
+    "started",
+    "finished",
+    "n_points",
+    "best",
+    "mtime",
+    "size",  # bytes, all the files of the run
+    "maintained",  # time of the last maintenance pass over the run
+]
+
+
+def vocs_from_config(config: dict) -> VOCS:
+    """
+    The VOCS of a routine config, as stored in the archive.
+    """
+    vocs = config.get("vocs") or config["generator"]["vocs"]
+    # Same as Routine, empty fields do not validate. The validation edits
+    # the dicts it gets, and the config is needed intact
+    vocs = deepcopy({k: v for k, v in vocs.items() if v})
+
+    return VOCS(**vocs)
+
+
+def summarize_data(vocs: VOCS, data: Optional[pd.DataFrame]) -> dict:
+    """
+    The figures of a run stored in the index: number of points, time of the
+    first and last evaluations, and the best objective value (single
+    objective runs only, infeasible points ignored).
+    """
+    summary = {"n_points": 0, "started": None, "finished": None, "best": None}
+    if data is None or data.empty:
+        return summary
+
+    summary["n_points"] = len(data)
+    if "timestamp" in data:
+        timestamps = pd.to_numeric(data["timestamp"], errors="coerce").dropna()
+        if len(timestamps):
+            summary["started"] = float(timestamps.min())
+            summary["finished"] = float(timestamps.max())
+    try:
+        _, values, _ = select_best(vocs, data)
+        summary["best"] = float(values[0])
+    except Exception:  # multi-objective, nothing feasible, missing columns
+        pass
+
+    return summary
+
+
+class ArchiveIndex:
+    """
+    SQLite index of the runs in an archive tree, so that listing and
+    filtering runs does not walk the year/month/day directories.
+
+    The index is kept up to date by the archive functions that write and
+    delete runs. Trees written before it existed (or changed by hand) are
+    indexed with rebuild, which the first query does on its own when the
+    index is empty.
+
+    Parameters
+    ----------
+    root : str
+        The archive root.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.filename = os.path.join(root, INDEX_FILENAME)
+        self.db: Optional[Database] = None
+        self._checked_pid = None  # process the version was checked in
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.db is None or not os.path.exists(self.filename):
+            # Removed since, with the archive or by hand, start over. The
+            # archive may be on a network filesystem, where WAL is not
+            # supported
+            self.db = Database(self.filename, SCHEMA, journal_mode="delete")
+            self._checked_pid = None
+        con = self.db.connection()
+        if self._checked_pid != os.getpid():
+            version = self._get_meta(con, "version")
+            if version is not None and version != SCHEMA_VERSION:
+                # Written by another version of Badger, start over, the next
+                # query rebuilds the index
+                with self.db.transaction():
+                    for statement in split_statements(RESET_SCHEMA + SCHEMA):
+                        con.execute(statement)
+            self._checked_pid = os.getpid()
+
+        return con
+
+    def _transaction(self):
+        self._connect()  # check the version first
+
+        return self.db.transaction()
+
+    def _get_meta(self, con, key: str):
+        record = con.execute("select value from meta where key = ?", (key,)).fetchone()
+
+        return record[0] if record else None
+
+    @property
+    def is_built(self) -> bool:
+        con = self._connect()
+        return self._get_meta(con, "version") == SCHEMA_VERSION
+
+    def add(self, filename: str, **fields):
+        """
+        Add a run to the index, or update its entry.
+
+        Parameters
+        ----------
+        filename : str
+            Path of the run yaml file, in the archive tree.
+        **fields
+            The other columns of the run table (environment, generator,
+            routine_id, name, n_points, ...).
+        """
+        entry = self._entry(filename, fields)
+        with self._transaction() as con:
+            exists = con.execute(
+                "select 1 from run where filename = ?", (entry[0],)
+            ).fetchone()
+            con.execute(
+                f"insert or replace into run ({', '.join(RUN_FIELDS)}) "
+                f"values ({', '.join('?' * len(RUN_FIELDS))})",
+                entry,
+            )
+            self._log_change(con, entry[0], MODIFIED if exists else ADDED)
+
+    def update(self, filename: str, **fields):
+        """
+        Update some columns of the entry of a run.
+        """
+        fname = os.path.basename(filename)
+        with self._transaction() as con:
+            cur = con.execute(
+                f"update run set {', '.join(f'{k} = ?' for k in fields)} "
+                "where filename = ?",
+                [*fields.values(), fname],
+            )
+            if cur.rowcount:
+                self._log_change(con, fname, MODIFIED)
+
+    def remove(self, filename: str):
+        fname = os.path.basename(filename)
+        with self._transaction() as con:
+            cur = con.execute("delete from run where filename = ?", (fname,))
+            if cur.rowcount:
+                self._log_change(con, fname, REMOVED)
+
+    def _log_change(self, con, fname: Optional[str], kind: str):
+        cur = con.execute("insert into change values (null, ?, ?)", (fname, kind))
+        con.execute("delete from change where seq <= ?", (cur.lastrowid - MAX_CHANGES,))
+
+    def _entry(self, filename: str, fields: dict) -> tuple:
+        path, fname = os.path.split(filename)
+        try:
+            mtime = os.path.getmtime(filename)
+        except OSError:
+            mtime = None
+        entry = {
+            "filename": fname,
+            "path": os.path.relpath(path, self.root),
+            # The run time stamp that names the file, and its directories
+            "created": "-".join(os.path.splitext(fname)[0].split("-")[-4:]),
+            "mtime": mtime,
+        } | fields
+
+        return tuple(entry.get(k) for k in RUN_FIELDS)
+
+    def rebuild(self, entries) -> int:
+        """
+        Replace the content of the index, in a single transaction.
+
+        Parameters
+        ----------
+        entries : iterable of (str, dict)
+            The (filename, fields) of every run, as given to add.
+
+        Returns
+        -------
+        int
+            Number of runs indexed.
+        """
+        rows = [self._entry(filename, fields) for filename, fields in entries]
+        with self._transaction() as con:
+            con.execute("delete from run")
+            con.executemany(
+                f"insert or replace into run ({', '.join(RUN_FIELDS)}) "
+                f"values ({', '.join('?' * len(RUN_FIELDS))})",
+                rows,
+            )
+            con.execute(
+                "insert or replace into meta values ('version', ?)", (SCHEMA_VERSION,)
+            )
+            self._log_change(con, None, RESET)
+
+        return len(rows)
+
+    @property
+    def last_change(self) -> int:
+        """
+        Sequence number of the latest change, to give to changes.
+        """
+        con = self._connect()
+        return con.execute("select coalesce(max(seq), 0) from change").fetchone()[0]
+
+    def changes(self, since: int) -> Tuple[int, List[Tuple[str, Optional[Dict]]]]:
+        """
+        The changes made to the index after a given one, by any process.
+
+        Parameters
+        ----------
+        since : int
+            Sequence number of the last change already seen, from
+            last_change or from a previous call.
+
+        Returns
+        -------
+        int
+            Sequence number of the latest change.
+        list of (str, dict)
+            The changes in order, as (kind, run). The run is the index entry
+            (as returned by query) for ADDED and MODIFIED, a dict with the
+            filename and fullpath for REMOVED, and None for RESET. Changes
+            that are no longer logged are reported as a single RESET.
+        """
+        con = self._connect()
+        last, first = con.execute(
+            "select coalesce(max(seq), 0), coalesce(min(seq), 1) from change"
+        ).fetchone()
+        if last < since or since < first - 1:
+            # The index was recreated, or the reader fell behind the log
+            return last, [(RESET, None)]
+
+        records = con.execute(
+            "select seq, filename, kind from change where seq > ? order by seq",
+            (since,),
+        ).fetchall()
+        if not records:
+            return since, []
+
+        # The latest state of each run changed
+        fnames = {fname for _, fname, kind in records if kind != REMOVED}
+        fnames.discard(None)
+        entries = {
+            run["filename"]: run
+            for run in self._select(
+                con,
+                f"where filename in ({', '.join('?' * len(fnames))})",
+                list(fnames),
+            )
+        }
+
+        changes = []
+        for _, fname, kind in records:
+            if kind == RESET:
+                changes.append((RESET, None))
+            elif kind == REMOVED or fname not in entries:
+                changes.append((REMOVED, self._removed_entry(fname)))
+            else:
+                changes.append((kind, entries[fname]))
+
+        return records[-1][0], changes
+
+    def _removed_entry(self, fname: str) -> Dict:
+        created = "-".join(os.path.splitext(fname)[0].split("-")[-4:])
+        path = os.path.join(created[:4], created[:7], created[:10])
+
+        return {
+            "filename": fname,
+            "created": created,
+            "fullpath": os.path.join(self.root, path, fname),
+        }
+
+    def periods(self, length: int, prefix: Optional[str] = None) -> List[str]:
+        """
+        The distinct periods the runs were created in, latest first.
+
+        Parameters
+        ----------
+        length : int
+            Length of the period time stamps: 4 for years, 7 for months,
+            10 for days.
+        prefix : str, optional
+            Only the periods within this one, such as the months of "2024".
+
+        Returns
+        -------
+        list of str
+        """
+        sql = f"select distinct substr(created, 1, {int(length)}) from run"
+        params = []
+        if prefix is not None:
+            sql += " where created >= ? and created < ?"
+            params += [prefix, prefix + "\x7f"]
+        sql += " order by 1 desc"
+
+        con = self._connect()
+        return [record[0] for record in con.execute(sql, params)]
+
+    def count(self) -> int:
+        con = self._connect()
+        return con.execute("select count(*) from run").fetchone()[0]
+
+    def total_size(self) -> int:
+        """
+        Size of the indexed runs, in bytes.
+        """
+        con = self._connect()
+        return con.execute("select coalesce(sum(size), 0) from run").fetchone()[0]
+
+    def stale_summaries(self) -> List[Dict]:
+        """
+        The runs with no summary, or a summary older than the run.
+        """
+        con = self._connect()
+        return self._select(
+            con,
+            f"select {', '.join(f'r.{k}' for k in RUN_FIELDS)} from run r "
+            "left join summary s on s.filename = r.filename "
+            "where s.filename is null or s.mtime is not r.mtime "
+            "order by r.created",
+            [],
+        )
+
+    def add_summaries(self, summaries: List[Dict]):
+        """
+        Store run summaries (dicts with the SUMMARY_FIELDS), and drop the
+        ones of the runs no longer indexed.
+        """
+        with self._transaction() as con:
+            con.executemany(
+                f"insert or replace into summary ({', '.join(SUMMARY_FIELDS)}) "
+                f"values ({', '.join('?' * len(SUMMARY_FIELDS))})",
+                [
+                    tuple(summary.get(k) for k in SUMMARY_FIELDS)
+                    for summary in summaries
+                ],
+            )
+            con.execute(
+                "delete from summary where filename not in (select filename from run)"
+            )
+
+    def read_summaries(self, where: str = "1", params=()) -> pd.DataFrame:
+        """
+        The index entries and summaries of the runs matching a SQL condition
+        on their columns, as a DataFrame with one row per run.
+        """
+        columns = [f"r.{k}" for k in RUN_FIELDS] + [
+            f"s.{k}" for k in SUMMARY_FIELDS if k not in RUN_FIELDS
+        ]
+        sql = (
+            f"select {', '.join(columns)} from run r "
+            f"join summary s on s.filename = r.filename where {where} "
+            "order by r.created"
+        )
+        con = self._connect()
+        return pd.read_sql_query(sql, con, params=list(params))
+
+    def select(self, where: str, params=(), order: str = "created", limit=None):
+        """
+        The runs matching a SQL condition on the columns of the run table,
+        such as "created < ? and maintained is null", in the given order.
+        """
+        sql = f"where {where} order by {order}"
+        params = list(params)
+        if limit is not None:
+            sql += " limit ?"
+            params.append(int(limit))
+
+        con = self._connect()
+        return self._select(con, sql, params)
+
+    def query(
+        self,
+        environment: Optional[str] = None,
+        routine_id: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        The indexed runs, latest first.
+
+        Parameters
+        ----------
+        environment : str, optional
+            Only the runs of this environment.
+        routine_id : str, optional
+            Only the runs of this routine.
+        since, until : str, optional
+            Only the runs created in this range (inclusive), as time stamps
+            in the archive format (YYYY-MM-DD-HHMMSS) or a prefix of one,
+            such as "2024-05".
+        limit : int, optional
+            Maximum number of runs returned.
+
+        Returns
+        -------
+        list of dict
+            The index entries, with the full path of the run file under
+            "fullpath".
+        """
+        conditions, params = [], []
+        if environment is not None:
+            conditions.append("environment = ?")
+            params.append(environment)
+        if routine_id is not None:
+            conditions.append("routine_id = ?")
+            params.append(routine_id)
+        if since is not None:
+            conditions.append("created >= ?")
+            params.append(since)
+        if until is not None:
+            # Any time stamp starting with until is in range
+            conditions.append("created < ?")
+            params.append(until + "\x7f")
+
+        sql = f"select {', '.join(RUN_FIELDS)} from run"
+        if conditions:
+            sql += " where " + " and ".join(conditions)
+        sql += " order by created desc, mtime desc"
+        if limit is not None:
+            sql += " limit ?"
+            params.append(int(limit))
+
+        con = self._connect()
+        return self._select(con, sql, params)
+
+    def _select(self, con, sql: str, params) -> List[Dict]:
+        if not sql.startswith("select"):
+            sql = f"select {', '.join(RUN_FIELDS)} from run {sql}"
+
+        runs = []
+        for record in con.execute(sql, params):
+            run = dict(zip(RUN_FIELDS, record))
+            run["fullpath"] = os.path.join(self.root, run["path"], run["filename"])
+            runs.append(run)
+
+        return runs
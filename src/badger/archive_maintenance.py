@@ -0,0 +1,317 @@
+import gzip
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from badger.archive import (
+    clear_tmp_runs,
+    delete_run,
+    ensure_index,
+    get_archive_index,
+    get_run_size,
+    migrate_run,
+)
+from badger.arrays import ARRAYS_EXT
+from badger.columnar import DATA_EXT, DATA_LOG_EXT, load_data_log, save_data
+from badger.db import get_db, remove_runs_by_filename
+from badger.errors import BadgerConfigError, BadgerDBError
+from badger.recorder import GZIP_MAGIC, RECORDING_EXT
+from badger.settings import init_settings
+
+logger = logging.getLogger(__name__)
+
+# Files of cold runs compressed in place, the recordings and the arrays. zlib
+# at its fastest level, they compress several times over at a few hundred
+# MB/s. The readers detect the compression, so it is invisible to load_run
+# and the others. The columnar data files are compressed when written
+COMPRESSED_EXTS = [RECORDING_EXT, ".pickle", ARRAYS_EXT]
+COMPRESS_LEVEL = 1
+
+TMP_MAX_AGE = 86400  # temporary runs are removed after a day, unit is second
+DAY = 86400
+
+
+class RateLimiter:
+    """
+    Limit the rate of some work, the I/O of the maintenance in bytes.
+
+    Parameters
+    ----------
+    rate : float, optional
+        Units of work per second, no limit if None or 0.
+    stop_event : threading.Event, optional
+        Waiting is interrupted when it is set.
+    """
+
+    def __init__(self, rate: Optional[float] = None, stop_event=None):
+        self.rate = rate
+        self.stop_event = stop_event or threading.Event()
+        self._next = time.monotonic()
+
+    def consume(self, amount: float) -> bool:
+        """
+        Account for some work done, waiting until the rate allows it.
+        Returns False if the wait was interrupted by the stop event.
+        """
+        if not self.rate:
+            return not self.stop_event.is_set()
+
+        now = time.monotonic()
+        self._next = max(self._next, now) + amount / self.rate
+
+        return not self.stop_event.wait(max(0.0, self._next - now))
+
+
+def _replace_file(filename: str, payload: bytes):
+    stat = os.stat(filename)
+    tmp_filename = f"{filename}.tmp"
+    with open(tmp_filename, "wb") as f:
+        f.write(payload)
+    os.utime(tmp_filename, (stat.st_atime, stat.st_mtime))  # keep the run order
+    os.replace(tmp_filename, filename)
+
+
+def compress_file(filename: str) -> int:
+    """
+    Compress a file in place, unless it is compressed already.
+
+    Returns
+    -------
+    int
+        Bytes read and written.
+    """
+    with open(filename, "rb") as f:
+        raw = f.read()
+    if raw.startswith(GZIP_MAGIC):
+        return len(raw)
+
+    payload = gzip.compress(raw, COMPRESS_LEVEL, mtime=0)
+    _replace_file(filename, payload)
+
+    return len(raw) + len(payload)
+
+
+def compact_run(filename: str) -> int:
+    """
+    Store a run in its most compact form: the data of an old yaml run, or
+    the log of a run that never finished, goes into a columnar data file,
+    and the recordings and arrays are compressed.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the run yaml file.
+
+    Returns
+    -------
+    int
+        Bytes read and written.
+    """
+    size = os.path.getsize(filename)
+    n_bytes = size
+    if migrate_run(filename):
+        n_bytes += size
+
+    stem = os.path.splitext(filename)[0]
+    if os.path.exists(stem + DATA_LOG_EXT):
+        n_bytes += os.path.getsize(stem + DATA_LOG_EXT)
+        save_data(load_data_log(stem + DATA_LOG_EXT), stem + DATA_EXT)
+        os.remove(stem + DATA_LOG_EXT)
+        n_bytes += os.path.getsize(stem + DATA_EXT)
+
+    for ext in COMPRESSED_EXTS:
+        if os.path.exists(stem + ext):
+            n_bytes += compress_file(stem + ext)
+
+    return n_bytes
+
+
+def prune_runs(
+    max_age: float = 0, max_size: float = 0, cold_days: float = 0
+) -> List[str]:
+    """
+    Delete the runs that fall out of the retention policies, and their
+    records in the database.
+
+    Parameters
+    ----------
+    max_age : float
+        Delete the runs older than that many days, 0 to keep them.
+    max_size : float
+        Delete the oldest runs until the archive is smaller than that many
+        MB, 0 for no limit.
+    cold_days : float
+        Runs created less than that many days ago are never deleted to make
+        room.
+
+    Returns
+    -------
+    list of str
+        File names of the runs deleted.
+    """
+    index = get_archive_index()
+    deleted = []
+
+    def delete(run):
+        try:
+            delete_run(run["filename"])
+        except FileNotFoundError:  # removed by hand
+            index.remove(run["filename"])
+        deleted.append(run["filename"])
+
+    if max_age:
+        for run in index.select("created < ?", [_time_stamp(max_age)]):
+            delete(run)
+
+    if max_size:
+        excess = index.total_size() - max_size * 1e6
+        if excess > 0:
+            for run in index.select("created < ?", [_time_stamp(cold_days)]):
+                delete(run)
+                excess -= run["size"] or 0
+                if excess <= 0:
+                    break
+
+    if deleted:
+        try:
+            if get_db() is not None:
+                remove_runs_by_filename(deleted)
+        except (BadgerConfigError, BadgerDBError, sqlite3.Error) as e:
+            logger.warning(f"Failed to remove the deleted runs from the database: {e}")
+
+    return deleted
+
+
+def _time_stamp(days: float) -> str:
+    # Time stamp of that many days ago, in the archive format
+    return time.strftime("%Y-%m-%d-%H%M%S", time.localtime(time.time() - days * DAY))
+
+
+def maintain_archive(
+    cold_days: float = 30,
+    max_age: float = 0,
+    max_size: float = 0,
+    rate: Optional[float] = None,
+    stop_event: Optional[threading.Event] = None,
+    on_progress=None,
+) -> Dict[str, int]:
+    """
+    One maintenance pass over the archive:
+
+    - remove the temporary runs older than a day,
+    - delete the runs that fall out of the retention policies (see
+      prune_runs),
+    - compact and compress the runs that went cold since the last pass.
+
+    The runs to process are found in the archive index, so a pass only
+    touches the files of the runs it changes.
+
+    Parameters
+    ----------
+    cold_days : float
+        Runs created that many days ago or more are cold.
+    max_age, max_size : float
+        Retention policies, see prune_runs.
+    rate : float, optional
+        Maximum I/O, in bytes per second.
+    stop_event : threading.Event, optional
+        The pass stops early when it is set.
+    on_progress : callable, optional
+        Called as on_progress(filename) after each run processed.
+
+    Returns
+    -------
+    dict
+        Numbers of temporary runs removed ("tmp_removed"), runs deleted
+        ("deleted"), runs compacted ("compacted"), and bytes saved
+        ("bytes_saved").
+    """
+    limiter = RateLimiter(rate, stop_event)
+    ensure_index()
+    index = get_archive_index()
+    size_before = index.total_size()
+
+    report = {
+        "tmp_removed": clear_tmp_runs(TMP_MAX_AGE),
+        "deleted": len(prune_runs(max_age, max_size, cold_days)),
+        "compacted": 0,
+        "bytes_saved": 0,
+    }
+    if report["deleted"]:
+        logger.info(
+            f"Archive retention: {report['deleted']} run(s) deleted, "
+            f"{(size_before - index.total_size()) / 1e6:.1f} MB freed"
+        )
+
+    cold = index.select("created < ? and maintained is null", [_time_stamp(cold_days)])
+    for run in cold:
+        filename = run["fullpath"]
+        try:
+            size = get_run_size(filename)
+            n_bytes = compact_run(filename)
+            saved = size - get_run_size(filename)
+            index.update(filename, size=get_run_size(filename), maintained=time.time())
+        except FileNotFoundError:  # deleted meanwhile
+            continue
+        except (OSError, ValueError, sqlite3.Error) as e:
+            logger.warning(f"Failed to compact run {filename}: {e}")
+            continue
+
+        report["compacted"] += 1
+        report["bytes_saved"] += saved
+        if on_progress is not None:
+            on_progress(filename)
+        if not limiter.consume(n_bytes):
+            break
+
+    return report
+
+
+class ArchiveMaintainer(threading.Thread):
+    """
+    Run maintain_archive in the background, once at start and then
+    periodically, at a limited I/O rate.
+
+    Parameters
+    ----------
+    interval : float
+        Time between two passes, unit is second.
+    **kwargs
+        Arguments of maintain_archive (cold_days, max_age, max_size, rate).
+    """
+
+    def __init__(self, interval: float = 3600, **kwargs):
+        super().__init__(name="badger-archive-maintenance", daemon=True)
+
+        self.interval = interval
+        self.kwargs = kwargs
+        self.stop_event = threading.Event()
+
+    @classmethod
+    def from_settings(cls, **kwargs) -> "ArchiveMaintainer":
+        config_singleton = init_settings()
+
+        def read(key):
+            return float(config_singleton.read_value(key) or 0)
+
+        return cls(
+            cold_days=read("BADGER_ARCHIVE_COLD_DAYS"),
+            max_age=read("BADGER_ARCHIVE_MAX_AGE"),
+            max_size=read("BADGER_ARCHIVE_MAX_SIZE"),
+            rate=read("BADGER_ARCHIVE_MAINTENANCE_RATE") * 1e6,
+            **kwargs,
+        )
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                maintain_archive(stop_event=self.stop_event, **self.kwargs)
+            except Exception as e:  # never take the application down
+                logger.warning(f"Archive maintenance failed: {e}")
+            self.stop_event.wait(self.interval)
+
+    def stop(self):
+        self.stop_event.set()
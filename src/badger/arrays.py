@@ -0,0 +1,341 @@
+import gzip
+import io
+import os
+import shutil
+import struct
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from badger.recorder import GZIP_MAGIC
+
+# File layout: MAGIC, then one record per array: a header (key, dtype,
+# ndim), the shape, and the raw array data. Everything is padded to 8 bytes
+# so the arrays can be mapped in place with the proper alignment.
+ARRAYS_EXT = ".arr"
+MAGIC = b"BDGARR01"
+RECORD_HEADER = struct.Struct("<Q8sQ")
+ALIGNMENT = 8
+
+
+def _padded(n: int) -> int:
+    return -(-n // ALIGNMENT) * ALIGNMENT
+
+
+def is_array_value(value: Any) -> bool:
+    return isinstance(value, (list, tuple, np.ndarray)) and np.ndim(value) > 0
+
+
+class ArrayRef(str):
+    """
+    Reference to an array in an ArrayStore, stored in the DataFrame cell of
+    an array-valued observable in place of the array itself.
+
+    It is a string ("array:<key>") so it survives the json/yaml round trip
+    of the routine, and converts to nan so numeric views of the data (plots,
+    to_numpy) treat it as a missing scalar.
+    """
+
+    PREFIX = "array:"
+
+    @classmethod
+    def from_key(cls, key: int) -> "ArrayRef":
+        return cls(f"{cls.PREFIX}{key}")
+
+    @classmethod
+    def is_ref(cls, value: Any) -> bool:
+        return isinstance(value, str) and value.startswith(cls.PREFIX)
+
+    @property
+    def key(self) -> int:
+        return int(self[len(self.PREFIX) :])
+
+    def __float__(self):
+        return float("nan")
+
+    def __reduce__(self):
+        return ArrayRef, (str(self),)
+
+
+def restore_array_refs(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turn the array references of a DataFrame loaded from json/yaml back into
+    ArrayRef objects, in place.
+    """
+    for name in data.columns:
+        column = data[name]
+        if not pd.api.types.is_string_dtype(column) and column.dtype != object:
+            continue
+        if not column.map(ArrayRef.is_ref).any():
+            continue
+
+        # Build an object column, string dtypes would drop the subclass
+        data[name] = pd.Series(
+            [ArrayRef(v) if ArrayRef.is_ref(v) else v for v in column],
+            index=column.index,
+            dtype=object,
+        )
+
+    return data
+
+
+def find_array_refs(data: pd.DataFrame) -> List[ArrayRef]:
+    """
+    The array references in a DataFrame.
+    """
+    refs = []
+    for name in data.columns:
+        column = data[name]
+        if column.dtype == object or pd.api.types.is_string_dtype(column):
+            refs.extend(ArrayRef(v) for v in column if ArrayRef.is_ref(v))
+
+    return refs
+
+
+class ArrayStore:
+    """
+    Append-only store for array-valued observables (waveforms, spectra).
+
+    Arrays are kept as numpy buffers and referenced from the routine data by
+    ArrayRef, so they are neither exploded into rows nor copied around with
+    the DataFrame. Once the store is attached to a file, new arrays are
+    appended to it on flush and read back through a read-only memory map:
+    any process that attaches to the same file (the GUI, while the run
+    subprocess is writing) sees the arrays without copying them. Files
+    compressed by the archive maintenance are read in memory instead.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Path of the backing file.
+    """
+
+    def __init__(self, filename: Optional[str] = None):
+        self.filename: Optional[str] = None
+
+        self._pending: Dict[int, np.ndarray] = {}  # not written to file yet
+        self._index: Dict[int, tuple] = {}  # key -> (offset, dtype, shape)
+        self._scanned = 0  # file offset up to which the index is built
+        self._next_key = 0
+        self._mmap: Optional[np.memmap] = None
+        self._compressed = False  # the file is read in memory, not mapped
+        self._lock = threading.RLock()
+
+        if filename is not None:
+            self.attach(filename)
+
+    def __getstate__(self):
+        # Locks and memory maps can not be pickled, the index is rebuilt
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_mmap"] = None
+        state["_index"] = {}
+        state["_scanned"] = 0
+        state["_compressed"] = False
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        with self._lock:
+            self._scan()
+
+            return len(self._pending) + len(self._index)
+
+    def __contains__(self, ref: ArrayRef):
+        with self._lock:
+            if ref.key not in self._pending and ref.key not in self._index:
+                self._scan()
+
+            return ref.key in self._pending or ref.key in self._index
+
+    def attach(self, filename: str, keep: Optional[Iterable[ArrayRef]] = None):
+        """
+        Back the store with a file, the arrays already in it become readable
+        and the pending ones are appended to it on the next flush.
+
+        If the store was backed by another file, its arrays are copied to the
+        new one (only those referenced in keep, if given), so that the data
+        referencing them stays readable. Keys are never reused: the new
+        arrays get keys past the ones of the references kept, even those not
+        in the store.
+        """
+        with self._lock:
+            keys = None if keep is None else {ArrayRef(ref).key for ref in keep}
+            if keys:
+                self._next_key = max(self._next_key, max(keys) + 1)
+
+            carried = {}
+            if self.filename is not None and (
+                os.path.abspath(self.filename) != os.path.abspath(filename)
+            ):
+                self._scan()
+                carried = {
+                    key: record
+                    for key, record in self._index.items()
+                    if keys is None or key in keys
+                }
+
+            mmap = self._mmap
+            self.filename = filename
+            self._index = {}
+            self._scanned = 0
+            self._mmap = None
+            self._compressed = False
+            self._scan()
+
+            # Copied straight from the map of the old file
+            records = [
+                (key, np.ndarray(shape, dtype=dtype, buffer=mmap, offset=offset))
+                for key, (offset, dtype, shape) in carried.items()
+                if key not in self._index
+            ]
+            if records:
+                self._write(records)
+                self._scan()
+
+    def put(self, array: Any) -> ArrayRef:
+        array = np.ascontiguousarray(array)
+        if array.dtype == object:
+            raise ValueError("Only arrays of numbers can be stored")
+
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._pending[key] = array
+
+        return ArrayRef.from_key(key)
+
+    def get(self, ref: ArrayRef) -> np.ndarray:
+        """
+        Get the array behind a reference. Arrays read from the file are
+        read-only views into the memory map.
+        """
+        key = ArrayRef(ref).key
+        with self._lock:
+            try:
+                return self._pending[key]
+            except KeyError:
+                pass
+
+            if key not in self._index:
+                self._scan()
+            offset, dtype, shape = self._index[key]
+
+            return np.ndarray(shape, dtype=dtype, buffer=self._mmap, offset=offset)
+
+    def pack(self, values: Dict[str, Any], names) -> Dict[str, Any]:
+        """
+        Move the array values of the given names into the store, replacing
+        them by references.
+        """
+        for name in names:
+            if name in values and is_array_value(values[name]):
+                values[name] = self.put(values[name])
+
+        return values
+
+    def flush(self):
+        """
+        Append the pending arrays to the backing file.
+        """
+        with self._lock:
+            if self.filename is None or not self._pending:
+                return
+
+            self._write(self._pending.items())
+            self._pending = {}
+            self._scan()
+
+    def _write(self, records: Iterable[tuple]):
+        # Append (key, array) records to the backing file
+        if self._compressed:  # appended to again, stored uncompressed
+            tmp_filename = f"{self.filename}.tmp"
+            with open(tmp_filename, "wb") as f:
+                f.write(self._mmap.tobytes())
+            os.replace(tmp_filename, self.filename)
+            self._mmap = np.memmap(self.filename, mode="r", shape=(self._scanned,))
+            self._compressed = False
+
+        new_file = not os.path.exists(self.filename)
+        with open(self.filename, "wb" if new_file else "ab") as f:
+            if new_file:
+                f.write(MAGIC)
+            for key, array in records:
+                shape = struct.pack(f"<{array.ndim}Q", *array.shape)
+                f.write(RECORD_HEADER.pack(key, array.dtype.str.encode(), array.ndim))
+                f.write(shape)
+                f.write(array.tobytes())
+                f.write(b"\0" * (_padded(array.nbytes) - array.nbytes))
+
+    def save(self, filename: str):
+        """
+        Write all the arrays to filename and attach the store to it. If the
+        store is already attached to that file, this is a flush.
+        """
+        with self._lock:
+            if (
+                self.filename is not None
+                and os.path.exists(self.filename)
+                and os.path.abspath(self.filename) != os.path.abspath(filename)
+            ):
+                shutil.copyfile(self.filename, filename)
+
+            # If the store is not attached yet, the arrays may have been
+            # streamed to filename by another process (the run subprocess)
+            self.attach(filename)
+            self.flush()
+
+    def _scan(self):
+        # Index the records appended to the file since the last scan
+        if self.filename is None or not os.path.exists(self.filename):
+            return
+        if self._compressed:  # never appended to while compressed
+            return
+
+        size = os.path.getsize(self.filename)
+        if size <= self._scanned:
+            return
+
+        raw = None
+        with open(self.filename, "rb") as f:
+            if self._scanned == 0:
+                magic = f.read(len(MAGIC))
+                if magic.startswith(GZIP_MAGIC):
+                    f.seek(0)
+                    raw = gzip.decompress(f.read())
+                    f = io.BytesIO(raw)
+                    size = len(raw)
+                    magic = f.read(len(MAGIC))
+                if magic != MAGIC:
+                    raise ValueError(f"{self.filename} is not a Badger array file")
+                self._scanned = len(MAGIC)
+
+            offset = self._scanned
+            while offset + RECORD_HEADER.size <= size:
+                f.seek(offset)
+                key, dtype, ndim = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+                shape = struct.unpack(f"<{ndim}Q", f.read(8 * ndim))
+                dtype = np.dtype(dtype.rstrip(b"\0").decode())
+                data_offset = offset + RECORD_HEADER.size + 8 * ndim
+                nbytes = int(np.prod(shape)) * dtype.itemsize
+                end = data_offset + _padded(nbytes)
+                if end > size:  # record still being written
+                    break
+
+                self._index[key] = (data_offset, dtype, shape)
+                self._next_key = max(self._next_key, key + 1)
+                offset = end
+
+        if raw is not None:
+            self._compressed = True
+            self._scanned = offset
+            self._mmap = np.frombuffer(raw, dtype=np.uint8)
+        elif offset > self._scanned:
+            self._scanned = offset
+            self._mmap = np.memmap(self.filename, mode="r", shape=(offset,))
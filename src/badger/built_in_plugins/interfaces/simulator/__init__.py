@@ -0,0 +1,350 @@
+import asyncio
+import json
+import math
+import os
+import time
+from typing import Dict, List, Literal, Optional, Set
+
+import numpy as np
+from pydantic import Field
+
+from badger import interface
+from badger.aio import get_event_loop, run_sync
+from badger.errors import BadgerInterfaceChannelError
+
+LatencyDistribution = Literal["constant", "uniform", "exponential", "lognormal"]
+
+
+class SimulatedControlSystem:
+    """
+    In-memory model of a control system with slow, noisy and flaky channels.
+
+    After a write, the readback of a channel relaxes exponentially from its
+    previous value towards the new setpoint with time constant settle_time.
+    """
+
+    def __init__(
+        self,
+        n_channels: int = 1000,
+        prefix: str = "SIM:",
+        read_latency: float = 0.0,
+        write_latency: float = 0.0,
+        latency_distribution: LatencyDistribution = "constant",
+        latency_spread: float = 0.5,
+        noise: float = 0.0,
+        settle_time: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.read_latency = read_latency
+        self.write_latency = write_latency
+        self.latency_distribution = latency_distribution
+        self.latency_spread = latency_spread
+        self.noise = noise
+        self.settle_time = settle_time
+        self.failure_rate = failure_rate
+
+        self._rng = np.random.default_rng(seed)
+        # channel -> [value before the last write, setpoint, time of the write]
+        self._channels: Dict[str, List[float]] = {
+            f"{prefix}{i:05d}": [0.0, 0.0, 0.0] for i in range(n_channels)
+        }
+
+    def list_channels(self) -> List[str]:
+        return list(self._channels)
+
+    def sample_latency(self, mean: float) -> float:
+        if mean <= 0:
+            return 0.0
+
+        if self.latency_distribution == "uniform":
+            spread = self.latency_spread * mean
+            return self._rng.uniform(mean - spread, mean + spread)
+        elif self.latency_distribution == "exponential":
+            return self._rng.exponential(mean)
+        elif self.latency_distribution == "lognormal":
+            # Heavy tailed, with the given mean
+            sigma = self.latency_spread
+            return self._rng.lognormal(math.log(mean) - 0.5 * sigma**2, sigma)
+        else:
+            return mean
+
+    def _check_failure(self, channel: str):
+        if self.failure_rate > 0 and self._rng.random() < self.failure_rate:
+            raise BadgerInterfaceChannelError(f"Channel {channel} failed to respond")
+
+    def readback(self, channel: str, now: Optional[float] = None) -> float:
+        start, setpoint, ts = self._channels.setdefault(channel, [0.0, 0.0, 0.0])
+        if now is None:
+            now = time.monotonic()
+
+        if self.settle_time > 0:
+            value = setpoint + (start - setpoint) * math.exp(
+                -(now - ts) / self.settle_time
+            )
+        else:
+            value = setpoint
+
+        if self.noise > 0:
+            value += self._rng.normal(0, self.noise)
+
+        return value
+
+    async def aget_value(self, channel: str) -> float:
+        await asyncio.sleep(self.sample_latency(self.read_latency))
+        self._check_failure(channel)
+
+        return self.readback(channel)
+
+    async def aset_value(self, channel: str, value: float):
+        await asyncio.sleep(self.sample_latency(self.write_latency))
+        self._check_failure(channel)
+
+        now = time.monotonic()
+        # Start settling from wherever the readback is right now
+        start = self.readback(channel, now) if self.settle_time > 0 else value
+        self._channels[channel] = [start, float(value), now]
+
+    async def aget_values(self, channels: List[str]) -> Dict[str, float]:
+        values = await asyncio.gather(*[self.aget_value(ch) for ch in channels])
+
+        return dict(zip(channels, values))
+
+    async def aset_values(self, channel_inputs: Dict[str, float]):
+        await asyncio.gather(
+            *[self.aset_value(ch, value) for ch, value in channel_inputs.items()]
+        )
+
+
+async def handle_client(
+    system: SimulatedControlSystem,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+):
+    # One json request per line, answered by one json response per line
+    try:
+        while line := await reader.readline():
+            try:
+                request = json.loads(line)
+                if request["op"] == "get":
+                    channels = request["channels"]
+                    response = {"values": await system.aget_values(channels)}
+                elif request["op"] == "set":
+                    await system.aset_values(request["inputs"])
+                    response = {"ok": True}
+                elif request["op"] == "list":
+                    response = {"channels": system.list_channels()}
+                else:  # ping
+                    response = {"ok": True}
+            except BadgerInterfaceChannelError as e:
+                response = {"error": str(e)}
+            except Exception as e:  # a bad request, the connection goes on
+                response = {"error": f"Invalid request: {e!r}"}
+
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+    except ConnectionError:  # the client went away
+        pass
+    finally:
+        writer.close()
+
+
+class SimulatorServer:
+    """
+    Serves a simulated control system over TCP, see serve. Stopping the
+    server also ends the connections of its clients.
+
+    Parameters
+    ----------
+    system : SimulatedControlSystem
+        The control system served.
+    """
+
+    def __init__(self, system: SimulatedControlSystem):
+        self.system = system
+        self.server: Optional[asyncio.Server] = None
+        self._clients: Set[asyncio.Task] = set()
+
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def start(self, host: str, port: int):
+        self.server = await asyncio.start_server(
+            self._handle_client,
+            host,
+            port,
+            limit=2**26,  # channel lists can be long
+        )
+
+    async def serve_forever(self):
+        await self.server.serve_forever()
+
+    async def stop(self):
+        self.server.close()
+        for task in self._clients:
+            task.cancel()
+        await asyncio.gather(*self._clients, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def _handle_client(self, reader, writer):
+        task = asyncio.current_task()
+        self._clients.add(task)
+        try:
+            await handle_client(self.system, reader, writer)
+        finally:
+            self._clients.discard(task)
+
+
+async def start_server(
+    system: SimulatedControlSystem, host: str, port: int
+) -> SimulatorServer:
+    server = SimulatorServer(system)
+    await server.start(host, port)
+
+    return server
+
+
+def serve(host: str = "localhost", port: int = 5555, **params):
+    """
+    Serve a simulated control system over TCP until interrupted, so the
+    simulator interface can be used as a stand-in for a remote gateway.
+    """
+
+    async def main():
+        server = await start_server(SimulatedControlSystem(**params), host, port)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.stop()
+
+    asyncio.run(main())
+
+
+class Interface(interface.AsyncInterface):
+    """
+    Simulated control system for load testing, see README.md.
+
+    If address is set, the channel I/O goes to a simulator server at that
+    host:port and all the other params are ignored.
+    """
+
+    name = "simulator"
+    pooled = True
+
+    n_channels: int = Field(1000, description="Number of synthetic channels")
+    read_latency: float = Field(0.0, description="Mean read latency in seconds")
+    write_latency: float = Field(0.0, description="Mean write latency in seconds")
+    latency_distribution: LatencyDistribution = "constant"
+    latency_spread: float = Field(
+        0.5, description="Relative half-width (uniform) or sigma (lognormal)"
+    )
+    noise: float = Field(0.0, description="Standard deviation of the readback noise")
+    settle_time: float = Field(0.0, description="Readback settling time constant")
+    failure_rate: float = Field(0.0, description="Probability of a channel failure")
+    seed: Optional[int] = None
+    address: Optional[str] = Field(None, description="host:port of a simulator server")
+
+    # Private variables
+    _system: Optional[SimulatedControlSystem] = None
+    _connection: Optional[tuple] = None
+    _connection_pid: Optional[int] = None  # process the connection was made in
+    _connection_lock: Optional[asyncio.Lock] = None
+
+    def __init__(self, **data):
+        super().__init__(**data)
+
+        if self.address is None:
+            self._system = SimulatedControlSystem(
+                n_channels=self.n_channels,
+                read_latency=self.read_latency,
+                write_latency=self.write_latency,
+                latency_distribution=self.latency_distribution,
+                latency_spread=self.latency_spread,
+                noise=self.noise,
+                settle_time=self.settle_time,
+                failure_rate=self.failure_rate,
+                seed=self.seed,
+            )
+
+    async def _request(self, request: dict) -> dict:
+        # Requests are sent over one connection, one at a time. A request
+        # carries all the channels of a call, the server fans them out
+        if self._connection_lock is None:
+            self._connection_lock = asyncio.Lock()
+
+        async with self._connection_lock:
+            if self._connection is None:
+                host, port = self.address.rsplit(":", 1)
+                self._connection = await asyncio.open_connection(
+                    host, int(port), limit=2**26
+                )
+                self._connection_pid = os.getpid()
+
+            reader, writer = self._connection
+            writer.write(json.dumps(request).encode() + b"\n")
+            await writer.drain()
+            line = await reader.readline()
+
+        if not line:
+            self._connection = None
+            raise BadgerInterfaceChannelError(
+                f"Simulator server at {self.address} closed the connection"
+            )
+
+        response = json.loads(line)
+        if "error" in response:
+            raise BadgerInterfaceChannelError(response["error"])
+
+        return response
+
+    @interface.log
+    async def aget_values(self, channel_names: List[str]) -> Dict[str, float]:
+        if self._system is not None:
+            return await self._system.aget_values(channel_names)
+
+        response = await self._request({"op": "get", "channels": channel_names})
+
+        return response["values"]
+
+    @interface.log
+    async def aset_values(self, channel_inputs: Dict[str, float]):
+        channel_inputs = {k: float(v) for k, v in channel_inputs.items()}
+        if self._system is not None:
+            return await self._system.aset_values(channel_inputs)
+
+        await self._request({"op": "set", "inputs": channel_inputs})
+
+    def list_channels(self) -> List[str]:
+        if self._system is not None:
+            return self._system.list_channels()
+
+        return run_sync(self._request({"op": "list"}))["channels"]
+
+    def check_health(self) -> bool:
+        if self._system is not None:
+            return True
+
+        try:
+            run_sync(self._request({"op": "ping"}))
+            return True
+        except (OSError, BadgerInterfaceChannelError):
+            return False
+
+    def close(self):
+        if self._connection is not None:
+            # The connection lives on the Badger event loop
+            get_event_loop().call_soon_threadsafe(self._connection[1].close)
+            self._connection = None
+
+    def reset_interface(self):
+        # Connections do not survive a fork
+        if self._connection is not None and self._connection_pid != os.getpid():
+            # Its transport belongs to the event loop of the parent, only the
+            # copy of the socket inherited by this process is closed
+            sock = self._connection[1].get_extra_info("socket")
+            if sock is not None:
+                os.close(sock.fileno())
+            self._connection = None
+        self.close()
+        self._connection_lock = None
@@ -0,0 +1,34 @@
+import argparse
+
+from . import serve
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve a simulated control system for the Badger simulator interface"
+    )
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--n-channels", type=int, default=1000)
+    parser.add_argument("--read-latency", type=float, default=0.0)
+    parser.add_argument("--write-latency", type=float, default=0.0)
+    parser.add_argument(
+        "--latency-distribution",
+        choices=["constant", "uniform", "exponential", "lognormal"],
+        default="constant",
+    )
+    parser.add_argument("--latency-spread", type=float, default=0.5)
+    parser.add_argument("--noise", type=float, default=0.0)
+    parser.add_argument("--settle-time", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = vars(parser.parse_args())
+
+    host = args.pop("host")
+    port = args.pop("port")
+    print(f"Serving {args['n_channels']} simulated channels on {host}:{port}")
+    serve(host, port, **args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ChannelCache:
+    """
+    Read-through cache for interface channel values.
+
+    Each channel is cached for its own time-to-live (ttl, in seconds), falling
+    back to the default ttl. Channels with a ttl of 0 are never cached.
+
+    Parameters
+    ----------
+    default_ttl : float
+        Time-to-live of the channels that have no specific ttl.
+    ttls : dict of {str: float}, optional
+        Per-channel time-to-live.
+    """
+
+    def __init__(self, default_ttl: float = 0.0, ttls: Optional[Dict] = None):
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls or {})
+
+        # channel -> (expiry time, value)
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __getstate__(self):
+        # Locks can not be pickled or deep copied
+        state = self.__dict__.copy()
+        del state["_lock"]
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get_ttl(self, channel_name: str) -> float:
+        return self.ttls.get(channel_name, self.default_ttl)
+
+    def lookup(self, channel_names: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Split the requested channels into cached values and channels that have
+        to be read from the control system.
+
+        Returns
+        -------
+        tuple of (dict, list)
+            The fresh cached values, and the names of the missing channels.
+        """
+        now = time.monotonic()
+        found = {}
+        missing = []
+
+        with self._lock:
+            for channel in channel_names:
+                try:
+                    expiry, value = self._entries[channel]
+                except KeyError:
+                    missing.append(channel)
+                    continue
+
+                if expiry > now:
+                    found[channel] = value
+                else:
+                    del self._entries[channel]
+                    missing.append(channel)
+
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        return found, missing
+
+    def store(self, channel_outputs: Dict[str, Any]):
+        now = time.monotonic()
+
+        with self._lock:
+            for channel, value in channel_outputs.items():
+                ttl = self.get_ttl(channel)
+                if ttl > 0:
+                    self._entries[channel] = (now + ttl, value)
+
+    def invalidate(self, channel_names: Optional[List[str]] = None):
+        """
+        Drop the given channels from the cache, or all of them if no channel
+        names are given.
+        """
+        with self._lock:
+            if channel_names is None:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                return
+
+            for channel in channel_names:
+                if self._entries.pop(channel, None) is not None:
+                    self.invalidations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+            }
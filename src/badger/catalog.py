@@ -0,0 +1,300 @@
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+# Pattern used to fetch the whole channel list through environment.search
+CATALOG_PATTERN = ".*"
+QUANTIFIERS = "*+?{"
+REGEX_META = ".^$*+?{}[]\\|()"
+
+
+def to_regex(pattern: str) -> str:
+    # "?" stands for any single character, the rest is a regular expression
+    return pattern.replace("?", ".")
+
+
+def get_literal_runs(regex: str) -> Optional[List[str]]:
+    """
+    Find the runs of literal characters that any match of the regular
+    expression has to contain.
+
+    Returns
+    -------
+    list of str or None
+        The literal runs, or None if the expression is too complex to tell
+        (alternations and groups), in which case nothing is required.
+    """
+    if any(c in regex for c in "|()"):
+        return None
+
+    runs = []
+    run = ""
+    i = 0
+    while i < len(regex):
+        c = regex[i]
+        literal = None
+        if c == "\\":
+            escaped = regex[i + 1 : i + 2]
+            if escaped and not escaped.isalnum():
+                literal = escaped  # escaped metacharacter
+            i += 2
+        elif c == "[":
+            # Skip the character class, a leading "]" is part of it
+            end = regex.find("]", i + 2 if regex[i + 1 : i + 2] == "]" else i + 1)
+            i = len(regex) if end == -1 else end + 1
+        elif c in ".^$":
+            i += 1
+        else:
+            literal = c
+            i += 1
+
+        quantifier = regex[i : i + 1]
+        if quantifier and quantifier in QUANTIFIERS:
+            if quantifier == "{":
+                end = regex.find("}", i)
+                i = len(regex) if end == -1 else end + 1
+            else:
+                i += 1
+            if regex[i : i + 1] in ("?", "+"):  # lazy or possessive
+                i += 1
+
+            # Only "+" guarantees the atom shows up, and only once in a row
+            if literal is not None and quantifier == "+":
+                run += literal
+            literal = None
+
+        if literal is None:
+            runs.append(run)
+            run = ""
+        else:
+            run += literal
+    runs.append(run)
+
+    return [run for run in runs if run]
+
+
+def get_trigrams(text: str) -> set:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class ChannelCatalog:
+    """
+    Local catalog of the channel names of an environment, indexed for fast
+    pattern search as the user types.
+
+    Each name is indexed by its trigrams. A search intersects the posting
+    lists of the trigrams the pattern requires, and only runs the regular
+    expression on the remaining candidates. Patterns anchored with "^" and a
+    literal prefix are served from a sorted view of the names instead, and
+    anything else falls back to a scan.
+
+    Parameters
+    ----------
+    max_age : float
+        Time in seconds after which the catalog should be fetched again.
+    """
+
+    def __init__(self, max_age: float = 3600.0):
+        self.max_age = max_age
+        self.updated: Optional[float] = None  # time of the last full fetch
+
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._postings: Dict[str, array] = {}
+        self._sorted: Optional[List[str]] = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name: str):
+        return name in self._ids
+
+    def is_stale(self) -> bool:
+        return self.updated is None or time.time() - self.updated > self.max_age
+
+    def add(self, names: Iterable[str]) -> int:
+        """
+        Add the names that are not in the catalog yet.
+
+        Returns
+        -------
+        int
+            Number of names added.
+        """
+        with self._lock:
+            n_before = len(self.names)
+            for name in names:
+                if name in self._ids:
+                    continue
+
+                channel_id = self._ids[name] = len(self.names)
+                self.names.append(name)
+                # Ids only grow, so the posting lists stay sorted
+                for trigram in get_trigrams(name):
+                    posting = self._postings.get(trigram)
+                    if posting is None:
+                        posting = self._postings[trigram] = array("I")
+                    posting.append(channel_id)
+
+            n_added = len(self.names) - n_before
+            if n_added:
+                self._sorted = None
+
+            return n_added
+
+    def update(self, names: List[str]) -> int:
+        """
+        Refresh the catalog with the complete list of channel names. Names
+        are added incrementally, the index is only rebuilt if some channels
+        are gone.
+
+        Returns
+        -------
+        int
+            Number of names added.
+        """
+        with self._lock:
+            if not self._ids.keys() <= set(names):
+                self.clear()
+            self.updated = time.time()
+
+            return self.add(names)
+
+    def clear(self):
+        with self._lock:
+            self.names = []
+            self._ids = {}
+            self._postings = {}
+            self._sorted = None
+            self.updated = None
+
+    def iter_search(self, pattern: str) -> Iterator[str]:
+        """
+        Lazily search the catalog for the channel names matching the pattern,
+        the names are checked as they are consumed.
+
+        Parameters
+        ----------
+        pattern : str
+            Regular expression matched anywhere in the name, "?" stands for
+            any single character.
+
+        Yields
+        ------
+        str
+            The matching names.
+        """
+        regex = to_regex(pattern)
+        try:
+            match = re.compile(regex).search
+        except re.error:
+            return
+
+        with self._lock:
+            if not any(c in regex for c in REGEX_META):
+                # Plain substring, skip the regex
+                def match(name):
+                    return regex in name
+
+            candidates = self._get_candidates(regex)
+            if candidates is None:
+                candidates = self._get_prefix_candidates(regex)
+            if candidates is None:
+                # Names are only ever appended, so a bounded view is stable
+                candidates = islice(self.names, len(self.names))
+
+        for name in candidates:
+            if match(name):
+                yield name
+
+    def search(self, pattern: str, limit: Optional[int] = None) -> List[str]:
+        """
+        Search the catalog for the channel names matching the pattern.
+
+        Parameters
+        ----------
+        pattern : str
+            Regular expression matched anywhere in the name, "?" stands for
+            any single character.
+        limit : int, optional
+            Max number of names to return.
+
+        Returns
+        -------
+        list of str
+            The matching names.
+        """
+        return list(islice(self.iter_search(pattern), limit))
+
+    def _get_candidates(self, regex: str) -> Optional[List[str]]:
+        runs = get_literal_runs(regex)
+        if not runs:
+            return None
+
+        trigrams = set().union(*[get_trigrams(run) for run in runs])
+        if not trigrams:
+            return None
+
+        postings = []
+        for trigram in trigrams:
+            posting = self._postings.get(trigram)
+            if posting is None:
+                return []
+            postings.append(np.frombuffer(posting, dtype=np.uint32))
+        postings.sort(key=len)
+
+        # Narrow down the shortest posting list with binary searches
+        ids = postings[0]
+        for posting in postings[1:]:
+            if not len(ids):
+                break
+            positions = np.searchsorted(posting, ids)
+            positions[positions == len(posting)] = 0
+            ids = ids[posting[positions] == ids]
+
+        return [self.names[i] for i in ids]
+
+    def _get_prefix_candidates(self, regex: str) -> Optional[List[str]]:
+        if not regex.startswith("^"):
+            return None
+
+        prefix = ""
+        for i, c in enumerate(regex[1:], 1):
+            if not (c.isalnum() or c in "_:-"):
+                break
+            if regex[i + 1 : i + 2] in ("*", "?", "{"):  # optional char
+                break
+            prefix += c
+        if not prefix:
+            return None
+
+        if self._sorted is None:
+            self._sorted = sorted(self.names)
+
+        start = bisect_left(self._sorted, prefix)
+        end = bisect_left(self._sorted, prefix + "\U0010ffff", start)
+
+        return self._sorted[start:end]
+
+
+_catalogs: Dict[str, ChannelCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_channel_catalog(key: str) -> ChannelCatalog:
+    """
+    Get the process-wide channel catalog for an environment.
+    """
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = ChannelCatalog()
+
+        return catalog
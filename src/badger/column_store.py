@@ -0,0 +1,434 @@
+import json
+import math
+import os
+import shutil
+import struct
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from badger.columnar import _is_native, _to_json
+
+# A store is a directory of column files. Each column is split in chunks of
+# CHUNK_ROWS rows, one file per chunk holding the raw values (little endian,
+# fixed width), so that a chunk can be memory-mapped and a window of rows
+# read without touching the rest of the column. Columns of any other type
+# (strings, array references) are stored as json values appended to a file,
+# their chunk files holding the end offset of each value in it.
+#
+# The number of rows is committed in a separate file once the rows are
+# written, so that readers, in other processes, never see a partial row.
+#
+# The type of a column is the one of its first values. An integer or boolean
+# column is widened to float when values that do not fit come in (fractions,
+# missing values), its rows are copied to new chunk files and the schema
+# points to them, so that readers switch to them with the schema.
+DATA_STORE_EXT = ".cols"
+FORMAT_VERSION = 1
+CHUNK_ROWS = 65536
+SCHEMA_FILENAME = "schema.json"
+LENGTH_FILENAME = "length"
+LENGTH = struct.Struct("<Q")
+
+INDEX = "index"
+JSON = "json"
+OFFSET_DTYPE = np.dtype("<i8")
+WIDE_DTYPE = np.dtype("<f8")
+
+# Memory taken by a row of a json column once loaded, as a Python object
+JSON_ITEMSIZE = 64
+
+
+class ColumnStore:
+    """
+    Out-of-core store for the data of long runs: a single writer appends
+    rows to it, any number of readers map it read-only and read windows of
+    rows, or a decimated overview, without loading the whole data.
+
+    Parameters
+    ----------
+    path : str
+        Path of the store directory.
+    mode : str
+        "r" to read the store, "a" to append to it (it is created if it
+        does not exist).
+    chunk_rows : int
+        Rows per chunk file, for a new store.
+    """
+
+    def __init__(self, path: str, mode: str = "r", chunk_rows: int = CHUNK_ROWS):
+        if mode not in ("r", "a"):
+            raise ValueError(f"Invalid mode {mode}, expected 'r' or 'a'")
+
+        self.path = path
+        self.mode = mode
+        self.chunk_rows = chunk_rows
+        self.columns: List[Dict] = []  # name, dtype and first row of each column
+        self.n_rows = 0
+
+        self._schema_mtime = None
+        self._maps: Dict[tuple, np.memmap] = {}
+
+        if mode == "a" and not os.path.exists(self._file(SCHEMA_FILENAME)):
+            os.makedirs(path, exist_ok=True)
+            self._write_schema()
+            self._write_length()
+        else:
+            self.refresh()
+
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def column_names(self) -> List[str]:
+        return [column["name"] for column in self.columns]
+
+    @property
+    def row_nbytes(self) -> int:
+        """
+        Memory taken by a row once loaded, in bytes.
+        """
+        nbytes = OFFSET_DTYPE.itemsize  # the index
+        for column in self.columns:
+            if column["dtype"] == JSON:
+                nbytes += JSON_ITEMSIZE
+            else:
+                nbytes += np.dtype(column["dtype"]).itemsize
+
+        return nbytes
+
+    def window_rows(self, budget: float) -> int:
+        """
+        Number of rows that fit in a memory budget, in bytes. No limit if the
+        budget is 0.
+        """
+        if not budget or budget <= 0:
+            return max(self.n_rows, 1)
+
+        return max(int(budget // self.row_nbytes), 1)
+
+    def refresh(self) -> int:
+        """
+        Pick up the rows appended since the last refresh, by another process.
+
+        Returns
+        -------
+        int
+            Number of rows in the store.
+        """
+        # The length first: a column added after it starts after its rows
+        try:
+            with open(self._file(LENGTH_FILENAME), "rb") as f:
+                (self.n_rows,) = LENGTH.unpack(f.read(LENGTH.size))
+        except (FileNotFoundError, struct.error):  # not created yet
+            return self.n_rows
+
+        mtime = os.stat(self._file(SCHEMA_FILENAME)).st_mtime_ns
+        if mtime != self._schema_mtime:
+            with open(self._file(SCHEMA_FILENAME), "r") as f:
+                schema = json.load(f)
+            if schema["version"] > FORMAT_VERSION:
+                raise ValueError(
+                    f"{self.path} was written by a newer version of Badger"
+                )
+            self.chunk_rows = schema["chunk_rows"]
+            self.columns = schema["columns"]
+            self._schema_mtime = mtime
+
+        return self.n_rows
+
+    def append(self, rows: pd.DataFrame) -> int:
+        """
+        Append rows, and commit them.
+
+        Columns not seen before are added, the rows before them read as
+        missing. Columns of the store missing from the rows are filled with
+        missing values. Integer and boolean columns are widened to float when
+        the rows hold values they cannot (fractions, missing values).
+
+        Returns
+        -------
+        int
+            Number of rows written.
+        """
+        if self.mode != "a":
+            raise ValueError(f"{self.path} is opened read-only")
+        if not len(rows):
+            return 0
+
+        known = set(self.column_names)
+        new_columns = [name for name in rows.columns if str(name) not in known]
+        for name in new_columns:
+            column = rows[name]
+            self.columns.append(
+                {
+                    "name": str(name),
+                    "dtype": column.dtype.newbyteorder("<").str
+                    if _is_native(column)
+                    else JSON,
+                    "start": self.n_rows,
+                }
+            )
+        if new_columns:
+            self._write_schema()
+
+        start = self.n_rows
+        self._write_values(INDEX, start, rows.index.to_numpy(dtype=OFFSET_DTYPE))
+        for i, column in enumerate(self.columns):
+            if column["name"] in rows:
+                values = rows[column["name"]]
+            else:
+                values = pd.Series([None] * len(rows), dtype=object)
+
+            if column["dtype"] == JSON:
+                self._append_json(i, start, values)
+                continue
+
+            if not _fits(values, column["dtype"]):
+                self._widen(i, column)
+            self._write_values(
+                _column_key(i, column), start, _to_native(values, column["dtype"])
+            )
+
+        self.n_rows += len(rows)
+        self._write_length()
+
+        return len(rows)
+
+    def read(
+        self,
+        start: int = 0,
+        stop: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Read a window of rows, as a DataFrame indexed as the data appended.
+
+        Parameters
+        ----------
+        start, stop : int
+            Positions of the rows, all of them by default.
+        columns : list of str, optional
+            Only read these columns.
+        """
+        stop = self.n_rows if stop is None else min(stop, self.n_rows)
+
+        return self.take(np.arange(max(start, 0), stop), columns)
+
+    def tail(self, n: int, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Read the last n rows.
+        """
+        return self.read(max(self.n_rows - n, 0), self.n_rows, columns)
+
+    def overview(
+        self,
+        n_points: int,
+        stop: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Decimated view of the rows before stop (all rows by default): one
+        row every so many, at most n_points rows, always with the last one.
+        Only the pages holding these rows are read.
+        """
+        stop = self.n_rows if stop is None else min(stop, self.n_rows)
+        if stop <= 0:
+            return self.take(np.arange(0), columns)
+
+        step = max(math.ceil(stop / max(n_points, 1)), 1)
+        positions = np.arange(0, stop, step)
+        if positions[-1] != stop - 1:
+            positions = np.append(positions, stop - 1)
+
+        return self.take(positions, columns)
+
+    def take(
+        self, positions: np.ndarray, columns: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Read the rows at the given positions, sorted in increasing order.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        if len(positions) and positions[-1] >= self.n_rows:
+            raise IndexError(f"Row {positions[-1]} is out of the store")
+
+        index = self._gather(INDEX, OFFSET_DTYPE, positions)
+        data = {}
+        for i, column in enumerate(self.columns):
+            if columns is not None and column["name"] not in columns:
+                continue
+            data[column["name"]] = self._read_column(i, column, positions)
+
+        return pd.DataFrame(data, index=index)
+
+    def remove(self):
+        """
+        Delete the store.
+        """
+        self._maps = {}
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _chunk_file(self, key: str, chunk: int) -> str:
+        return self._file(f"{key}.{chunk}")
+
+    def _write_schema(self):
+        schema = {
+            "version": FORMAT_VERSION,
+            "chunk_rows": self.chunk_rows,
+            "columns": self.columns,
+        }
+        _write_atomic(self._file(SCHEMA_FILENAME), json.dumps(schema).encode())
+
+    def _write_length(self):
+        _write_atomic(self._file(LENGTH_FILENAME), LENGTH.pack(self.n_rows))
+
+    def _write_values(self, key: str, start: int, values: np.ndarray):
+        # Rows at positions start.., split over the chunk files
+        itemsize = values.dtype.itemsize
+        done = 0
+        while done < len(values):
+            chunk, offset = divmod(start + done, self.chunk_rows)
+            n = min(len(values) - done, self.chunk_rows - offset)
+            filename = self._chunk_file(key, chunk)
+            with open(filename, "r+b" if os.path.exists(filename) else "wb") as f:
+                f.seek(offset * itemsize)
+                f.write(values[done : done + n].tobytes())
+            done += n
+
+    def _widen(self, i: int, column: Dict):
+        # The rows are copied, chunk by chunk, under a new key, the chunk
+        # files of the old one are left to the readers still mapping them
+        key, dtype = _column_key(i, column), np.dtype(column["dtype"])
+        wide_key = f"c{i}f"
+        for begin in range(column["start"], self.n_rows, self.chunk_rows):
+            positions = np.arange(begin, min(begin + self.chunk_rows, self.n_rows))
+            values = self._gather(key, dtype, positions)
+            self._write_values(wide_key, begin, values.astype(WIDE_DTYPE))
+
+        column["dtype"] = WIDE_DTYPE.str
+        column["key"] = wide_key
+        self._write_schema()
+
+    def _append_json(self, i: int, start: int, values: pd.Series):
+        filename = self._file(f"c{i}.{JSON}")
+        end = os.path.getsize(filename) if os.path.exists(filename) else 0
+        payloads = [
+            json.dumps(value, default=_to_json).encode("utf-8") for value in values
+        ]
+        with open(filename, "ab") as f:
+            f.write(b"".join(payloads))
+
+        ends = end + np.cumsum([len(payload) for payload in payloads])
+        self._write_values(f"c{i}", start, ends.astype(OFFSET_DTYPE))
+
+    def _map(self, key: str, dtype: np.dtype, chunk: int, n_items: int) -> np.memmap:
+        # Maps are kept, and extended when the chunk file grew
+        cached = self._maps.get((key, chunk))
+        if cached is not None and len(cached) >= n_items:
+            return cached
+
+        filename = self._chunk_file(key, chunk)
+        size = os.path.getsize(filename) // dtype.itemsize
+        if size < n_items:
+            raise ValueError(f"{filename} is shorter than committed")
+        mapped = np.memmap(filename, dtype=dtype, mode="r", shape=(size,))
+        self._maps[(key, chunk)] = mapped
+
+        return mapped
+
+    def _gather(self, key: str, dtype: np.dtype, positions: np.ndarray) -> np.ndarray:
+        # Values at the positions, which all have a value for the column
+        values = np.empty(len(positions), dtype=dtype)
+        if not len(positions):
+            return values
+
+        chunks = positions // self.chunk_rows
+        bounds = np.flatnonzero(np.diff(chunks)) + 1
+        for part in np.split(np.arange(len(positions)), bounds):
+            chunk = int(chunks[part[0]])
+            offsets = positions[part] - chunk * self.chunk_rows
+            mapped = self._map(key, dtype, chunk, int(offsets[-1]) + 1)
+            values[part] = mapped[offsets]
+
+        return values
+
+    def _read_column(self, i: int, column: Dict, positions: np.ndarray) -> np.ndarray:
+        present = positions >= column["start"]
+        if column["dtype"] == JSON:
+            values = np.full(len(positions), None, dtype=object)
+            values[present] = self._read_json(i, column, positions[present])
+            return values
+
+        key, dtype = _column_key(i, column), np.dtype(column["dtype"])
+        if present.all():
+            return self._gather(key, dtype, positions)
+
+        values = np.full(len(positions), np.nan)
+        values[present] = self._gather(key, dtype, positions[present])
+
+        return values
+
+    def _read_json(self, i: int, column: Dict, positions: np.ndarray) -> List:
+        if not len(positions):
+            return []
+
+        key = f"c{i}"
+        ends = self._gather(key, OFFSET_DTYPE, positions)
+        after_first = positions > column["start"]
+        starts = np.zeros(len(positions), dtype=OFFSET_DTYPE)
+        starts[after_first] = self._gather(
+            key, OFFSET_DTYPE, positions[after_first] - 1
+        )
+
+        filename = self._file(f"{key}.{JSON}")
+        mapped = self._maps.get((key, JSON))
+        if mapped is None or len(mapped) < ends.max():
+            mapped = np.memmap(filename, dtype=np.uint8, mode="r")
+            self._maps[(key, JSON)] = mapped
+
+        # Decoded in one go
+        payload = b",".join(
+            mapped[start:end].tobytes() for start, end in zip(starts, ends)
+        )
+
+        return json.loads(b"[" + payload + b"]")
+
+
+def _write_atomic(filename: str, payload: bytes):
+    # Readers never see a partially written file
+    tmp_filename = f"{filename}.tmp"
+    with open(tmp_filename, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_filename, filename)
+
+
+def _column_key(i: int, column: Dict) -> str:
+    # Prefix of the chunk files of a column
+    return column.get("key", f"c{i}")
+
+
+def _fits(values: pd.Series, dtype: str) -> bool:
+    # Whether the values are stored as they are in a column of that type
+    dtype = np.dtype(dtype)
+    if dtype.kind == "f":
+        return True
+    if values.isna().any():
+        return False
+    if dtype.kind == "b":
+        return values.dtype.kind == "b"
+
+    return values.dtype.kind in "iub"
+
+
+def _to_native(values: pd.Series, dtype: str) -> np.ndarray:
+    dtype = np.dtype(dtype)
+    if dtype.kind == "f":
+        return pd.to_numeric(values, errors="coerce").to_numpy(dtype=dtype)
+
+    # Integers and booleans have no missing value
+    return values.fillna(0).to_numpy(dtype=dtype)
@@ -0,0 +1,243 @@
+import io
+import json
+import os
+import struct
+from typing import Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Run data is stored column by column in a compressed npz file next to the
+# routine yaml. Numeric and boolean columns are kept as native arrays, any
+# other column (strings, array references, mixed values) goes into a single
+# json document. Nothing is pickled, so loading the file runs no code.
+DATA_EXT = ".npz"
+FORMAT_VERSION = 1
+
+# While a run goes on, its rows are appended to a log instead: MAGIC, then
+# one (size, payload) chunk per append, each payload an uncompressed npz of
+# the new rows in the layout above
+DATA_LOG_EXT = ".rows"
+MAGIC = b"BDGROW01"
+CHUNK_HEADER = struct.Struct("<Q")
+
+
+def _is_native(column: pd.Series) -> bool:
+    return isinstance(column.dtype, np.dtype) and column.dtype.kind in "biuf"
+
+
+def _to_json(value: Any):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if value is pd.NA or value is pd.NaT:
+        return None
+
+    return str(value)
+
+
+def _pack(data: pd.DataFrame) -> dict:
+    arrays = {
+        "version": np.array(FORMAT_VERSION),
+        "index": data.index.to_numpy(dtype=np.int64),
+        "columns": np.array([str(name) for name in data.columns], dtype=str),
+    }
+    objects = {}
+    for i, name in enumerate(data.columns):
+        column = data.iloc[:, i]
+        if _is_native(column):
+            arrays[f"c{i}"] = column.to_numpy()
+        else:
+            objects[str(i)] = column.tolist()
+    payload = json.dumps(objects, default=_to_json).encode("utf-8")
+    arrays["objects"] = np.frombuffer(payload, dtype=np.uint8)
+
+    return arrays
+
+
+def _unpack(npz, filename: str) -> pd.DataFrame:
+    if int(npz["version"]) > FORMAT_VERSION:
+        raise ValueError(f"{filename} was written by a newer version of Badger")
+
+    objects = json.loads(npz["objects"].tobytes())
+    columns = {}
+    for i, name in enumerate(npz["columns"].tolist()):
+        if str(i) in objects:
+            columns[name] = objects[str(i)]
+        else:
+            columns[name] = npz[f"c{i}"]
+
+    return pd.DataFrame(columns, index=npz["index"])
+
+
+def save_data(data: pd.DataFrame, filename: str):
+    """
+    Write a DataFrame to a columnar data file, atomically.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        The run data, with an integer index.
+    filename : str
+        Path of the data file.
+    """
+    # Readers never see a partially written file
+    tmp_filename = f"{filename}.tmp"
+    with open(tmp_filename, "wb") as f:
+        np.savez_compressed(f, **_pack(data))
+    os.replace(tmp_filename, filename)
+
+
+def load_data(filename: str) -> pd.DataFrame:
+    """
+    Read a DataFrame from a columnar data file.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the data file.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The run data, sorted by index.
+    """
+    with np.load(filename, allow_pickle=False) as npz:
+        data = _unpack(npz, filename)
+    data.sort_index(inplace=True)
+
+    return data
+
+
+def data_from_dict(data_dict: dict) -> pd.DataFrame:
+    """
+    Build the run data from its dict form, as stored in the legacy yaml
+    archives ({column: {index: value}}).
+    """
+    try:
+        data = pd.DataFrame(data_dict)
+    except ValueError:  # scalar values only
+        data = pd.DataFrame(data_dict, index=[0])
+    data.index = data.index.astype(int)
+    data.sort_index(inplace=True)
+
+    return data
+
+
+def load_run_data(filename: str) -> Optional[pd.DataFrame]:
+    """
+    Read the data of an archived run, from its data file or, for a run still
+    in progress (or one that never finished), from its log. The log is
+    removed once its rows are compacted into the data file.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the run yaml file.
+
+    Returns
+    -------
+    pandas.DataFrame or None
+        The run data, sorted by index, None if the run has no data file.
+    """
+    stem = os.path.splitext(filename)[0]
+    if os.path.exists(stem + DATA_LOG_EXT):
+        return load_data_log(stem + DATA_LOG_EXT)
+    if os.path.exists(stem + DATA_EXT):
+        return load_data(stem + DATA_EXT)
+
+    return None
+
+
+class DataLog:
+    """
+    Append-only log of the rows of a DataFrame that only grows, such as the
+    data of a live run.
+
+    Each append writes the rows added since the previous one, so its cost
+    does not depend on how many rows are already in the log.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the log file, it is overwritten on the first append.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.n_rows = 0  # rows of the data already in the log
+        self._started = False
+
+    def append(self, data: pd.DataFrame) -> int:
+        """
+        Append the rows of data that are not in the log yet. If data shrank,
+        it was replaced, and the log starts over.
+
+        Returns
+        -------
+        int
+            Number of rows written.
+        """
+        if len(data) < self.n_rows:
+            self._started = False
+            self.n_rows = 0
+
+        rows = data.iloc[self.n_rows :]
+        if self._started and not len(rows):
+            return 0
+
+        buffer = io.BytesIO()
+        np.savez(buffer, **_pack(rows))
+        payload = buffer.getvalue()
+        with open(self.filename, "ab" if self._started else "wb") as f:
+            if not self._started:
+                f.write(MAGIC)
+            f.write(CHUNK_HEADER.pack(len(payload)))
+            f.write(payload)
+
+        self._started = True
+        self.n_rows = len(data)
+
+        return len(rows)
+
+
+def load_data_log(filename: str) -> pd.DataFrame:
+    """
+    Read the rows of a data log.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the log file.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The run data, sorted by index.
+    """
+    with open(filename, "rb") as f:
+        raw = f.read()
+
+    if not raw.startswith(MAGIC):
+        raise ValueError(f"{filename} is not a Badger data log")
+
+    frames: List[pd.DataFrame] = []
+    offset = len(MAGIC)
+    while offset + CHUNK_HEADER.size <= len(raw):
+        (size,) = CHUNK_HEADER.unpack_from(raw, offset)
+        offset += CHUNK_HEADER.size
+        if offset + size > len(raw):  # chunk cut short by an interrupted write
+            break
+
+        with np.load(io.BytesIO(raw[offset : offset + size])) as npz:
+            frames.append(_unpack(npz, filename))
+        offset += size
+
+    if not frames:
+        return pd.DataFrame()
+
+    data = pd.concat(frames) if len(frames) > 1 else frames[0]
+    data.sort_index(inplace=True)
+
+    return data
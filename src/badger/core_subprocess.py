@@ -7,6 +7,7 @@ from pandas import DataFrame
 import multiprocessing as mp
 import os
 
+from badger.column_store import ColumnStore
 from badger.settings import (
     init_settings,
     apply_pytorch_multiprocess_tensor_sharing_setting,
@@ -16,6 +17,7 @@ from badger.logger import _get_default_logger
 from badger.logger.event import Events
 from badger.routine import Routine
 from badger.log import configure_process_logging
+from badger.serialization import pack
 from xopt.errors import FeasibilityError, XoptError
 from xopt.vocs import select_best
 
@@ -23,6 +25,28 @@ from xopt.vocs import select_best
 logger = logging.getLogger(__name__)
 
 
+def live_update(routine: Routine, data_store: ColumnStore = None):
+    """
+    The update sent to the GUI after each evaluation: the data and a copy of
+    the generator. With a data store, the new rows are appended to it and
+    only the number of rows is sent, the GUI reads the rows it needs from
+    the store, so the cost of an update does not grow with the run.
+
+    Parameters
+    ----------
+    routine : Routine
+    data_store : ColumnStore, optional
+    """
+    if data_store is None:
+        return routine.data, deepcopy(routine.generator)
+
+    data_store.append(routine.data.iloc[len(data_store) :])
+    # The generator goes without its data, which the GUI has already
+    generator = deepcopy(routine.generator, {id(routine.generator.data): None})
+
+    return len(data_store), generator
+
+
 def convert_to_solution(result: DataFrame, routine: Routine):
     """
     This method is passed the latest evaluated solution and converts that to a printable format for the terminal.
@@ -119,7 +143,7 @@ def run_routine_subprocess(
     apply_pytorch_multiprocess_tensor_sharing_setting(config_values)
 
     # Now load the archive would use the correct config
-    from badger.archive import load_run, archive_run
+    from badger.archive import attach_arrays, load_run, start_run_log
 
     logger.info("Waiting for wait_event to be set...")
     wait_event.wait()
@@ -149,6 +173,8 @@ def run_routine_subprocess(
                 logger.info("Resetting routine data")
                 routine.data = routine.data.iloc[0:0]  # reset the data
 
+        attach_arrays(routine)
+
     except Exception as e:
         error_title = f"{type(e).__name__}: {e}"
         error_traceback = traceback.format_exc()
@@ -185,9 +211,13 @@ def run_routine_subprocess(
     start_time = args.pop("start_time", None)
     verbose = args.pop("verbose", 2)
     testing = args.pop("testing", False)
+    data_store = args.pop("data_store", None)
+    if data_store is not None:
+        data_store = ColumnStore(data_store, mode="a")
 
     # setup variables of routine properties for code readablilty
     initial_points = routine.initial_points
+    run_log = None
 
     # Log the optimization progress in terminal
     logger.info(f"Getting default logger with verbosity: {verbose}")
@@ -222,7 +252,7 @@ def run_routine_subprocess(
                 opt_logger.update(Events.OPTIMIZATION_STEP, solution)
                 if evaluate:
                     time.sleep(0.1)  # give it some break tp catch up
-                    evaluate_queue[0].send((routine.data, routine.generator))
+                    evaluate_queue[0].send_bytes(pack(live_update(routine, data_store)))
 
         logger.info("Starting optimization loop...")
         while True:
@@ -284,16 +314,19 @@ def run_routine_subprocess(
             solution = convert_to_solution(result, routine)
             opt_logger.update(Events.OPTIMIZATION_STEP, solution)
 
-            generator_copy = deepcopy(routine.generator)
-
             if evaluate:
                 logger.debug("Sending evaluation data to evaluate_queue.")
-                evaluate_queue[0].send((routine.data, generator_copy))
+                evaluate_queue[0].send_bytes(pack(live_update(routine, data_store)))
 
             if archive:
                 if not testing:
+                    # Only the new rows are written, the run is compacted
+                    # into its final archive once it is over
                     logger.info("Archiving run state.")
-                    archive_run(routine)
+                    if run_log is None:
+                        run_log = start_run_log(routine)
+                    else:
+                        run_log.append(routine.data)
 
     except BadgerRunTerminated:
         logger.info("Optimization terminated by BadgerRunTerminated.")
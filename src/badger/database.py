@@ -0,0 +1,179 @@
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+BUSY_TIMEOUT = 30.0  # time a writer waits for another one, unit is second
+
+
+def split_statements(script: str) -> List[str]:
+    """
+    Split a SQL script into statements, keeping the bodies of triggers
+    whole.
+    """
+    statements, statement = [], ""
+    for part in script.split(";"):
+        statement += part + ";"
+        if sqlite3.complete_statement(statement):
+            statements.append(statement.strip())
+            statement = ""
+
+    return [statement for statement in statements if statement != ";"]
+
+
+class Database:
+    """
+    SQLite database shared by the threads of a process, and by processes
+    (the GUI and the run subprocesses).
+
+    Each thread gets its own connection, opened on first use and kept for
+    the next calls. The schema is created, and the migrations applied, once
+    per process when the first connection is opened, rather than on every
+    call. The database is in WAL mode by default, so readers are not
+    blocked by a writer and the writers of several processes queue up
+    instead of failing.
+
+    Parameters
+    ----------
+    path : str
+        Path of the database file.
+    schema : str
+        SQL statements creating the tables and indexes, separated by ";".
+        They must be idempotent ("if not exists"), new tables and indexes
+        of later versions are created by them.
+    migrations : list of callable, optional
+        Called in order with the connection, in a transaction, to bring a
+        database written by an older version up to date. The version of a
+        database is the number of migrations applied to it, a new database
+        is created at the latest version.
+    journal_mode : str
+        SQLite journal mode, "wal" unless the file may be on a network
+        filesystem, which does not support it.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        schema: str = "",
+        migrations: Optional[Sequence[Callable[[sqlite3.Connection], None]]] = None,
+        journal_mode: str = "wal",
+    ):
+        self.path = path
+        self.schema = schema
+        self.migrations: List[Callable] = list(migrations or [])
+        self.journal_mode = journal_mode
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._initialized_pid = None  # process the database was initialized in
+
+    @property
+    def version(self) -> int:
+        return len(self.migrations)
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        The connection of the calling thread.
+        """
+        local = self._local
+        # A connection inherited through a fork must not be used
+        if getattr(local, "pid", None) != os.getpid():
+            local.con = self._open()
+            local.pid = os.getpid()
+            local.depth = 0
+
+        return local.con
+
+    def close(self):
+        """
+        Close the connection of the calling thread, if any.
+        """
+        local = self._local
+        if getattr(local, "pid", None) == os.getpid():
+            local.con.close()
+        local.pid = None
+        local.con = None
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run statements in a transaction, committed when the block exits or
+        rolled back on error. Transactions opened within the block are part
+        of it, so that several calls can be batched in one transaction:
+
+            with BADGER_DB.transaction():
+                for routine in routines:
+                    save_routine(routine)
+        """
+        con = self.connection()
+        local = self._local
+        if local.depth:
+            local.depth += 1
+            try:
+                yield con
+            finally:
+                local.depth -= 1
+            return
+
+        con.execute("begin immediate")  # take the write lock up front
+        local.depth = 1
+        try:
+            yield con
+        except BaseException:
+            con.execute("rollback")
+            raise
+        else:
+            con.execute("commit")
+        finally:
+            local.depth = 0
+
+    def query(self, sql: str, params=()) -> List[tuple]:
+        """
+        Run a query and return all the rows.
+        """
+        return self.connection().execute(sql, params).fetchall()
+
+    def _open(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Transactions are opened explicitly, see transaction
+        con = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        con.execute(f"pragma journal_mode = {self.journal_mode}")
+        if self.journal_mode == "wal":
+            con.execute("pragma synchronous = normal")  # safe with WAL
+        con.execute("pragma foreign_keys = on")
+
+        with self._lock:
+            if self._initialized_pid != os.getpid():
+                try:
+                    self._initialize(con)
+                except BaseException:
+                    con.close()
+                    raise
+                self._initialized_pid = os.getpid()
+
+        return con
+
+    def _initialize(self, con: sqlite3.Connection):
+        con.execute("begin immediate")
+        try:
+            (version,) = con.execute("pragma user_version").fetchone()
+            (n_tables,) = con.execute(
+                "select count(*) from sqlite_master where type = 'table'"
+            ).fetchone()
+            if n_tables:  # not a new database
+                for migrate in self.migrations[version:]:
+                    logger.info(f"Migrating {self.path} ({migrate.__name__})")
+                    migrate(con)
+
+            for statement in split_statements(self.schema):
+                con.execute(statement)
+            con.execute(f"pragma user_version = {self.version}")
+        except BaseException:
+            con.execute("rollback")
+            raise
+        else:
+            con.execute("commit")
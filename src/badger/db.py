@@ -3,191 +3,738 @@ import warnings
 from datetime import datetime
 import logging
 
-import yaml
 import sqlite3
+import threading
 import uuid
+from contextlib import closing
+from typing import Dict, List, Optional, Tuple
 
+import pandas as pd
+from xopt.vocs import get_feasibility_data
+
+from badger.analytics import summarize_history
+from badger.database import Database
 from badger.routine import Routine
+from badger.serialization import dump_yaml, load_yaml
 from badger.settings import init_settings
-from badger.utils import get_yaml_string
+from badger.utils import LazyAttributes, get_yaml_string
 from badger.errors import BadgerConfigError, BadgerDBError
 
 logger = logging.getLogger(__name__)
 
-# Check badger database root
-flag_use_db = True
-config_singleton = init_settings()
-try:
-    BADGER_DB_ROOT = config_singleton.read_value("BADGER_DB_ROOT")
-except KeyError:
-    flag_use_db = False
+DB_FILENAME = "badger.db"
+# Files of the layout before the routines and runs shared a database
+LEGACY_ROUTINES_FILENAME = "routines.db"
+LEGACY_RUNS_FILENAME = "runs.db"
+
+SCHEMA = """
+create table if not exists routine (
+    id text primary key,
+    name text,
+    config,
+    savedAt timestamp,
+    createdAt text,
+    environment text,
+    generator text,
+    description text
+);
+create index if not exists routine_saved on routine (savedAt);
+create index if not exists routine_environment on routine (environment);
+create index if not exists routine_generator on routine (generator);
+
+create table if not exists routine_tag (
+    routine_id text references routine (id) on delete cascade,
+    tag text
+);
+create index if not exists routine_tag_tag on routine_tag (tag, routine_id);
+create index if not exists routine_tag_routine on routine_tag (routine_id);
+
+create table if not exists run (
+    id integer primary key,
+    savedAt timestamp,
+    finishedAt timestamp,
+    routine_id text references routine (id) on delete set null,
+    filename text unique
+);
+create index if not exists run_routine on run (routine_id, savedAt);
+create index if not exists run_saved on run (savedAt);
+
+create table if not exists run_stats (
+    run_id integer primary key references run (id) on delete cascade,
+    n_evaluations integer,
+    n_errors integer,
+    n_feasible integer,
+    feasibility_rate real,
+    objective text,
+    direction text,
+    best real,
+    evals_to_best integer,
+    evals_to_converge integer,
+    duration real
+);
+
+-- Progress of the migrations of the legacy databases, see
+-- migrate_legacy_databases
+create table if not exists migration (
+    name text primary key,
+    routines integer,
+    runs integer,
+    done integer
+);
+
+-- Full-text index of the routine names and descriptions
+create virtual table if not exists routine_fts
+    using fts5(id unindexed, name, description);
+create trigger if not exists routine_insert after insert on routine begin
+    insert into routine_fts (id, name, description)
+        values (new.id, new.name, new.description);
+end;
+create trigger if not exists routine_update
+after update of id, name, description on routine begin
+    delete from routine_fts where id = old.id;
+    insert into routine_fts (id, name, description)
+        values (new.id, new.name, new.description);
+end;
+create trigger if not exists routine_delete after delete on routine begin
+    delete from routine_fts where id = old.id;
+end;
+"""
+
+# Columns of the routine table
+ROUTINE_COLUMNS = [
+    "id",
+    "name",
+    "config",
+    "savedAt",
+    "createdAt",
+    "environment",
+    "generator",
+    "description",
+]
+
+# Columns of the run_stats table, besides the run id
+RUN_STATS_COLUMNS = [
+    "n_evaluations",
+    "n_errors",
+    "n_feasible",
+    "feasibility_rate",
+    "objective",
+    "direction",
+    "best",
+    "evals_to_best",
+    "evals_to_converge",
+    "duration",
+]
+
+# Legacy database import, see migrate_legacy_databases
+LEGACY_MIGRATION = "legacy_databases"
+MIGRATION_BATCH_SIZE = 200
+
+# Routine table of the files routines are exported to and imported from
+EXPORT_SCHEMA = (
+    "create table if not exists routine "
+    "(id text primary key, name text, config, savedAt timestamp)"
+)
+
+
+class LegacyTable:
+    """
+    Table of a database of the two-file layout, read in batches of rows in
+    the order they were inserted.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the database file, which may not exist.
+    table : str
+        Name of the table.
+    columns : list of str
+        Columns to read, None for those the table does not have.
+    aliases : dict, optional
+        Older names of the columns.
+    """
 
-if flag_use_db:
-    if BADGER_DB_ROOT is None:
-        raise BadgerConfigError("Please set the BADGER_DB_ROOT env var!")
-    elif not os.path.exists(BADGER_DB_ROOT):
-        os.makedirs(BADGER_DB_ROOT)
-        logger.info(f"Badger database root {BADGER_DB_ROOT} created")
+    def __init__(
+        self,
+        filename: str,
+        table: str,
+        columns: List[str],
+        aliases: Optional[Dict[str, str]] = None,
+    ):
+        self.filename = filename
+        self.table = table
+        self.existing = []
+        if os.path.exists(filename):
+            with closing(self._connect()) as con:
+                self.existing = [
+                    row[1] for row in con.execute(f"pragma table_info({table})")
+                ]
+
+        aliases = aliases or {}
+        self.selected = []
+        for column in columns:
+            if column in self.existing:
+                self.selected.append(column)
+            elif aliases.get(column) in self.existing:
+                self.selected.append(aliases[column])
+            else:
+                self.selected.append("null")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(f"file:{self.filename}?mode=ro", uri=True)
+
+    def count(self, after: int = 0) -> int:
+        if not self.existing:
+            return 0
+        with closing(self._connect()) as con:
+            return con.execute(
+                f"select count(*) from {self.table} where rowid > ?", (after,)
+            ).fetchone()[0]
+
+    def read(self, after: int = 0, limit: int = -1) -> List[tuple]:
+        """
+        Rows after the row of id after, as the row id followed by the columns.
+        """
+        if not self.existing:
+            return []
+        with closing(self._connect()) as con:
+            return con.execute(
+                f"select rowid, {', '.join(self.selected)} from {self.table} "
+                "where rowid > ? order by rowid limit ?",
+                (after, limit),
+            ).fetchall()
 
 
-def ensure_routines_db_exists(func):
+def legacy_tables() -> Tuple[LegacyTable, LegacyTable]:
     """
-    Create the routines database (a SQL table) if it does not already exist.
+    The routine and run tables of the two-file layout (routines.db and
+    runs.db) next to the database.
     """
+    root = os.path.dirname(get_db().path)
+    routines = LegacyTable(
+        os.path.join(root, LEGACY_ROUTINES_FILENAME),
+        "routine",
+        ["id", "name", "config", "savedAt"],
+    )
+    runs = LegacyTable(
+        os.path.join(root, LEGACY_RUNS_FILENAME),
+        "run",
+        ["savedAt", "finishedAt", "routine_id", "filename"],
+        aliases={"routine_id": "routine"},
+    )
 
-    def func_safe(*args, **kwargs):
-        db_routine = os.path.join(BADGER_DB_ROOT, "routines.db")
+    return routines, runs
 
-        con = sqlite3.connect(db_routine)
-        cur = con.cursor()
 
-        cur.execute(
-            "create table if not exists routine (id text primary key, name text, config, savedAt timestamp)"
-        )
+def legacy_routine_id(name: str) -> str:
+    # Id of a routine of the oldest layout, keyed by its name. The same on
+    # every attempt, so that an interrupted migration can go on
+    return str(uuid.uuid5(uuid.NAMESPACE_OID, name))
+
+
+def migration_state() -> Dict[str, int]:
+    """
+    Progress of the legacy migration: the row ids of the last legacy
+    routine ("routines") and run ("runs") imported, and whether it is done.
+    """
+    rows = get_db().query(
+        "select routines, runs, done from migration where name = ?",
+        (LEGACY_MIGRATION,),
+    )
 
-        con.commit()
-        con.close()
+    return dict(zip(["routines", "runs", "done"], rows[0] if rows else (0, 0, 0)))
 
-        return func(*args, **kwargs)
 
-    return func_safe
+def _save_migration_state(con: sqlite3.Connection, state: Dict[str, int]):
+    con.execute(
+        "insert or replace into migration (name, routines, runs, done) "
+        "values (?, ?, ?, ?)",
+        (LEGACY_MIGRATION, state["routines"], state["runs"], state["done"]),
+    )
 
 
-def ensure_runs_db_exists(func):
+def legacy_migration_pending() -> bool:
     """
-    Create the runs database (a SQL table) if it does not already exist.
+    Whether there are legacy databases not migrated yet.
     """
+    routines, runs = legacy_tables()
+    if not (routines.existing or runs.existing):
+        return False
 
-    def func_safe(*args, **kwargs):
-        db_run = os.path.join(BADGER_DB_ROOT, "runs.db")
+    return not migration_state()["done"]
 
-        con = sqlite3.connect(db_run)
-        cur = con.cursor()
 
-        cur.execute(
-            "create table if not exists run (id integer primary key, savedAt timestamp, finishedAt timestamp, routine_id, filename)"
+def migrate_legacy_databases(
+    dry_run: bool = False,
+    batch_size: int = MIGRATION_BATCH_SIZE,
+    on_progress=None,
+    stop_event: Optional[threading.Event] = None,
+) -> Dict[str, int]:
+    """
+    Import the routines and runs of the two-file layout (routines.db and
+    runs.db) into the database. The legacy files are left in place.
+
+    The rows are imported in batches, each in its own transaction with the
+    progress of the migration, so that the database can be read meanwhile
+    and an interrupted migration goes on from where it stopped. The routines
+    of the oldest layout, keyed by their name, get an id, which is written
+    to the files of their runs too once their batch is committed.
+
+    Parameters
+    ----------
+    dry_run : bool
+        Only count what would be imported.
+    batch_size : int
+        Rows imported per transaction.
+    on_progress : callable, optional
+        Called as on_progress(n_done, n_total) after each batch.
+    stop_event : threading.Event, optional
+        The migration stops after the current batch when it is set.
+
+    Returns
+    -------
+    dict
+        Numbers of routines ("routines") and runs ("runs") imported, and of
+        run files rewritten ("run_files"), or that would be in a dry run.
+    """
+    stop_event = stop_event or threading.Event()
+    routines, runs = legacy_tables()
+    keyed_by_name = bool(routines.existing) and "id" not in routines.existing
+    state = migration_state()
+
+    n_routines = routines.count(state["routines"])
+    n_runs = runs.count(state["runs"])
+    if dry_run:
+        return {
+            "routines": n_routines,
+            "runs": n_runs,
+            "run_files": n_runs if keyed_by_name else 0,
+        }
+
+    report = {"routines": 0, "runs": 0, "run_files": 0}
+
+    def import_routine(con, row):
+        _, id, name, config, saved_at = row
+        if keyed_by_name:
+            id = legacy_routine_id(name)
+        if con.execute("select 1 from routine where id = ?", (id,)).fetchone():
+            return
+        try:
+            config = load_yaml(config)
+        except Exception as e:
+            logger.warning(f"Failed to import routine {name}: {e}")
+            return
+        if keyed_by_name:
+            config["id"] = id
+            config_yaml = dump_yaml(
+                dict(sorted(config.items())), default_flow_style=False
+            )
+        else:
+            config_yaml = row[3]
+        insert_routine(con, (id, name, config_yaml, saved_at), config_metadata(config))
+        report["routines"] += 1
+
+    # Run files to write the id of their routine to, by routine id
+    run_files: Dict[str, List[str]] = {}
+
+    def import_run(con, row):
+        _, saved_at, finished_at, key, filename = row
+        routine_id = legacy_routine_id(key) if keyed_by_name and key else key
+        # Not linked to a routine missing from the database
+        cur = con.execute(
+            "insert or ignore into run (savedAt, finishedAt, routine_id, filename) "
+            "values (?, ?, (select id from routine where id = ?), ?)",
+            (saved_at, finished_at, routine_id, filename),
         )
+        report["runs"] += cur.rowcount
+        if cur.rowcount and keyed_by_name and key:
+            run_files.setdefault(routine_id, []).append(filename)
+
+    n_done = 0
+    for table, key, import_row in [
+        (routines, "routines", import_routine),
+        (runs, "runs", import_run),
+    ]:
+        while not stop_event.is_set():
+            rows = table.read(state[key], batch_size)
+            if not rows:
+                break
+            with get_db().transaction() as con:
+                for row in rows:
+                    import_row(con, row)
+                state[key] = rows[-1][0]
+                _save_migration_state(con, state)
+
+            # Out of the transaction, not to hold the database locked
+            for routine_id, filenames in run_files.items():
+                try:
+                    set_runs_routine_id(filenames, routine_id)
+                    report["run_files"] += len(filenames)
+                except Exception as e:
+                    logger.warning(
+                        f"Failed to write routine id {routine_id} to its runs: {e}"
+                    )
+            run_files.clear()
+
+            n_done += len(rows)
+            if on_progress is not None:
+                on_progress(n_done, n_routines + n_runs)
+
+    if not stop_event.is_set():
+        state["done"] = 1
+        with get_db().transaction() as con:
+            _save_migration_state(con, state)
+        logger.info(
+            f"Migrated {report['routines']} routine(s) and {report['runs']} run(s) "
+            f"from the legacy databases in {os.path.dirname(get_db().path)}"
+        )
+
+    return report
 
-        con.commit()
-        con.close()
 
-        return func(*args, **kwargs)
+class LegacyMigrator(threading.Thread):
+    """
+    Run migrate_legacy_databases in the background. The database is
+    read-only meanwhile, see check_writable. The progress and the error the
+    migration failed with, if any, are kept, see migration_status.
+
+    Parameters
+    ----------
+    on_progress : callable, optional
+        Called as on_progress(n_done, n_total) after each batch.
+    **kwargs
+        Other arguments of migrate_legacy_databases (batch_size).
+    """
 
-    return func_safe
+    def __init__(self, on_progress=None, **kwargs):
+        super().__init__(name="badger-db-migration", daemon=True)
 
+        self.on_progress = on_progress
+        self.kwargs = kwargs
+        self.stop_event = threading.Event()
+        self.n_done = self.n_total = 0
+        self.report = None
+        self.error = None
 
-def filter_routines(records, tags):
-    records_filtered = []
-    for record in records:
+    def run(self):
         try:
-            _tags = yaml.safe_load(record[3])["config"]["tags"]
-            if tags.items() <= _tags.items():
-                records_filtered.append(record)
-        except:
-            pass
+            self.report = migrate_legacy_databases(
+                on_progress=self.progress, stop_event=self.stop_event, **self.kwargs
+            )
+        except Exception as e:  # resumed on the next start
+            self.error = e
+            logger.warning(f"Migration of the legacy databases failed: {e}")
+
+    def progress(self, n_done: int, n_total: int):
+        self.n_done, self.n_total = n_done, n_total
+        if self.on_progress is not None:
+            self.on_progress(n_done, n_total)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+_migrator: Optional[LegacyMigrator] = None
+_migration_lock = threading.Lock()
+_migration_checked = False
+
+
+def start_legacy_migration(**kwargs) -> Optional[LegacyMigrator]:
+    """
+    Start migrating the legacy databases in the background, if they are
+    not migrated yet. Called by the functions reading the database, which
+    may return partial results meanwhile, see migration_status. Checks once
+    per process: a migration that failed or was stopped goes on on the next
+    start.
+
+    Parameters
+    ----------
+    **kwargs
+        Arguments of LegacyMigrator.
+
+    Returns
+    -------
+    LegacyMigrator or None
+        The migration running, if any.
+    """
+    global _migrator, _migration_checked
 
-    return records_filtered
+    with _migration_lock:
+        if _migration_checked:
+            return _migrator if _migrator and _migrator.is_alive() else None
 
+        _migration_checked = True
+        if not legacy_migration_pending():
+            _migrator = None
+            return None
 
-def extract_metadata(records):
-    env_list = []
-    descr_list = []
-    for record in records:
+        _migrator = LegacyMigrator(**kwargs)
+        _migrator.start()
+
+        return _migrator
+
+
+def migration_status() -> Optional[Dict]:
+    """
+    State of the background migration of the legacy databases, see
+    start_legacy_migration.
+
+    Returns
+    -------
+    dict or None
+        Whether it is running ("running"), the rows imported ("done") out of
+        those to import ("total"), and the error it failed with ("error"),
+        None if no migration was started by this process.
+    """
+    if _migrator is None:
+        return None
+
+    return {
+        "running": _migrator.is_alive(),
+        "done": _migrator.n_done,
+        "total": _migrator.n_total,
+        "error": _migrator.error,
+    }
+
+
+def wait_for_migration(timeout: Optional[float] = None) -> bool:
+    """
+    Wait for the background migration of the legacy databases, if any, for
+    the reads to return complete results.
+
+    Returns
+    -------
+    bool
+        Whether no migration is running anymore.
+    """
+    migrator = start_legacy_migration()
+    if migrator is not None:
+        migrator.join(timeout)
+
+    return migrator is None or not migrator.is_alive()
+
+
+def check_writable():
+    """
+    Raise a BadgerDBError if the database is being migrated.
+    """
+    if _migrator is not None and _migrator.is_alive():
+        raise BadgerDBError(
+            "The Badger database is being migrated, it is read-only until done!"
+        )
+
+
+def set_runs_routine_id(filenames: List[str], id: str):
+    """
+    Write the id of their routine to the archived runs.
+    """
+    # Check badger optimization run archive root
+    config_singleton = init_settings()
+    BADGER_ARCHIVE_ROOT = config_singleton.read_value("BADGER_ARCHIVE_ROOT")
+    if BADGER_ARCHIVE_ROOT is None:
+        raise BadgerConfigError("Please set the BADGER_ARCHIVE_ROOT env var!")
+
+    for fname in filenames:
+        tokens = fname.split("-")
+        first_level = tokens[1]
+        second_level = f"{tokens[1]}-{tokens[2]}"
+        third_level = f"{tokens[1]}-{tokens[2]}-{tokens[3]}"
+
+        filename = os.path.join(
+            BADGER_ARCHIVE_ROOT, first_level, second_level, third_level, fname
+        )
         try:
-            metadata = yaml.safe_load(record[2])
-            env = metadata["environment"]["name"]
-            env_list.append(env)
-            descr = metadata["description"]
-            descr_list.append(descr)
-        except Exception:
-            env_list.append("")
-            descr_list.append("")
+            with open(filename, "r") as file:
+                run = load_yaml(file)
+        except FileNotFoundError:
+            continue
+        run["id"] = id
+        sorted_run = {key: run[key] for key in sorted(run.keys())}
+        with open(filename, "w") as file:
+            dump_yaml(sorted_run, file, default_flow_style=False)
 
-    return env_list, descr_list
 
+def tag_values(tags) -> List[str]:
+    """
+    Tags of a routine as strings, "key=value" for the items of dict tags.
+    """
+    if not tags:
+        return []
+    if isinstance(tags, dict):
+        return [f"{key}={value}" for key, value in tags.items()]
 
-@ensure_routines_db_exists
-def save_routine(routine: Routine):
-    db_routine = os.path.join(BADGER_DB_ROOT, "routines.db")
+    return [str(tag) for tag in tags]
 
-    con = sqlite3.connect(db_routine)
-    cur = con.cursor()
 
-    id = str(uuid.uuid4())
-    routine.id = id
-    cur.execute(
-        "insert into routine values (?, ?, ?, ?)",
-        (routine.id, routine.name, routine.yaml(), datetime.now()),
+def routine_metadata(routine: Routine) -> dict:
+    """
+    Values of the metadata columns of a routine, and its tags.
+    """
+    return {
+        "createdAt": routine.creation_ts,
+        "environment": routine.environment.name,
+        "generator": routine.generator.name,
+        "description": routine.description,
+        "tags": routine.tags,
+    }
+
+
+def config_metadata(config: dict) -> dict:
+    """
+    Same as routine_metadata, from the config of a routine.
+    """
+    return {
+        "createdAt": config.get("creation_ts"),
+        "environment": (config.get("environment") or {}).get("name"),
+        "generator": (config.get("generator") or {}).get("name"),
+        "description": config.get("description"),
+        "tags": config.get("tags"),
+    }
+
+
+def set_tags(con: sqlite3.Connection, id: str, tags):
+    con.execute("delete from routine_tag where routine_id = ?", (id,))
+    con.executemany(
+        "insert into routine_tag values (?, ?)",
+        [(id, tag) for tag in dict.fromkeys(tag_values(tags))],
     )
 
-    con.commit()
-    con.close()
 
+def insert_routine(con: sqlite3.Connection, record, metadata: dict):
+    """
+    Insert a routine from its id, name, config and save time, and its
+    metadata.
+    """
+    con.execute(
+        f"insert into routine ({', '.join(ROUTINE_COLUMNS)}) "
+        f"values ({', '.join('?' * len(ROUTINE_COLUMNS))})",
+        list(record) + [metadata[column] for column in ROUTINE_COLUMNS[4:]],
+    )
+    set_tags(con, record[0], metadata["tags"])
 
-# This function is not safe and might break database! Use with caution!
-@ensure_routines_db_exists
-def update_routine(routine: Routine):
-    db_routine = os.path.join(BADGER_DB_ROOT, "routines.db")
 
-    con = sqlite3.connect(db_routine)
-    cur = con.cursor()
+def fts_query(keyword: str) -> str:
+    # Routines with words starting with each word of the keyword
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in keyword.split())
 
-    cur.execute("select * from routine where id=:id", {"id": routine.id})
-    record = cur.fetchone()
 
-    if record:  # update the record
-        cur.execute(
-            "update routine set name = ?, config = ?, savedAt = ? where id = ?",
-            (routine.name, routine.yaml(), datetime.now(), routine.id),
-        )
+def run_stats(routine: Routine, data) -> dict:
+    """
+    Statistics of a run: number of evaluations, failed and feasible ones,
+    feasibility rate and duration, and for single objective runs the best
+    objective value and the evaluations to it and to convergence (see
+    summarize_history).
+
+    Parameters
+    ----------
+    routine : Routine
+    data : pandas.DataFrame or dict
+        Data of the run, as a DataFrame or a dict of columns.
+    """
+    data = pd.DataFrame(data)
+    vocs = routine.vocs
+    summary = summarize_history(vocs, data)
 
-    con.commit()
-    con.close()
+    stats = dict.fromkeys(RUN_STATS_COLUMNS)
+    stats.update(
+        {key: value for key, value in summary.items() if key in RUN_STATS_COLUMNS}
+    )
+    stats["n_evaluations"] = len(data)
+    if stats["n_feasible"] is None and set(vocs.constraint_names) <= set(data):
+        stats["n_feasible"] = int(get_feasibility_data(vocs, data)["feasible"].sum())
+    if stats["n_feasible"] is not None and len(data):
+        stats["feasibility_rate"] = stats["n_feasible"] / len(data)
+    if stats["evals_to_best"] is not None:
+        best = data.sort_index()[summary["objective"]].iloc[stats["evals_to_best"] - 1]
+        stats["best"] = float(best)
 
+    return stats
 
-@ensure_routines_db_exists
-@ensure_runs_db_exists
-def remove_routine(id: str, remove_runs=True):
-    db_routine = os.path.join(BADGER_DB_ROOT, "routines.db")
 
-    con = sqlite3.connect(db_routine)
-    cur = con.cursor()
+def init_db() -> Optional[Database]:
+    """
+    The Badger database, in the database root of the settings, created if
+    needed. None if the settings have no database root.
+    """
+    try:
+        root = init_settings().read_value("BADGER_DB_ROOT")
+    except KeyError:
+        return None
 
-    cur.execute(f'delete from routine where id = "{id}"')
+    if root is None:
+        raise BadgerConfigError("Please set the BADGER_DB_ROOT env var!")
+    elif not os.path.exists(root):
+        os.makedirs(root)
+        logger.info(f"Badger database root {root} created")
 
-    con.commit()
-    con.close()
+    # Connections are kept and the schema created once, see Database
+    return Database(os.path.join(root, DB_FILENAME), SCHEMA)
 
-    if remove_runs:
-        # Remove all related run records
-        db_run = os.path.join(BADGER_DB_ROOT, "runs.db")
 
-        con = sqlite3.connect(db_run)
-        cur = con.cursor()
+# Read from the settings on first use rather than on import
+_lazy = LazyAttributes(
+    globals(),
+    {
+        "BADGER_DB": init_db,
+        "flag_use_db": lambda: get_db() is not None,
+    },
+)
+__getattr__ = _lazy.load
 
-        cur.execute(f'delete from run where routine_id = "{id}"')
 
-        con.commit()
-        con.close()
+def get_db() -> Optional[Database]:
+    return _lazy.get("BADGER_DB")
 
 
-@ensure_routines_db_exists
-def load_routine(id: str):
-    db_routine = os.path.join(BADGER_DB_ROOT, "routines.db")
-    con = sqlite3.connect(db_routine)
-    cur = con.cursor()
+def save_routine(routine: Routine):
+    check_writable()
+    id = str(uuid.uuid4())
+    routine.id = id
+    with get_db().transaction() as con:
+        insert_routine(
+            con,
+            (routine.id, routine.name, routine.yaml(), datetime.now()),
+            routine_metadata(routine),
+        )
+
+
+# This function is not safe and might break database! Use with caution!
+def update_routine(routine: Routine):
+    check_writable()
+    metadata = routine_metadata(routine)
+    with get_db().transaction() as con:
+        cur = con.execute(
+            "update routine set name = ?, config = ?, savedAt = ?, createdAt = ?, "
+            "environment = ?, generator = ?, description = ? where id = ?",
+            [routine.name, routine.yaml(), datetime.now()]
+            + [metadata[column] for column in ROUTINE_COLUMNS[4:]]
+            + [routine.id],
+        )
+        if cur.rowcount:
+            set_tags(con, routine.id, metadata["tags"])
+
+
+def remove_routine(id: str, remove_runs=True):
+    check_writable()
+    with get_db().transaction() as con:
+        if remove_runs:
+            # Remove all related run records, the others lose their routine
+            con.execute("delete from run where routine_id = ?", (id,))
+        con.execute("delete from routine where id = ?", (id,))
+
 
+def load_routine(id: str):
+    start_legacy_migration()
     if isinstance(id, str) and id.strip():
-        cur.execute("select * from routine where id=:id", {"id": id})
+        records = get_db().query(
+            "select id, name, config, savedAt from routine where id = ?", (id,)
+        )
     else:
         raise ValueError("Expected id to be a non-empty string.")
 
-    records = cur.fetchall()
-    con.close()
-
     if len(records) == 1:
         # return yaml.safe_load(records[0][1]), records[0][2]
-        routine_dict = yaml.safe_load(records[0][2])
+        routine_dict = load_yaml(records[0][2])
         # routine_dict['evaluator'] = None
         with warnings.catch_warnings(record=True) as caught_warnings:
             routine = Routine(**routine_dict)
@@ -206,249 +753,221 @@ def load_routine(id: str):
         raise BadgerDBError(f"Multiple routines with id {id} found in the database!")
 
 
-@ensure_routines_db_exists
-def list_routine(keyword="", tags={}):
-    db_routine = os.path.join(BADGER_DB_ROOT, "routines.db")
-    con = sqlite3.connect(db_routine)
-    cur = con.cursor()
-
-    # check if id column is in database
-    # if not, add it and update routine and run entries accordingly
-    cur.execute("pragma table_info(routine)")
-    columns = [row[1] for row in cur.fetchall()]
-    if "id" not in columns:
-        cur.execute(
-            """
-        create table new_table (
-            id text primary key,
-            name text,
-            config,
-            savedAt timestamp
+def list_routine(keyword="", tags={}, environment=None, generator=None):
+    """
+    The routines whose name or description has words starting with the
+    words of the keyword, and with all the tags, most recently saved first.
+    Only the routine table and its indexes are read, no config is parsed.
+
+    Returns
+    -------
+    tuple of list
+        Ids, names, save times, environments and descriptions.
+    """
+    start_legacy_migration()
+    conditions, params = [], []
+    if keyword.strip():
+        conditions.append(
+            "id in (select id from routine_fts where routine_fts match ?)"
         )
-        """
+        params.append(fts_query(keyword))
+    tag_list = list(dict.fromkeys(tag_values(tags)))
+    if tag_list:
+        conditions.append(
+            "id in (select routine_id from routine_tag "
+            f"where tag in ({', '.join('?' * len(tag_list))}) "
+            "group by routine_id having count(distinct tag) = ?)"
         )
-        db_run = os.path.join(BADGER_DB_ROOT, "runs.db")
-        con_run = sqlite3.connect(db_run)
-        cur_run = con_run.cursor()
-        cur_run.execute("alter table run rename column routine to routine_id")
-        con_run.commit()
-        con_run.close()
-        cur.execute("select * from routine")
-        rows = cur.fetchall()
-        for row in rows:
-            id = str(uuid.uuid4())
-            config = yaml.safe_load(row[1])
-            config["id"] = id
-            sorted_config = dict(sorted(config.items()))
-            new_config = yaml.dump(sorted_config, default_flow_style=False)
-            cur.execute(
-                "insert into new_table (id, name, config, savedAt) values (?, ?, ?, ?)",
-                (id, row[0], new_config, row[2]),
-            )
-            db_run = os.path.join(BADGER_DB_ROOT, "runs.db")
-            con_run = sqlite3.connect(db_run)
-            cur_run = con_run.cursor()
-            # now the column in run table is called 'routine_id' but they are still routine names
-            cur_run.execute(
-                "update run set routine_id = ? where routine_id = ?", (id, row[0])
-            )
-            con_run.commit()
-            con_run.close()
-            filenames = get_runs_by_routine(id)
-            # Check badger optimization run archive root
-            config_singleton = init_settings()
-            BADGER_ARCHIVE_ROOT = config_singleton.read_value("BADGER_ARCHIVE_ROOT")
-            if BADGER_ARCHIVE_ROOT is None:
-                raise BadgerConfigError("Please set the BADGER_ARCHIVE_ROOT env var!")
-            elif not os.path.exists(BADGER_ARCHIVE_ROOT):
-                os.makedirs(BADGER_ARCHIVE_ROOT)
-                logger.info(f"Badger run root {BADGER_ARCHIVE_ROOT} created")
-            for i, fname in enumerate(filenames):
-                tokens = fname.split("-")
-                first_level = tokens[1]
-                second_level = f"{tokens[1]}-{tokens[2]}"
-                third_level = f"{tokens[1]}-{tokens[2]}-{tokens[3]}"
-
-                filename = os.path.join(
-                    BADGER_ARCHIVE_ROOT, first_level, second_level, third_level, fname
-                )
-                filenames[i] = filename
-            for filename in filenames:
-                with open(filename, "r") as file:
-                    run = yaml.safe_load(file)
-                run["id"] = id
-                sorted_run = {key: run[key] for key in sorted(run.keys())}
-                with open(filename, "w") as file:
-                    yaml.dump(sorted_run, file, default_flow_style=False)
-        cur.execute("drop table routine")
-        cur.execute("alter table new_table rename to routine")
-        con.commit()
-
-    cur.execute(
-        f"select id, name, config, savedAt from routine where name like '%{keyword}%' order by savedAt desc"
+        params += tag_list + [len(tag_list)]
+    for column, value in [("environment", environment), ("generator", generator)]:
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+
+    records = get_db().query(
+        "select id, name, savedAt, environment, description from routine "
+        f"where {' and '.join(conditions) or '1'} order by savedAt desc",
+        params,
     )
-    records = cur.fetchall()
-    if tags:
-        records = filter_routines(records, tags)
     ids = [record[0] for record in records]
     names = [record[1] for record in records]
-    timestamps = [record[3] for record in records]
-    environments, descriptions = extract_metadata(records)
-    con.close()
+    timestamps = [record[2] for record in records]
+    environments = [record[3] or "" for record in records]
+    descriptions = [record[4] or "" for record in records]
 
     return ids, names, timestamps, environments, descriptions
 
 
-@ensure_runs_db_exists
 def save_run(run):
-    db_run = os.path.join(BADGER_DB_ROOT, "runs.db")
-
-    con = sqlite3.connect(db_run, timeout=30.0)
-    cur = con.cursor()
-
+    """
+    Record a run, or its new finish time if it is recorded already, and its
+    statistics (see run_stats).
+
+    Parameters
+    ----------
+    run : dict
+        The routine ("routine"), file name ("filename") and data ("data")
+        of the run.
+    """
+    check_writable()
     # Insert or update a record
-    routine_id = run["routine"].id
+    routine = run["routine"]
     run_filename = run["filename"]
     timestamps = run["data"]["timestamp"]
     time_start = datetime.fromtimestamp(timestamps[0])
     time_finish = datetime.fromtimestamp(timestamps[-1])
+    try:
+        stats = run_stats(routine, run["data"])
+    except Exception as e:
+        logger.warning(f"Failed to compute the statistics of run {run_filename}: {e}")
+        stats = dict.fromkeys(RUN_STATS_COLUMNS)
+
+    with get_db().transaction() as con:
+        # Check if the record exist (same filename)
+        existing_row = con.execute(
+            "select id from run where filename = ?", (run_filename,)
+        ).fetchone()
+
+        if existing_row:
+            con.execute(
+                "update run set finishedAt = ? where filename = ?",
+                (time_finish, run_filename),
+            )
+            rid = existing_row[0]
+        else:
+            # Not linked to a routine missing from the database
+            cur = con.execute(
+                "insert into run values "
+                "(?, ?, ?, (select id from routine where id = ?), ?)",
+                (None, time_start, time_finish, routine.id, run_filename),
+            )
+            rid = cur.lastrowid
 
-    # Check if the record exist (same filename)
-    cur.execute("select id from run where filename = ?", (run_filename,))
-    existing_row = cur.fetchone()
-
-    if existing_row:
-        cur.execute(
-            "update run set finishedAt = ? where filename = ?",
-            (time_finish, run_filename),
-        )
-        rid = existing_row[0]
-    else:
-        cur.execute(
-            "insert into run values (?, ?, ?, ?, ?)",
-            (None, time_start, time_finish, routine_id, run_filename),
+        con.execute(
+            f"insert or replace into run_stats (run_id, {', '.join(RUN_STATS_COLUMNS)}) "
+            f"values ({', '.join('?' * (len(RUN_STATS_COLUMNS) + 1))})",
+            [rid] + [stats[column] for column in RUN_STATS_COLUMNS],
         )
-        rid = cur.lastrowid
-
-    con.commit()
-    con.close()
 
     return rid
 
 
-@ensure_runs_db_exists
-def get_runs_by_routine(routine_id: str):
-    db_run = os.path.join(BADGER_DB_ROOT, "runs.db")
+def get_run_stats(routine_id: Optional[str] = None) -> List[dict]:
+    """
+    The runs, most recently saved first, with their statistics (see
+    run_stats), without reading the archive.
+
+    Parameters
+    ----------
+    routine_id : str, optional
+        Only the runs of this routine.
+
+    Returns
+    -------
+    list of dict
+        Id ("run_id"), file name, routine id, save and finish times, and
+        statistics of the runs.
+    """
+    start_legacy_migration()
+    where = "where r.routine_id = ?" if routine_id is not None else ""
+    cur = (
+        get_db()
+        .connection()
+        .execute(
+            "select r.id as run_id, r.filename, r.routine_id, r.savedAt, r.finishedAt, "
+            f"{', '.join('s.' + column for column in RUN_STATS_COLUMNS)} "
+            "from run r left join run_stats s on s.run_id = r.id "
+            f"{where} order by r.savedAt desc",
+            [routine_id] if routine_id is not None else [],
+        )
+    )
+    columns = [description[0] for description in cur.description]
 
-    con = sqlite3.connect(db_run)
-    cur = con.cursor()
+    return [dict(zip(columns, row)) for row in cur.fetchall()]
 
-    cur.execute(
-        f'select filename from run where routine_id = "{routine_id}" order by savedAt desc'
-    )
-    records = cur.fetchall()
-    con.close()
 
+def get_runs_by_routine(routine_id: str):
+    start_legacy_migration()
+    records = get_db().query(
+        "select filename from run where routine_id = ? order by savedAt desc",
+        (routine_id,),
+    )
     filenames = [record[0] for record in records]
 
     return filenames
 
 
-@ensure_runs_db_exists
 def get_runs():
-    db_run = os.path.join(BADGER_DB_ROOT, "runs.db")
-
-    con = sqlite3.connect(db_run)
-    cur = con.cursor()
-
-    cur.execute("select filename from run order by savedAt desc")
-    records = cur.fetchall()
-
-    con.close()
-
+    start_legacy_migration()
+    records = get_db().query("select filename from run order by savedAt desc")
     filenames = [record[0] for record in records]
 
     return filenames
 
 
-@ensure_runs_db_exists
 def remove_run_by_filename(filename):
-    db_run = os.path.join(BADGER_DB_ROOT, "runs.db")
+    check_writable()
+    with get_db().transaction() as con:
+        con.execute("delete from run where filename = ?", (filename,))
 
-    con = sqlite3.connect(db_run)
-    cur = con.cursor()
 
-    cur.execute(f'delete from run where filename = "{filename}"')
-
-    con.commit()
-    con.close()
+def remove_runs_by_filename(filenames: List[str]):
+    """
+    Remove the records of the runs, and their statistics, in one transaction.
+    """
+    check_writable()
+    with get_db().transaction() as con:
+        con.executemany(
+            "delete from run where filename = ?", [(name,) for name in filenames]
+        )
 
 
-@ensure_runs_db_exists
 def remove_run_by_id(rid):
-    db_run = os.path.join(BADGER_DB_ROOT, "runs.db")
-
-    con = sqlite3.connect(db_run)
-    cur = con.cursor()
-
-    cur.execute(f"delete from run where id = {rid}")
-
-    con.commit()
-    con.close()
+    check_writable()
+    with get_db().transaction() as con:
+        con.execute("delete from run where id = ?", (rid,))
 
 
 def import_routines(filename):
+    check_writable()
     con = sqlite3.connect(filename)
     cur = con.cursor()
 
     # Deal with empty db file
-    cur.execute(
-        "create table if not exists routine (id text primary key, name text, config, savedAt timestamp)"
-    )
+    cur.execute(EXPORT_SCHEMA)
 
-    db_routine = os.path.join(BADGER_DB_ROOT, "routines.db")
-    con_db = sqlite3.connect(db_routine)
-    cur_db = con_db.cursor()
-
-    cur.execute("select * from routine")
+    cur.execute("select id, name, config, savedAt from routine")
     records = cur.fetchall()
+    con.close()
 
+    # All in one transaction, the routines that fail are skipped
     failed_list = []
-    for record in records:
-        try:
-            cur_db.execute("insert into routine values (?, ?, ?, ?)", record)
-        except:
-            failed_list.append(record[0])
-
-    con_db.commit()
-    con_db.close()
-
-    con.close()
+    with get_db().transaction() as con_db:
+        for record in records:
+            try:
+                metadata = config_metadata(load_yaml(record[2]))
+                insert_routine(con_db, record, metadata)
+            except Exception:
+                failed_list.append(record[0])
 
     if failed_list:
         raise BadgerDBError(get_yaml_string(failed_list))
 
 
 def export_routines(filename, routine_id_list):
+    start_legacy_migration()
     con = sqlite3.connect(filename)
     cur = con.cursor()
 
-    cur.execute(
-        "create table if not exists routine (id text primary key, name text, config, savedAt timestamp)"
-    )
-
-    db_routine = os.path.join(BADGER_DB_ROOT, "routines.db")
-    con_db = sqlite3.connect(db_routine)
-    cur_db = con_db.cursor()
+    cur.execute(EXPORT_SCHEMA)
 
     for id in routine_id_list:
-        cur_db.execute("select * from routine where id=:id", {"id": id})
-        records = cur_db.fetchall()
+        records = get_db().query(
+            "select id, name, config, savedAt from routine where id = ?", (id,)
+        )
         record = records[0]  # should only have one hit
 
         cur.execute("insert into routine values (?, ?, ?, ?)", record)
 
-    con_db.close()
-
     con.commit()
     con.close()
@@ -1,80 +1,131 @@
+import inspect
+import weakref
 from abc import abstractmethod
+from collections import deque
 from logging import warning
 from typing import TYPE_CHECKING, Any, ClassVar, Dict, List, Optional
 
-from pydantic import BaseModel, ConfigDict, Field, SerializeAsAny
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, SerializeAsAny
 from pydantic._internal._model_construction import ModelMetaclass
 from badger.errors import (
+    BadgerEnvSettlingError,
     BadgerEnvVarError,
     BadgerNoInterfaceError,
 )
 
 if TYPE_CHECKING:
     from badger.factory import BadgerPluginConfig
+from badger.aio import run_in_thread, run_sync
 from badger.formula import extract_variable_keys, interpret_expression
-from badger.interface import Interface
+from badger.interface import AsyncInterface, Interface
+from badger.settling import (
+    SettlingConfig,
+    SettlingTracker,
+    await_settling,
+    wait_for_settling,
+)
+
+
+# Number of set_variables calls the settle times are kept for
+SETTLE_TIMES_KEPT = 1000
+
+
+def _check_setpoints(env, variable_inputs: Dict[str, float]):
+    _bounds = env.get_bounds(list(variable_inputs.keys()))
+    for name, value in variable_inputs.items():
+        lower = _bounds[name][0]
+        upper = _bounds[name][1]
+
+        if value > upper or value < lower:
+            raise BadgerEnvVarError(
+                f"Input point for {name} is outside " + f"its bounds {_bounds[name]}"
+            )
 
 
 def validate_setpoints(func):
-    def validate(cls, variable_inputs: Dict[str, float]):
-        _bounds = cls.get_bounds(list(variable_inputs.keys()))
-        for name, value in variable_inputs.items():
-            lower = _bounds[name][0]
-            upper = _bounds[name][1]
+    if inspect.iscoroutinefunction(func):
 
-            if value > upper or value < lower:
-                raise BadgerEnvVarError(
-                    f"Input point for {name} is outside "
-                    + f"its bounds {_bounds[name]}"
-                )
+        async def validate_async(cls, variable_inputs: Dict[str, float]):
+            _check_setpoints(cls, variable_inputs)
+
+            return await func(cls, variable_inputs)
+
+        return validate_async
+
+    def validate(cls, variable_inputs: Dict[str, float]):
+        _check_setpoints(cls, variable_inputs)
 
         return func(cls, variable_inputs)
 
     return validate
 
 
+def _split_observable_names(observable_names: List[str]):
+    # get the list of observable names needed by themselves and any formulas
+    formula_observables = []
+    basic_observables = []
+    formulas = []
+    for name in observable_names:
+        if any(ele in name for ele in ["`"]):
+            # If the name contains a formula, extract the variables
+            # and add them to the list of observable names needed
+            formulas.append(name)
+            formula_observables += list(extract_variable_keys(name))
+
+        else:
+            # If the name is a regular observable, just add it
+            basic_observables.append(name)
+
+    return basic_observables, formula_observables, formulas
+
+
+def _evaluate_formulas(
+    observable_outputs, basic_observables, formula_observables, formulas
+):
+    # for each observable name, if it is a formula,
+    # evaluate the formula and add it to the output
+    for name in formulas:
+        observable_outputs[name] = interpret_expression(name, observable_outputs)
+
+    # pop data used in formulas
+    for name in formula_observables:
+        if name in observable_outputs and name not in basic_observables:
+            # remove the variable from the output
+            # as it is not needed anymore
+            observable_outputs.pop(name)
+
+    # add raw data tracking
+    # observable_outputs.update({"raw_data": raw_data})
+
+    return observable_outputs
+
+
 def process_formulas(func):
     """
     Decorator function that wraps get_observables method
     to process formulas if they exist in the observable names.
+    Coroutine methods (aget_observables) are wrapped the same way.
     """
 
-    def process(cls, observable_names: List[str]) -> Dict[str, float]:
-        # get the list of observable names needed by themselves and any formulas
-        formula_observables = []
-        basic_observables = []
-        formulas = []
-        for name in observable_names:
-            if any(ele in name for ele in ["`"]):
-                # If the name contains a formula, extract the variables
-                # and add them to the list of observable names needed
-                formulas.append(name)
-                formula_observables += list(extract_variable_keys(name))
-
-            else:
-                # If the name is a regular observable, just add it
-                basic_observables.append(name)
+    if inspect.iscoroutinefunction(func):
 
-        # pass to the original method
-        all_observables_needed = set(basic_observables + formula_observables)
-        observable_outputs = func(cls, list(all_observables_needed))
+        async def process_async(cls, observable_names: List[str]) -> Dict[str, float]:
+            names = _split_observable_names(observable_names)
+            # pass to the original method
+            all_observables_needed = set(names[0] + names[1])
+            observable_outputs = await func(cls, list(all_observables_needed))
 
-        # for each observable name, if it is a formula,
-        # evaluate the formula and add it to the output
-        for name in formulas:
-            observable_outputs[name] = interpret_expression(name, observable_outputs)
+            return _evaluate_formulas(observable_outputs, *names)
 
-        # pop data used in formulas
-        for name in formula_observables:
-            if name in observable_outputs and name not in basic_observables:
-                # remove the variable from the output
-                # as it is not needed anymore
-                observable_outputs.pop(name)
+        return process_async
 
-        # add raw data tracking
-        # observable_outputs.update({"raw_data": raw_data})
+    def process(cls, observable_names: List[str]) -> Dict[str, float]:
+        names = _split_observable_names(observable_names)
+        # pass to the original method
+        all_observables_needed = set(names[0] + names[1])
+        observable_outputs = func(cls, list(all_observables_needed))
 
-        return observable_outputs
+        return _evaluate_formulas(observable_outputs, *names)
 
     return process
 
@@ -103,19 +154,59 @@ def validate_bounds(func):
     return validate
 
 
+# Sync environment methods and their async counterparts
+ASYNC_COUNTERPARTS = {
+    "get_variables": "aget_variables",
+    "set_variables": "aset_variables",
+    "get_observables": "aget_observables",
+}
+
+
+def _sync_to_async(name: str):
+    async def adapter(self, arg):
+        return await run_in_thread(getattr(self, name), arg)
+
+    adapter.__name__ = ASYNC_COUNTERPARTS[name]
+    adapter._badger_adapter = True
+
+    return adapter
+
+
+def _async_to_sync(name: str):
+    def adapter(self, arg):
+        return run_sync(getattr(self, ASYNC_COUNTERPARTS[name])(arg))
+
+    adapter.__name__ = name
+    adapter._badger_adapter = True
+
+    return adapter
+
+
+def is_adapter(func) -> bool:
+    return getattr(func, "_badger_adapter", False)
+
+
 class EnvMeta(ModelMetaclass):
     def __new__(mcs, name: str, bases: tuple[type, ...], namespace: dict[str, Any]):
         # Wrap get_bounds with validate_bounds if defined
         if "get_bounds" in namespace:
             namespace["get_bounds"] = validate_bounds(namespace["get_bounds"])
         # Wrap get_observables with process_formulas if defined
-        if "get_observables" in namespace:
-            namespace["get_observables"] = process_formulas(
-                namespace["get_observables"]
-            )
+        for method in ["get_observables", "aget_observables"]:
+            if method in namespace:
+                namespace[method] = process_formulas(namespace[method])
         # Wrap set_variables with validate_setpoints if defined
-        if "set_variables" in namespace:
-            namespace["set_variables"] = validate_setpoints(namespace["set_variables"])
+        for method in ["set_variables", "aset_variables"]:
+            if method in namespace:
+                namespace[method] = validate_setpoints(namespace[method])
+        # Pair up the sync and async API, if only one side of a method is
+        # defined the other one is generated as an adapter. Adapters call
+        # the wrapped method, so they are not wrapped themselves
+        for sync_name, async_name in ASYNC_COUNTERPARTS.items():
+            if sync_name in namespace and async_name not in namespace:
+                namespace[async_name] = _sync_to_async(sync_name)
+            elif async_name in namespace and sync_name not in namespace:
+                namespace[sync_name] = _async_to_sync(sync_name)
         return super().__new__(mcs, name, bases, namespace)
 
 
@@ -171,6 +262,9 @@ class BaseEnvironment(BaseModel, metaclass=EnvMeta):
 
         The observables can be returned as a dictionary of float or a list of floats.
         If the observable is a list of floats, it is assumed to be a time series or a vector of values.
+        Array values of plain observables (not objectives or constraints) are kept in the
+        array store of the routine rather than in its data, use formulas to reduce them to
+        scalars for the optimizer.
 
         Parameters
         ----------
@@ -284,13 +378,39 @@ class BaseEnvironment(BaseModel, metaclass=EnvMeta):
         """
         return self.get_observables([observable_name])[observable_name]
 
+    @property
+    def is_async(self) -> bool:
+        """
+        Whether the environment implements the async API (aget_variables,
+        aset_variables and aget_observables) natively, rather than through
+        adapters that run the sync methods in a worker thread.
+
+        Returns
+        -------
+        bool
+            True if the evaluation path should be driven from the event loop.
+        """
+        return not all(
+            is_adapter(getattr(type(self), name))
+            for name in ["aset_variables", "aget_observables"]
+        )
+
 
 class Environment(BaseEnvironment):
     # Interface
     interface: Optional[SerializeAsAny[Interface]] = None
+    # Wait for the readbacks to settle after setting the variables, see
+    # badger.settling. None returns as soon as the values are written
+    settling: ClassVar[Optional[SettlingConfig]] = None
     # Put all other env params here
     # params: float = Field(..., description='Example env parameter')
 
+    # Settle time of each variable for the latest set_variables calls, nan
+    # if the variable timed out
+    _settle_times: deque = PrivateAttr(
+        default_factory=lambda: deque(maxlen=SETTLE_TIMES_KEPT)
+    )
+
     ############################################################
     # Optional methods to inherit
     ############################################################
@@ -305,7 +425,8 @@ class Environment(BaseEnvironment):
         if not self.interface:
             raise BadgerNoInterfaceError
 
-        return self.interface.set_values(variable_inputs)
+        self.interface.set_values(variable_inputs)
+        self.wait_for_settling(variable_inputs)
 
     def get_observables(self, observable_names: List[str]) -> Dict:
         if not self.interface:
@@ -313,6 +434,91 @@ class Environment(BaseEnvironment):
 
         return self.interface.get_values(observable_names)
 
+    async def aget_variables(self, variable_names: List[str]) -> Dict:
+        if not self.interface:
+            raise BadgerNoInterfaceError
+
+        return await self.interface.aget_values(variable_names)
+
+    async def aset_variables(self, variable_inputs: Dict[str, float]):
+        if not self.interface:
+            raise BadgerNoInterfaceError
+
+        await self.interface.aset_values(variable_inputs)
+        await self.await_settling(variable_inputs)
+
+    async def aget_observables(self, observable_names: List[str]) -> Dict:
+        if not self.interface:
+            raise BadgerNoInterfaceError
+
+        return await self.interface.aget_values(observable_names)
+
+    def _read_readbacks(self, channel_names: List[str]) -> Dict:
+        # Readbacks must come from the control system, not the read cache
+        return self.interface.get_values(channel_names, cached=False)
+
+    async def _aread_readbacks(self, channel_names: List[str]) -> Dict:
+        # Async reads are not cached
+        return await self.interface.aget_values(channel_names)
+
+    def _check_settling(self, tracker: SettlingTracker):
+        self._settle_times.append(tracker.settle_times)
+
+        if tracker.timed_out:
+            message = f"Variables {tracker.timed_out} did not settle in time"
+            if self.settling.on_timeout == "raise":
+                raise BadgerEnvSettlingError(message)
+            warning(message)
+
+    def wait_for_settling(self, variable_inputs: Dict[str, float]):
+        """
+        Block until the readbacks of the given variables have settled on
+        their setpoints, according to the settling config of the environment.
+        Does nothing if the environment has no settling config.
+
+        Parameters
+        ----------
+        variable_inputs : Dict[str, float]
+            The values just written to the variables.
+        """
+        if self.settling is None or not variable_inputs:
+            return
+
+        tracker = wait_for_settling(
+            self._read_readbacks, self.settling, variable_inputs
+        )
+        self._check_settling(tracker)
+
+    async def await_settling(self, variable_inputs: Dict[str, float]):
+        """
+        Async version of wait_for_settling.
+        """
+        if self.settling is None or not variable_inputs:
+            return
+
+        tracker = await await_settling(
+            self._aread_readbacks, self.settling, variable_inputs
+        )
+        self._check_settling(tracker)
+
+    def get_settle_times(self) -> List[Dict[str, float]]:
+        """
+        Get the time it took each variable to settle, for the latest calls
+        to set_variables (SETTLE_TIMES_KEPT at most). Timed out variables
+        have a nan settle time.
+
+        Returns
+        -------
+        List[Dict[str, float]]
+            One dict of {variable name: settle time in seconds} per call.
+        """
+        return list(self._settle_times)
+
+    @property
+    def is_async(self) -> bool:
+        # Only worth driving from the event loop if the channel I/O is async
+        return super().is_async and isinstance(self.interface, AsyncInterface)
+
     def reset_environment(self):
         if self.interface:
             return self.interface.reset_interface()
@@ -328,6 +534,20 @@ class Environment(BaseEnvironment):
         return [k for k in self.variables]
 
 
+def enable_variable_cache(intf: Interface, variable_names: List[str]):
+    # Cache the variable channels if enabled in the settings, so the repeated
+    # reads during routine setup and GUI refresh do not hit the control system
+    from badger.settings import init_settings
+
+    try:
+        ttl = float(init_settings().read_value("BADGER_CHANNEL_CACHE_TTL") or 0)
+    except KeyError:
+        ttl = 0
+
+    if ttl > 0:
+        intf.enable_cache(default_ttl=0, ttls={name: ttl for name in variable_names})
+
+
 def instantiate_env(
     env_class: type[Environment], configs: "BadgerPluginConfig", manager=None
 ) -> Environment:
@@ -335,8 +555,9 @@ def instantiate_env(
     # TODO: figure out the correct logic
     # It seems that the interface should be given rather than
     # initialized here
-    from badger.factory import get_intf
+    from badger.pool import get_interface_pool
 
+    pool = get_interface_pool()
     try:
         intf_name = configs["interface"][0]
     except KeyError:
@@ -347,13 +568,21 @@ def instantiate_env(
 
     if intf_name is not None:
         if manager is None:
-            Interface, _ = get_intf(intf_name)
-            intf = Interface()
+            # The cache of a pooled interface is configured once per session
+            variable_names = list(env_class.variables)
+            intf = pool.acquire(
+                intf_name,
+                configs.get("interface_params"),
+                setup=lambda intf: enable_variable_cache(intf, variable_names),
+            )
         else:
             intf = manager.Interface()
     else:
         intf = None
 
     env = env_class(interface=intf, **configs["params"])
+    if manager is None and pool.is_pooled(intf):
+        # Hand the session back to the pool once the env is gone
+        weakref.finalize(env, pool.release, intf)
 
     return env
@@ -1,4 +1,3 @@
-from PyQt5.QtWidgets import QMessageBox
 import traceback
 import sys
 
@@ -16,6 +15,7 @@ class BadgerError(Exception):
         """
         Method to create and display a popup window with the error message.
         """
+        from PyQt5.QtWidgets import QMessageBox
         from badger.gui.windows.expandable_message_box import (
             ExpandableMessageBox,
         )
@@ -72,6 +72,10 @@ class BadgerEnvObsError(Exception):
     pass
 
 
+class BadgerEnvSettlingError(Exception):
+    pass
+
+
 class BadgerNoInterfaceError(Exception):
     def __init__(self, message="Must provide an interface!"):
         super().__init__(message)
@@ -1,6 +1,6 @@
 from typing import Any, TypedDict, cast, TYPE_CHECKING
 from badger.settings import init_settings
-from badger.utils import get_value_or_none
+from badger.utils import LazyAttributes, get_value_or_none
 from badger.errors import (
     BadgerConfigError,
     BadgerInvalidPluginError,
@@ -9,13 +9,16 @@ from badger.errors import (
 )
 
 from badger.interface import Interface as BadgerInterface
+from badger.pool import get_interface_pool
 import sys
 import os
+import copy
+import hashlib
 import importlib
+import json
 import yaml
 import re
 from pathlib import Path
-from xopt.generators import generators, get_generator_defaults
 
 import logging
 
@@ -26,6 +29,8 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 LOAD_LOCAL_ALGO = False
+# Cache of the configs of the plugins, see get_plugin_configs
+MANIFEST_FILENAME = ".manifests.json"
 ALGO_EXCLUDED = [
     "bayesian_exploration",
     "cnsga",
@@ -47,21 +52,24 @@ class BadgerPluginConfig(TypedDict):
     observations: list[str]
 
 
-# Check badger plugin root
-config_singleton = init_settings()
-BADGER_PLUGIN_ROOT = config_singleton.read_value("BADGER_PLUGIN_ROOT")
-if BADGER_PLUGIN_ROOT is None:
-    raise BadgerConfigError("Please set the BADGER_PLUGIN_ROOT env var!")
-elif not os.path.exists(BADGER_PLUGIN_ROOT):
-    raise BadgerConfigError(
-        f"The badger plugin root {BADGER_PLUGIN_ROOT} does not exist!"
-    )
-else:
-    module_file = os.path.join(BADGER_PLUGIN_ROOT, "__init__.py")
-    if not os.path.exists(module_file):
-        with open(module_file, "w") as f:
-            pass
-sys.path.append(BADGER_PLUGIN_ROOT)
+def init_plugin_root() -> str:
+    """
+    Check the badger plugin root of the settings and make its plugins
+    importable.
+    """
+    root = init_settings().read_value("BADGER_PLUGIN_ROOT")
+    if root is None:
+        raise BadgerConfigError("Please set the BADGER_PLUGIN_ROOT env var!")
+    elif not os.path.exists(root):
+        raise BadgerConfigError(f"The badger plugin root {root} does not exist!")
+    else:
+        module_file = os.path.join(root, "__init__.py")
+        if not os.path.exists(module_file):
+            with open(module_file, "w"):
+                pass
+    sys.path.append(root)
+
+    return root
 
 
 def scan_plugins(root: str):
@@ -89,13 +97,171 @@ def scan_plugins(root: str):
             plugins = []
 
         for pname in plugins:
-            # TODO: Also load the configs here
-            # So that list plugins can access the metadata of the plugins
             factory[ptype][pname] = None
 
+    # The metadata of the plugins is read from the manifest cache, the stale
+    # entries are dropped
+    manifests = load_manifests(root)
+    for ptype, entries in manifests.items():
+        for pname in list(entries):
+            if pname not in factory.get(ptype, {}) or entries[pname][
+                "signature"
+            ] != plugin_signature(root, pname, ptype):
+                del entries[pname]
+    PLUGIN_MANIFESTS.clear()
+    PLUGIN_MANIFESTS.update(manifests)
+
     return factory
 
 
+def plugin_signature(root: str, pname: str, ptype: str) -> str:
+    """
+    Signature of the files of a plugin, from their paths, sizes and
+    modification times, which changes whenever the plugin does. The one of
+    an environment also covers the files of its interface, as the cached
+    bounds of the variables come from it.
+    """
+    proot = os.path.join(root, f"{ptype}s", pname)
+    stats = _file_stats(proot)
+    if ptype == "environment":
+        for intf_name in _plugin_interfaces(proot):
+            intf_root = os.path.join(root, "interfaces", intf_name)
+            stats.append([intf_name, _file_stats(intf_root)])
+
+    return hashlib.blake2b(json.dumps(stats).encode(), digest_size=16).hexdigest()
+
+
+def _file_stats(proot: str) -> list:
+    stats = []
+    for dirpath, dirnames, filenames in os.walk(proot):
+        dirnames[:] = sorted(
+            name
+            for name in dirnames
+            if name != "__pycache__" and not name.startswith(".")
+        )
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            stat = os.stat(path)
+            stats.append([os.path.relpath(path, proot), stat.st_size, stat.st_mtime_ns])
+
+    return stats
+
+
+def _plugin_interfaces(proot: str) -> list[str]:
+    # The interfaces listed in the configs of a plugin, w/o loading it
+    try:
+        with open(os.path.join(proot, "configs.yaml"), "r") as f:
+            configs = yaml.safe_load(f)
+    except (OSError, yaml.YAMLError):
+        return []
+
+    interfaces = configs.get("interface") if isinstance(configs, dict) else None
+    if isinstance(interfaces, str):
+        return [interfaces]
+    elif isinstance(interfaces, list):
+        return [name for name in interfaces if isinstance(name, str)]
+
+    return []
+
+
+def load_manifests(root: str) -> dict[str, dict[str, Any]]:
+    """
+    The manifest cache of the plugins: the signature and configs of each
+    plugin, per plugin type.
+    """
+    try:
+        with open(os.path.join(root, MANIFEST_FILENAME), "r") as f:
+            manifests = json.load(f)
+        if not isinstance(manifests, dict):
+            raise ValueError("not a dict")
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring the invalid plugin manifest cache: {e}")
+        return {}
+
+    return manifests
+
+
+def save_manifests(root: str, manifests: dict[str, dict[str, Any]]):
+    filename = os.path.join(root, MANIFEST_FILENAME)
+    tmp_filename = f"{filename}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_filename, "w") as f:
+            json.dump(manifests, f, default=_to_json)
+        os.replace(tmp_filename, filename)
+    except (OSError, TypeError, ValueError) as e:  # a read-only root
+        logger.debug(f"Failed to save the plugin manifest cache: {e}")
+        try:
+            os.remove(tmp_filename)
+        except OSError:
+            pass
+
+
+def _to_json(value):
+    # numpy scalars and arrays, in the bounds of the variables
+    if hasattr(value, "tolist"):
+        return value.tolist()
+
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def get_plugin_configs(root: str, pname: str, ptype: str) -> BadgerPluginConfig:
+    """
+    The configs of a plugin, as get_plug returns them (with the params, and
+    the variables, bounds and observations of the environments), from the
+    manifest cache, so that the plugin is not imported, nor its environment
+    and interface created. The plugin is loaded, and the cache filled, only
+    the first time and whenever the plugin changes.
+    """
+    if pname not in get_factory().get(ptype, {}):
+        raise BadgerPluginNotFoundError(
+            f"Error loading plugin {ptype} {pname}: plugin not found"
+        )
+
+    signature = plugin_signature(root, pname, ptype)
+    entry = PLUGIN_MANIFESTS.get(ptype, {}).get(pname)
+    if entry is None or entry["signature"] != signature:
+        _, configs = get_plug(root, pname, ptype)
+        entry = {"signature": signature, "configs": configs}
+        try:  # only what survives a round trip is cached
+            entry = json.loads(json.dumps(entry, default=_to_json))
+        except (TypeError, ValueError):
+            return configs
+
+        # Merged with the entries other processes may have added meanwhile
+        manifests = load_manifests(root)
+        manifests.setdefault(ptype, {})[pname] = entry
+        save_manifests(root, manifests)
+        PLUGIN_MANIFESTS.setdefault(ptype, {})[pname] = entry
+
+    return copy.deepcopy(entry["configs"])
+
+
+class PluginProxy:
+    """
+    Stand-in for the class of a plugin, that imports the plugin on first
+    use: an attribute read or an instantiation.
+    """
+
+    def __init__(self, root: str, pname: str, ptype: str):
+        self._root = root
+        self._pname = pname
+        self._ptype = ptype
+
+    def _load(self):
+        return get_plug(self._root, self._pname, self._ptype)[0]
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"<{self._ptype} plugin {self._pname}>"
+
+
 def load_plugin(
     root: str, pname: str, ptype: str
 ) -> tuple[Any | None, BadgerPluginConfig | None]:
@@ -152,20 +318,22 @@ def load_plugin(
             if name != "interface"
         }
         # Get vranges by creating an env instance
+        # Pooled interfaces are handed back right away and reused later on
+        pool = get_interface_pool()
         try:
             intf_name = configs["interface"][0]
-            Interface, _ = get_intf(intf_name)
-            if Interface is None:
-                intf = None
-            else:
-                intf = cast(BadgerInterface, Interface())
+            intf = cast(BadgerInterface, pool.acquire(intf_name))
         except KeyError:
             intf = None
         except Exception as e:
             logger.warning(e)
             intf = None
         env = m_env(interface=intf, params=configs)
-        var_bounds = env.get_bounds(vars)
+        try:
+            var_bounds = env.get_bounds(vars)
+        finally:
+            if pool.is_pooled(intf):
+                pool.release(intf)
 
         vars_info: list[dict[str, list[float]]] = []
         for var in vars:
@@ -180,7 +348,7 @@ def load_plugin(
     else:  # TODO: raise an exception here instead?
         return (None, None)
 
-    BADGER_FACTORY[ptype][pname] = plugin
+    get_factory()[ptype][pname] = plugin
 
     return plugin
 
@@ -229,6 +397,8 @@ def load_badger_docs(name: str, ptype: str = None) -> str:
             readme = f"# {name}\nNo documentation found.\n"
 
         if ptype == "generator":
+            from xopt.generators import generators
+
             docstring = generators[name].__doc__
 
         help_md = _format_docs_str(readme, docstring, ptype)
@@ -261,7 +431,7 @@ def load_plugin_docs(pname: str, ptype: str) -> str:
         and the plugin class docstring in a code block.
     """
     # assert plugin type is a directory in BADGER_PLUGIN_ROOT
-    p = Path(BADGER_PLUGIN_ROOT)
+    p = Path(get_plugin_root())
     ptype_dir = p / f"{ptype}s"
     assert ptype_dir.is_dir(), f"Invalid plugin type '{ptype}'. Directory not found"
 
@@ -367,10 +537,10 @@ def _md_images_to_html(
 
 def get_plug(root: str, name: str, ptype: str):
     try:
-        plug = BADGER_FACTORY[ptype][name]
+        plug = get_factory()[ptype][name]
         if plug is None:  # lazy loading
             plug = load_plugin(root, name, ptype)
-            BADGER_FACTORY[ptype][name] = plug
+            get_factory()[ptype][name] = plug
         # Prevent accidentially modifying default configs
         a, config = plug
         _config = config.copy() if config is not None else None
@@ -393,15 +563,34 @@ def get_env_docs(name: str):
     return load_plugin_docs(name, "environment")
 
 
-def get_intf(name: str):
-    return get_plug(BADGER_PLUGIN_ROOT, name, "interface")
+def get_intf(name: str, lazy: bool = False):
+    if lazy:
+        return (
+            PluginProxy(get_plugin_root(), name, "interface"),
+            get_plugin_configs(get_plugin_root(), name, "interface"),
+        )
+
+    return get_plug(get_plugin_root(), name, "interface")
 
 
-def get_env(name: str):
-    return get_plug(BADGER_PLUGIN_ROOT, name, "environment")
+def get_env(name: str, lazy: bool = False):
+    """
+    The class and configs of an environment plugin. If lazy, the configs
+    come from the manifest cache (see get_plugin_configs) and the class is
+    a PluginProxy, so that the plugin is only imported when it is used.
+    """
+    if lazy:
+        return (
+            PluginProxy(get_plugin_root(), name, "environment"),
+            get_plugin_configs(get_plugin_root(), name, "environment"),
+        )
+
+    return get_plug(get_plugin_root(), name, "environment")
 
 
 def list_generators():
+    from xopt.generators import generators
+
     try:
         from xopt.generators import try_load_all_generators
 
@@ -414,16 +603,38 @@ def list_generators():
     return sorted(generator_names)
 
 
-get_generator = get_generator_defaults
+def get_generator(name: str) -> dict[str, Any]:
+    from xopt.generators import get_generator_defaults
+
+    return get_generator_defaults(name)
 
 
 def list_intf():
-    return sorted(BADGER_FACTORY["interface"])
+    return sorted(get_factory()["interface"])
 
 
 def list_env():
-    return sorted(BADGER_FACTORY["environment"])
+    return sorted(get_factory()["environment"])
+
+
+PLUGIN_MANIFESTS: dict[str, dict[str, Any]] = {}
+
+# Read from the settings and the plugin root on first use rather than on
+# import
+_lazy = LazyAttributes(
+    globals(),
+    {
+        "BADGER_PLUGIN_ROOT": init_plugin_root,
+        "BADGER_FACTORY": lambda: scan_plugins(get_plugin_root()),
+        "BADGER_EXTENSIONS": lambda: scan_extensions(get_plugin_root()),
+    },
+)
+__getattr__ = _lazy.load
+
+
+def get_plugin_root() -> str:
+    return _lazy.get("BADGER_PLUGIN_ROOT")
 
 
-BADGER_FACTORY = scan_plugins(BADGER_PLUGIN_ROOT)
-BADGER_EXTENSIONS = scan_extensions(BADGER_PLUGIN_ROOT)
+def get_factory() -> dict[str, Any]:
+    return _lazy.get("BADGER_FACTORY")
@@ -8,6 +8,7 @@ from PyQt5 import QtCore
 from qdarkstyle import load_stylesheet, LightPalette, DarkPalette
 
 from badger.settings import init_settings
+from badger.archive_maintenance import ArchiveMaintainer
 from badger.gui.windows.main_window import BadgerMainWindow
 
 import traceback
@@ -114,6 +115,10 @@ def launch_gui(config_path=None):
     # Show the main window
     window = BadgerMainWindow()
 
+    # Compact, compress and prune the archive in the background
+    maintainer = ArchiveMaintainer.from_settings()
+    maintainer.start()
+
     # Enable Ctrl + C quit
     signal.signal(signal.SIGINT, on_exit)
     # Let the interpreter run each 0.2 s
@@ -1,5 +1,6 @@
 import logging
-from typing import List
+from itertools import islice
+from typing import Iterable, List
 from PyQt5.QtGui import QDrag, QKeyEvent
 from PyQt5.QtCore import (
     QAbstractTableModel,
@@ -21,6 +22,7 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
+from badger.catalog import CATALOG_PATTERN, get_channel_catalog
 from badger.errors import BadgerRoutineError
 
 logger = logging.getLogger(__name__)
@@ -36,11 +38,16 @@ class ArchiveResultsTableModel(QAbstractTableModel):
         The parent item of this table
     """
 
+    # Number of rows loaded at a time, the rest is loaded on scroll
+    batch_size = 500
+
     def __init__(self, parent: QObject = None) -> None:
         super().__init__(parent=parent)
 
         self.results_list = []
         self.column_names = ("Variable",)
+        self._pending = iter(())
+        self._exhausted = True
 
     def rowCount(self, parent: QObject) -> int:
         """Return the row count of the table"""
@@ -85,22 +92,47 @@ class ArchiveResultsTableModel(QAbstractTableModel):
         self.endInsertRows()
         self.layoutChanged.emit()
 
-    def replace_rows(self, pvs: List[str]) -> None:
-        """Overwrites any existing rows in the table with the input list of variable names"""
-        self.beginInsertRows(QModelIndex(), 0, len(pvs) - 1)
-        self.results_list = pvs
-        self.endInsertRows()
-        self.layoutChanged.emit()
+    def replace_rows(self, pvs: Iterable[str]) -> None:
+        """Overwrites any existing rows in the table with the input variable names. Only the first
+        batch of names is consumed right away, the others are loaded as the view scrolls down"""
+        self.beginResetModel()
+        self._pending = iter(pvs)
+        self._exhausted = False
+        self.results_list = self._take(self.batch_size)
+        self.endResetModel()
 
     def clear(self) -> None:
         """Clear out all data stored in this table"""
-        self.beginRemoveRows(QModelIndex(), 0, len(self.results_list))
-        self.results_list = []
-        self.endRemoveRows()
-        self.layoutChanged.emit()
+        self.replace_rows([])
+
+    def _take(self, n: int = None) -> List[str]:
+        """Consume up to n of the pending variable names, all of them if n is None"""
+        names = list(islice(self._pending, n))
+        if n is None or len(names) < n:
+            self._exhausted = True
+
+        return names
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        """Whether some of the results are not loaded yet"""
+        if parent is not None and parent.isValid():
+            return False
+        return not self._exhausted
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        """Load the next batch of results"""
+        names = self._take(self.batch_size)
+        if names:
+            start = len(self.results_list)
+            self.beginInsertRows(QModelIndex(), start, start + len(names) - 1)
+            self.results_list.extend(names)
+            self.endInsertRows()
 
     def sort(self, col: int, order=Qt.AscendingOrder) -> None:
         """Sort the table by variable name"""
+        self.layoutAboutToBeChanged.emit()
+        # Sorting needs all the results
+        self.results_list.extend(self._take())
         self.results_list.sort(reverse=order == Qt.DescendingOrder)
         self.layoutChanged.emit()
 
@@ -111,6 +143,10 @@ class ArchiveSearchWidget(QWidget):
     EPICS archiver appliance. Currently the only type of search supported is for variable names matching an input search
     string, though this can be extended in the future.
 
+    The full list of variable names is fetched once per environment into a local channel catalog (see badger.catalog),
+    which is then searched as the user types. The search button still queries the environment, and merges the results
+    into the catalog.
+
     Parameters
     ----------
     parent : QObject, optional
@@ -129,6 +165,7 @@ class ArchiveSearchWidget(QWidget):
 
         self.search_label = QLabel("Pattern")
         self.search_box = QLineEdit()
+        self.search_box.textChanged.connect(self.search_catalog)
         self.search_button = QPushButton("Search")
         self.search_button.setFixedSize(96, 24)
         self.search_button.setDefault(True)
@@ -166,6 +203,33 @@ class ArchiveSearchWidget(QWidget):
         )
         self.setLayout(self.layout)
 
+        self.catalog = get_channel_catalog(self.env.name)
+        if self.catalog.is_stale():
+            self.refresh_catalog()
+
+    def refresh_catalog(self) -> None:
+        """Fetch the complete list of variable names of the environment into the catalog"""
+        try:
+            self.env.search(CATALOG_PATTERN, self.update_catalog)
+        except NotImplementedError:
+            pass
+
+    def update_catalog(self, reply: list[str]) -> None:
+        """Callback of the catalog fetch, refreshes the results of the current search"""
+        if not reply:
+            logger.warning("Could not fetch the variable catalog")
+            return
+
+        self.catalog.update(reply)
+        self.search_catalog(self.search_box.text())
+
+    def search_catalog(self, search_text: str) -> None:
+        """Search the local catalog for the variables matching the search text, as the user types"""
+        if not search_text or not len(self.catalog):
+            return
+
+        self.results_table_model.replace_rows(self.catalog.iter_search(search_text))
+
     def selectedVariables(self) -> str:
         """Figure out based on which indexes were selected, the list of variables (by string name)
         The user was hoping to insert into the table. Concatenate them into string form i.e.
@@ -234,7 +298,7 @@ class ArchiveSearchWidget(QWidget):
         self.loading_label.hide()
 
         if reply:
-            self.results_table_model.clear()
+            self.catalog.add(reply)
             self.results_table_model.replace_rows(reply)
         else:
             raise BadgerRoutineError("Could not retrieve search results")
@@ -0,0 +1,97 @@
+import logging
+import os
+import sqlite3
+
+from PyQt5.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+from badger.archive_index import ADDED, MODIFIED, REMOVED, RESET, ArchiveIndex
+
+logger = logging.getLogger(__name__)
+
+
+class ArchiveWatcher(QObject):
+    """
+    Report the runs added to, modified in and removed from the archive, by
+    this Badger instance or any other one writing to the same archive.
+
+    Every change to the archive goes through its index, so only the index
+    file is watched (with inotify on Linux), and the changes are read from
+    its change log. On filesystems where change notification does not work
+    (network filesystems, notably) the index is polled instead, which costs
+    a single query per poll whatever the size of the archive.
+
+    Parameters
+    ----------
+    index : ArchiveIndex
+        Index of the archive to watch.
+    interval : int
+        Poll interval, in ms.
+    parent : QObject, optional
+    """
+
+    run_added = pyqtSignal(dict)  # index entry of the run
+    run_modified = pyqtSignal(dict)
+    run_removed = pyqtSignal(dict)  # filename, created and fullpath only
+    reset = pyqtSignal()  # anything may have changed, reload
+
+    def __init__(self, index: ArchiveIndex, interval: int = 5000, parent=None):
+        super().__init__(parent)
+
+        self.index = index
+        self.seq = index.last_change
+
+        # Change notifications come in bursts (the index file is written a
+        # few times per transaction), read the changes once per burst
+        self.debounce = QTimer(self)
+        self.debounce.setSingleShot(True)
+        self.debounce.setInterval(100)
+        self.debounce.timeout.connect(self.poll)
+
+        self.fs_watcher = QFileSystemWatcher(self)
+        self.fs_watcher.fileChanged.connect(self._file_changed)
+        self._watch()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.poll)
+        self.timer.start()
+
+    def _watch(self):
+        if self.index.filename not in self.fs_watcher.files() and os.path.exists(
+            self.index.filename
+        ):
+            self.fs_watcher.addPath(self.index.filename)
+
+    def _file_changed(self, path):
+        # The watch is lost when the file is replaced
+        self._watch()
+        self.debounce.start()
+
+    def poll(self):
+        """
+        Read the changes made since the last poll and emit them.
+        """
+        try:
+            self.seq, changes = self.index.changes(self.seq)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read the archive changes: {e}")
+            return
+        self._watch()
+
+        if any(kind == RESET for kind, _ in changes):
+            self.reset.emit()  # covers the other changes
+            return
+
+        signals = {
+            ADDED: self.run_added,
+            MODIFIED: self.run_modified,
+            REMOVED: self.run_removed,
+        }
+        for kind, run in changes:
+            signals[kind].emit(run)
+
+    def stop(self):
+        self.timer.stop()
+        self.debounce.stop()
+        for path in self.fs_watcher.files():
+            self.fs_watcher.removePath(path)
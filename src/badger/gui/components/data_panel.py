@@ -20,6 +20,7 @@ from badger.gui.components.data_table import (
 from badger.gui.windows.load_data_from_run_dialog import (
     BadgerLoadDataFromRunDialog,
 )
+from badger.analytics import RUN_COLUMN
 from badger.routine import Routine
 from xopt.vocs import VOCS
 
@@ -281,7 +282,7 @@ class BadgerDataPanel(QWidget):
         matches VOCS from the environment + VOCS tab. If they match, update table with data.
 
         Arguments:
-            routine (Xopt Routine) : A routine selected from the load data dialog
+            routine (Routine or ArchivedRun) : A run selected from the load data dialog
 
         """
         # Data from routine to load
@@ -385,7 +386,7 @@ def filter_metadata(data: dict) -> dict:
     """
     data_copy = data.copy()
 
-    metadata_cols = ["xopt_runtime", "xopt_error", "timestamp", "live"]
+    metadata_cols = ["xopt_runtime", "xopt_error", "timestamp", "live", RUN_COLUMN]
     cols_to_drop = [col for col in metadata_cols if col in data_copy]
     for key in cols_to_drop:
         del data_copy[key]
@@ -3,7 +3,8 @@ Navigator GUI windows for browsing history files and template files.
 These windows are displyaed in a tabbed window on the left side of the main Badger GUI.
 
 This file defines the following classes:
-- HistoryNavigator: Displays history files in a 'year -> month -> day' file tree.
+- HistoryNavigator: Displays history files in a 'year -> month -> day' file tree,
+  filled in from the archive index as the branches are expanded.
 - TemplateNavigator: Displays template files in tree view.
 - FileContextMenuBase: Shared class that adds right-click context menu
   for doing file related actions (open file, open file dir, copy full file path to clipboard).
@@ -25,10 +26,30 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtGui import QFont, QDesktopServices, QCursor
 from PyQt5.QtCore import Qt, QUrl, QTimer, QDir
-from badger.archive import get_base_run_filename, get_runs
+from badger.archive import (
+    count_runs,
+    get_archive_index,
+    get_base_run_filename,
+    get_run_filename,
+    get_run_periods,
+    get_runs,
+)
+from badger.gui.components.archive_watcher import ArchiveWatcher
 from badger.utils import run_names_to_dict
 from badger.settings import init_settings
 
+# Item data of the year/month/day items of the history tree
+PERIOD_ROLE = Qt.UserRole  # the period, as "2024", "2024-05" or "2024-05-17"
+POPULATED_ROLE = Qt.UserRole + 1  # whether the children were added
+
+
+def get_run_created(run):
+    """
+    Time stamp the run was created at, from its file name or path
+    (<env>-YYYY-MM-DD-HHMMSS.yaml), such as "2024-05-17-093015".
+    """
+    return "-".join(os.path.splitext(os.path.basename(run))[0].split("-")[-4:])
+
 
 class FileContextMenuBase:
     """
@@ -109,9 +130,12 @@ class HistoryNavigator(QWidget, FileContextMenuBase):
             self.show_context_menu_history
         )
 
+        self.history_tree_widget.itemExpanded.connect(self._populateItem)
+
         layout.addWidget(self.history_tree_widget)
 
-        self.runs = None  # all runs to be shown in the tree widget
+        self.runs = None  # runs shown, if given to updateItems
+        self.watcher = None  # archive watcher, once loadArchive was called
         self.setStyleSheet("""
             QTreeWidget {
                 background-color: #37414F;
@@ -134,7 +158,42 @@ class HistoryNavigator(QWidget, FileContextMenuBase):
                 return result
         return None
 
+    def loadArchive(self, watch=True):
+        """
+        Show the runs in the archive. Only the years are listed up front,
+        the months, days and runs of a period are read from the archive
+        index once it is expanded, so loading costs the same whatever the
+        size of the archive.
+
+        Parameters
+        ----------
+        watch : bool
+            Keep the tree up to date with the runs added to or removed from
+            the archive, by this Badger instance or others.
+        """
+        self.history_tree_widget.clear()
+        self.runs = None
+        for year in get_run_periods():
+            self.history_tree_widget.addTopLevelItem(self._periodItem(year))
+
+        # Expand the latest year, month and day
+        item = self.history_tree_widget.topLevelItem(0)
+        while item is not None and item.data(0, PERIOD_ROLE) is not None:
+            self._populateItem(item)
+            item.setExpanded(True)
+            item = item.child(0)
+
+        if watch and self.watcher is None:
+            self.watcher = ArchiveWatcher(get_archive_index(), parent=self)
+            self.watcher.run_added.connect(lambda run: self.addRun(run["fullpath"]))
+            self.watcher.run_modified.connect(lambda run: self.addRun(run["fullpath"]))
+            self.watcher.run_removed.connect(self._runRemoved)
+            self.watcher.reset.connect(self._reload)
+
     def updateItems(self, runs=None):
+        """
+        Show the given runs (full paths of the run files).
+        """
         self.history_tree_widget.clear()
         self.runs = runs  # store the runs for navigation
         if runs is None:
@@ -145,22 +204,19 @@ class HistoryNavigator(QWidget, FileContextMenuBase):
         flag_first_item = True
 
         for year, dict_year in runs_dict.items():
-            item_year = QTreeWidgetItem([year])
-            item_year.setFlags(item_year.flags() & ~Qt.ItemIsSelectable)
+            item_year = self._periodItem(year, populated=True)
 
             if flag_first_item:
                 first_items.append(item_year)
 
             for month, dict_month in dict_year.items():
-                item_month = QTreeWidgetItem([month])
-                item_month.setFlags(item_month.flags() & ~Qt.ItemIsSelectable)
+                item_month = self._periodItem(month, populated=True)
 
                 if flag_first_item:
                     first_items.append(item_month)
 
                 for day, list_day in dict_month.items():
-                    item_day = QTreeWidgetItem([day])
-                    item_day.setFlags(item_day.flags() & ~Qt.ItemIsSelectable)
+                    item_day = self._periodItem(day, populated=True)
 
                     if flag_first_item:
                         first_items.append(item_day)
@@ -177,33 +233,169 @@ class HistoryNavigator(QWidget, FileContextMenuBase):
         for item in first_items:
             item.setExpanded(True)
 
+    def _periodItem(self, period, populated=False):
+        item = QTreeWidgetItem([period])
+        item.setFlags(item.flags() & ~Qt.ItemIsSelectable)
+        item.setData(0, PERIOD_ROLE, period)
+        item.setData(0, POPULATED_ROLE, populated)
+        if not populated:  # expandable before its children are added
+            item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+
+        return item
+
+    def _populateItem(self, item):
+        """
+        Internal function to add the children of a period item, from the
+        archive index.
+        """
+        if item.data(0, POPULATED_ROLE) is not False:  # done, or a run item
+            return
+
+        period = item.data(0, PERIOD_ROLE)
+        item.setData(0, POPULATED_ROLE, True)
+        item.setChildIndicatorPolicy(QTreeWidgetItem.DontShowIndicatorWhenChildless)
+        if len(period) < 10:  # year or month
+            for child in get_run_periods(period):
+                item.addChild(self._periodItem(child))
+        else:
+            for run in get_runs(since=period, until=period):
+                item.addChild(QTreeWidgetItem([os.path.basename(run)]))
+
+    def _findChild(self, parent, text):
+        for i in range(parent.childCount()):
+            child = parent.child(i)
+            if get_base_run_filename(child.text(0)) == text:
+                return child
+
+        return None
+
+    def _insertChild(self, parent, item):
+        # Latest first, runs by creation time rather than by name
+        key = item.data(0, PERIOD_ROLE) or get_run_created(item.text(0))
+        for i in range(parent.childCount()):
+            child = parent.child(i)
+            if (child.data(0, PERIOD_ROLE) or get_run_created(child.text(0))) < key:
+                parent.insertChild(i, item)
+                return
+
+        parent.addChild(item)
+
+    def _runPath(self, run, populate=False):
+        """
+        Internal function to find the year, month and day items of a run.
+        Stops at the first one that is missing or not populated (unless
+        populate is True, then the items are populated on the way).
+        """
+        created = get_run_created(run)
+        items = []
+        parent = self.history_tree_widget.invisibleRootItem()
+        for period in [created[:4], created[:7], created[:10]]:
+            item = self._findChild(parent, period)
+            if item is None:
+                break
+            if populate:
+                self._populateItem(item)
+            items.append(item)
+            if not item.data(0, POPULATED_ROLE):
+                break
+            parent = item
+
+        return items
+
+    def addRun(self, run):
+        """
+        Show a run (file name or path of the run file), if it is not shown
+        already. Runs of a period not expanded yet are left to the index.
+        """
+        fname = os.path.basename(run)
+        created = get_run_created(fname)
+        items = self._runPath(fname)
+        if items and not items[-1].data(0, POPULATED_ROLE):
+            return
+
+        parent = items[-1] if items else self.history_tree_widget.invisibleRootItem()
+        for period in [created[:4], created[:7], created[:10]][len(items) :]:
+            item = self._periodItem(period, populated=True)
+            self._insertChild(parent, item)
+            parent = item
+
+        if self._findChild(parent, fname) is None:
+            self._insertChild(parent, QTreeWidgetItem([fname]))
+            if self.runs is not None:
+                self.runs.insert(0, get_run_filename(fname))
+
+    def removeRun(self, run):
+        """
+        Remove a run (file name or path of the run file) from the tree,
+        along with the periods left empty.
+        """
+        fname = os.path.basename(run)
+        items = self._runPath(fname)
+        if len(items) < 3 or not items[-1].data(0, POPULATED_ROLE):
+            return
+
+        item = self._findChild(items[-1], fname)
+        if item is None:
+            return
+        items[-1].removeChild(item)
+        if self.runs is not None:
+            self.runs = [r for r in self.runs if os.path.basename(r) != fname]
+
+        root = self.history_tree_widget.invisibleRootItem()
+        for item in reversed(items):
+            if item.childCount():
+                break
+            (item.parent() or root).removeChild(item)
+
+    def _runRemoved(self, run):
+        # Keep the current run on display if it was removed elsewhere
+        self.history_tree_widget.blockSignals(True)
+        self.removeRun(run["fullpath"])
+        self.history_tree_widget.blockSignals(False)
+
+    def _reload(self):
+        run_curr = get_base_run_filename(self.currentText())
+        self.history_tree_widget.blockSignals(True)
+        self.loadArchive()
+        if run_curr:
+            self._selectItemByRun(run_curr)
+        self.history_tree_widget.blockSignals(False)
+
+    def _allRuns(self):
+        runs = self.runs if self.runs is not None else get_runs()
+
+        return [os.path.basename(run) for run in runs]
+
     def selectNextItem(self):
         run_curr = get_base_run_filename(self.currentText())
-        idx = self.runs.index(run_curr)
-        if idx < len(self.runs) - 1:
-            self._selectItemByRun(self.runs[idx + 1])
+        runs = self._allRuns()
+        idx = runs.index(run_curr)
+        if idx < len(runs) - 1:
+            self._selectItemByRun(runs[idx + 1])
 
     def selectPreviousItem(self):
         run_curr = get_base_run_filename(self.currentText())
-        idx = self.runs.index(run_curr)
+        runs = self._allRuns()
+        idx = runs.index(run_curr)
         if idx > 0:
-            self._selectItemByRun(self.runs[idx - 1])
+            self._selectItemByRun(runs[idx - 1])
 
     def _selectItemByRun(self, run):
         """
         Internal function to select a tree widget item by run name.
         """
-        for i in range(self.history_tree_widget.topLevelItemCount()):
-            year_item = self.history_tree_widget.topLevelItem(i)
-            for j in range(year_item.childCount()):
-                month_item = year_item.child(j)
-                for k in range(month_item.childCount()):
-                    day_item = month_item.child(k)
-                    for _l in range(day_item.childCount()):
-                        file_item = day_item.child(_l)
-                        if get_base_run_filename(file_item.text(0)) == run:
-                            self.history_tree_widget.setCurrentItem(file_item)
-                            return
+        if not run:
+            return
+
+        items = self._runPath(run, populate=True)
+        if len(items) < 3:
+            return
+
+        item = self._findChild(items[-1], os.path.basename(run))
+        if item is not None:
+            for period_item in items:
+                period_item.setExpanded(True)
+            self.history_tree_widget.setCurrentItem(item)
 
     def currentText(self):
         current_item = self.history_tree_widget.currentItem()
@@ -211,11 +403,15 @@ class HistoryNavigator(QWidget, FileContextMenuBase):
             return current_item.text(0)
         return ""
 
+    def selectedTexts(self):
+        # Period items are not selectable, only runs are returned
+        return [item.text(0) for item in self.history_tree_widget.selectedItems()]
+
     def count(self):
-        if self.runs is None:
-            return 0
+        if self.runs is not None:
+            return len(self.runs)
 
-        return len(self.runs)
+        return count_runs()
 
     def show_context_menu_history(self, position):
         """
@@ -228,16 +424,11 @@ class HistoryNavigator(QWidget, FileContextMenuBase):
 
         # Filename is displayed in gui tree without full path
         run_filename = selected_item.text(0)
-        # We need to get the full path to run-file, so we can display it in context menu
-        runs = get_runs()
-        fullpath = self.find_run_by_name(runs, run_filename)
-        if not fullpath:
-            return
-        filename = os.path.basename(fullpath)
-        if not filename.endswith(
-            (".yaml", ".yml")
-        ):  # To avoid showing context-menu for directories in the tree
+        # To avoid showing context-menu for directories in the tree
+        if selected_item.data(0, PERIOD_ROLE) is not None:
             return
+        # We need to get the full path to run-file, so we can display it in context menu
+        fullpath = get_run_filename(get_base_run_filename(run_filename))
 
         self.show_context_menu(self.history_tree_widget, fullpath)
 
@@ -333,7 +524,7 @@ if __name__ == "__main__":
 
     app = QApplication(sys.argv)
     his_nav = HistoryNavigator()
-    his_nav.updateItems(get_runs())
+    his_nav.loadArchive()
     his_nav.show()
     templ_nav = TemplateNavigator()
     templ_nav.show()
@@ -1112,7 +1112,7 @@ class BadgerRoutinePage(QWidget):
 
         name: str = self.envs[i]
         try:
-            env, configs = get_env(name)
+            env, configs = get_env(name, lazy=True)
             self.configs = configs
             self.env = env
             self.env_box.edit_var.clear()
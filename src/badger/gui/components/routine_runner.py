@@ -1,10 +1,13 @@
 import logging
+import tempfile
 import time
 import traceback
 
 import pandas as pd
 from PyQt5.QtCore import pyqtSignal, QObject, QTimer
 
+from badger.arrays import restore_array_refs
+from badger.column_store import DATA_STORE_EXT, ColumnStore
 from badger.errors import BadgerRunTerminated
 from badger.tests.utils import get_current_vars
 from badger.routine import calculate_variable_bounds, calculate_initial_points
@@ -12,6 +15,7 @@ from badger.settings import init_settings
 from badger.gui.components.process_manager import ProcessManager
 from badger.routine import Routine
 from badger.errors import BadgerError
+from badger.serialization import unpack
 
 logger = logging.getLogger(__name__)
 
@@ -79,6 +83,19 @@ class BadgerRoutineSubprocess:
         self.testing = testing
         self.config_singleton = init_settings()
 
+        # The run subprocess appends the data to a store, of which only the
+        # rows that fit in the memory budget are kept in self.routine.data
+        self.data_store = None
+        self.n_rows_read = 0  # rows of the store read so far
+        self._full_data = None  # all the rows read back, see full_data
+        self.memory_budget = (
+            float(self.config_singleton.read_value("BADGER_DATA_MEMORY_BUDGET") or 0)
+            * 1e6
+        )
+        self.overview_points = int(
+            self.config_singleton.read_value("BADGER_DATA_OVERVIEW_POINTS") or 0
+        )
+
     def set_termination_condition(self, termination_condition: dict) -> None:
         logger.info(f"Setting termination condition: {termination_condition}")
         """
@@ -149,6 +166,7 @@ class BadgerRoutineSubprocess:
             self.data_and_error_queue = process_with_args["data_queue"]
             self.evaluate_queue = process_with_args["evaluate_queue"]
             self.wait_event = process_with_args["wait_event"]
+            self.open_data_store()
 
             arg_dict = {
                 "routine_id": self.routine.id,
@@ -163,6 +181,7 @@ class BadgerRoutineSubprocess:
                 "testing": self.testing,
                 "run_data": run_data_flag,
                 "init_points": init_points_flag,
+                "data_store": self.data_store.path,
             }
 
             self.data_and_error_queue.put(arg_dict)
@@ -228,9 +247,16 @@ class BadgerRoutineSubprocess:
         """
         if self.evaluate_queue[1].poll():
             while self.evaluate_queue[1].poll():
-                results = self.evaluate_queue[1].recv()
-                self.after_evaluate(results[0])
-                self.routine.generator = results[1]
+                results, generator = unpack(self.evaluate_queue[1].recv_bytes())
+                if isinstance(results, int):  # rows in the data store
+                    results = self.read_live_data()
+                self.after_evaluate(results)
+                # Sent without the data, which is only handed on if it is
+                # all in memory, not the latest rows of a windowed run (see
+                # full_data)
+                if generator.data is None and not self.is_windowed():
+                    generator.data = self.routine.data
+                self.routine.generator = generator
 
         if not self.data_and_error_queue.empty():
             try:
@@ -243,6 +269,95 @@ class BadgerRoutineSubprocess:
             self.close()
             self.evaluate_queue[1].close()
 
+    def open_data_store(self) -> None:
+        """
+        Create the store the run subprocess appends the data to.
+        """
+        self.remove_data_store()
+        # Appended to by the subprocess only, which creates the files
+        path = tempfile.mkdtemp(prefix="badger-", suffix=DATA_STORE_EXT)
+        self.data_store = ColumnStore(path)
+        self.n_rows_read = 0
+        self._full_data = None
+
+    def remove_data_store(self) -> None:
+        if self.data_store is not None:
+            self.data_store.remove()
+            self.data_store = None
+        self._full_data = None
+
+    def read_live_data(self) -> pd.DataFrame:
+        """
+        Read the rows appended to the data store since the last update, and
+        return the data of the run, or its latest rows only if it does not
+        fit in the memory budget.
+        """
+        n_rows = self.data_store.refresh()
+        new_rows = restore_array_refs(self.data_store.read(self.n_rows_read, n_rows))
+        data = self.routine.data
+        if self.n_rows_read and data is not None:
+            data = pd.concat([data, new_rows])
+        else:  # the data of the run so far
+            data = new_rows
+        self.n_rows_read = n_rows
+
+        window = self.data_store.window_rows(self.memory_budget)
+        if len(data) > window:
+            data = data.iloc[-window:]
+
+        return data
+
+    def is_windowed(self) -> bool:
+        """
+        Whether only the latest rows of the run data are in memory.
+        """
+        if self.data_store is None or self.routine.data is None:
+            return False
+
+        return self.n_rows_read > len(self.routine.data)
+
+    def overview(self) -> pd.DataFrame:
+        """
+        Decimated view of the rows of the run data that are not in memory.
+        """
+        stop = self.n_rows_read - len(self.routine.data)
+
+        return restore_array_refs(self.data_store.overview(self.overview_points, stop))
+
+    def full_data(self) -> pd.DataFrame:
+        """
+        All the run data so far, read back from the data store if only the
+        latest rows are in memory, such as for the analysis extensions that
+        fit models on the whole run. The rows read are kept, and only the new
+        ones are read on the next calls.
+        """
+        if not self.is_windowed():
+            return self.routine.data
+
+        n_read = 0 if self._full_data is None else len(self._full_data)
+        if n_read < self.n_rows_read:
+            new_rows = restore_array_refs(
+                self.data_store.read(n_read, self.n_rows_read)
+            )
+            self._full_data = (
+                new_rows if not n_read else pd.concat([self._full_data, new_rows])
+            )
+
+        return self._full_data
+
+    def load_full_data(self) -> None:
+        """
+        Read all the run data back from the data store, such as to archive it.
+        """
+        if self.data_store is None:
+            return
+
+        n_rows = self.data_store.refresh()
+        data = self.routine.data
+        if n_rows > (0 if data is None else len(data)):
+            self.routine.data = restore_array_refs(self.data_store.read(0, n_rows))
+            self.n_rows_read = n_rows
+
     def after_evaluate(self, results: pd.DataFrame) -> None:
         logger.debug("Received evaluation results from subprocess.")
         """
@@ -298,4 +413,5 @@ class BadgerRoutineSubprocess:
     def close(self) -> None:
         logger.info("Closing routine subprocess and stopping timer.")
         self.timer.stop()
-        self.signals.finished.emit()
+        self.signals.finished.emit()  # the run is archived from the store
+        self.remove_data_store()
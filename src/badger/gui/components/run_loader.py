@@ -0,0 +1,63 @@
+import threading
+from typing import List, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from badger.analytics import load_runs_data
+
+
+class RunDataLoader(QObject):
+    """
+    Load the data of several archived runs with load_runs_data, meant to be
+    moved to a QThread so that the GUI stays responsive.
+
+    Parameters
+    ----------
+    runs : list of str
+        File names of the runs.
+    columns : list of str, optional
+        Only load these columns, if the runs have them.
+    workers : int, optional
+        Number of worker processes.
+
+    Note:
+        cancel is called from the GUI thread while the loader is busy, so it
+        has to be connected with Qt.DirectConnection.
+    """
+
+    progress = pyqtSignal(int, int)  # runs loaded, total
+    loaded = pyqtSignal(object)  # the DataFrame, None if cancelled
+    failed = pyqtSignal(str)
+    finished = pyqtSignal()
+
+    def __init__(
+        self,
+        runs: List[str],
+        columns: Optional[List[str]] = None,
+        workers: Optional[int] = None,
+    ):
+        super().__init__()
+
+        self.runs = runs
+        self.columns = columns
+        self.workers = workers
+        self.stop_event = threading.Event()
+
+    def load(self) -> None:
+        try:
+            data = load_runs_data(
+                self.runs,
+                columns=self.columns,
+                workers=self.workers,
+                on_progress=self.progress.emit,
+                stop_event=self.stop_event,
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.loaded.emit(data)
+        finally:
+            self.finished.emit()
+
+    def cancel(self) -> None:
+        self.stop_event.set()
@@ -25,11 +25,12 @@ from PyQt5.QtWidgets import (
 )
 from xopt.vocs import VOCS, normalize_inputs, select_best
 
-from badger.archive import archive_run, BADGER_ARCHIVE_ROOT
+from badger.archive import archive_run, attach_arrays, get_archive_root
 from badger.gui.components.pydantic_editor import BadgerPydanticEditor
 
 # from ...utils import AURORA_PALETTE, FROST_PALETTE
-from badger.logbook import BADGER_LOGBOOK_ROOT, send_to_logbook
+from badger.logbook import get_logbook_root, send_to_logbook
+from badger.recorder import RECORDING_EXT
 from badger.routine import Routine
 from badger.tests.utils import get_current_vars
 from badger.gui.windows.message_dialog import BadgerScrollableMessageBox
@@ -88,6 +89,7 @@ class BadgerOptMonitor(QWidget):
         self.running = False
         # Fix the auto range issue
         self.eval_count = 0
+        self.windowed = False  # only the latest rows of the run in memory
         # Termination condition for the run
         self.termination_condition = None
 
@@ -380,6 +382,7 @@ class BadgerOptMonitor(QWidget):
         self.sig_toggle_run.emit(False)
 
         self.eval_count = 0  # reset the evaluation count
+        self.windowed = False
         self.enable_auto_range()
 
         # Reset button should only be available if it's the current run
@@ -432,6 +435,8 @@ class BadgerOptMonitor(QWidget):
 
     def init_routine_runner(self):
         self.reset_routine_runner()
+        # Map the array observables the run subprocess writes
+        attach_arrays(self.routine)
 
         self.routine_runner = routine_runner = BadgerRoutineSubprocess(
             self.process_manager,
@@ -498,11 +503,44 @@ class BadgerOptMonitor(QWidget):
         self.active_extensions.remove(child_window)
         self.extensions_palette.update_palette()
 
-    def extract_timestamp(self, data=None):
+    def plot_data(self) -> pd.DataFrame:
+        """The evaluations shown in the plots, indexed by run index
+
+        When the run data is windowed, the rows out of the window are
+        prepended decimated, so the index is not contiguous.
+        """
+        data = self.routine.sorted_data
+        if self.routine_runner and self.routine_runner.is_windowed():
+            data = pd.concat([self.routine_runner.overview(), data])
+
+        return data
+
+    def extract_timestamp(self, data=None) -> pd.Series:
+        """Time of the evaluations relative to the first one, by run index"""
         if data is None:
-            data = self.routine.sorted_data
+            data = self.plot_data()
+
+        ts = data["timestamp"]
+        return ts - ts.iloc[0]
+
+    def timestamp_at(self, idx) -> float:
+        """Relative time of run index idx, or of the closest plotted one"""
+        ts = self.extract_timestamp()
+        pos = ts.index.get_indexer([idx], method="nearest")[0]
+
+        return ts.iloc[pos]
 
-        return data["timestamp"].to_numpy(copy=True)
+    def get_row(self, idx) -> pd.Series:
+        """The evaluation at run index idx
+
+        Rows out of the window in memory are read back from the data store.
+        """
+        data = self.routine.sorted_data
+        windowed = self.routine_runner and self.routine_runner.is_windowed()
+        if idx not in data.index and windowed:
+            data = self.routine_runner.full_data()
+
+        return data.loc[idx]
 
     def update(self, results: pd.DataFrame) -> None:
         """Update plots in main window as well as any active extensions and the
@@ -540,12 +578,21 @@ class BadgerOptMonitor(QWidget):
         if not self.routine or not hasattr(self.routine, "sorted_data"):
             # if no routine or sorted_data is available, return
             return
-        data_copy = self.routine.sorted_data
+        data_copy = self.plot_data()
+        if self.routine_runner and self.routine_runner.is_windowed():
+            # The rows that do not fit in memory are shown decimated
+            if not self.windowed:
+                self.windowed = True
+                n_rows = len(self.routine.data)
+                self.sig_status.emit(
+                    f"Run data over the memory budget: the latest {n_rows} "
+                    "evaluations are kept in memory, the older ones are "
+                    "plotted decimated"
+                )
 
         # Get timestamps
         if use_time_axis:
             ts = self.extract_timestamp(data_copy)
-            ts -= ts[0]
         else:
             ts = None
 
@@ -563,10 +610,10 @@ class BadgerOptMonitor(QWidget):
                 input_data[variable_names] - input_data[variable_names].iloc[0]
             )
 
-        if "live" in data_copy.columns:
-            input_data["live"] = data_copy["live"]
-        else:
-            input_data["live"] = data_copy["live"] = True
+        # sorted_data is a view on the routine cache, do not write into it
+        if "live" not in data_copy.columns:
+            data_copy = data_copy.assign(live=True)
+        input_data["live"] = data_copy["live"]
 
         set_data(variable_names, self.curves_variable, input_data, ts)
         set_data(self.vocs.objective_names, self.curves_objective, data_copy, ts)
@@ -629,6 +676,15 @@ class BadgerOptMonitor(QWidget):
             self.sig_stop_run.emit()
 
     def update_analysis_extensions(self) -> None:
+        if (
+            self.active_extensions
+            and self.routine_runner
+            and self.routine_runner.is_windowed()
+        ):
+            # The generator of a windowed run comes without data, the
+            # extensions fit their models on all of it
+            self.routine.generator.data = self.routine_runner.full_data()
+
         for ele in self.active_extensions:
             try:
                 ele.update_window(self.routine)
@@ -650,11 +706,12 @@ class BadgerOptMonitor(QWidget):
             # TODO: fill in the states
             # TODO: replace self.testing with with another processes for having a testing mode
             if not self.testing:
+                self.routine_runner.load_full_data()
                 run = archive_run(self.routine, states=self._states)
                 self.routine_runner.run_filename = run["filename"]
                 env = self.routine.environment
                 path = run["path"]
-                filename = run["filename"][:-4] + "pickle"
+                filename = os.path.splitext(run["filename"])[0] + RECORDING_EXT
 
             try:
                 env.interface.stop_recording(os.path.join(path, filename))
@@ -663,7 +720,7 @@ class BadgerOptMonitor(QWidget):
 
             self.sig_run_name.emit(run["filename"])
             self.sig_status.emit(
-                f"Archive success: Run data archived to {BADGER_ARCHIVE_ROOT}"
+                f"Archive success: Run data archived to {get_archive_root()}"
             )
             # if not self.testing:
             #     QMessageBox.information(
@@ -717,7 +774,7 @@ class BadgerOptMonitor(QWidget):
 
             return
 
-        self.sig_status.emit(f"Log success: Log saved to {BADGER_LOGBOOK_ROOT}")
+        self.sig_status.emit(f"Log success: Log saved to {get_logbook_root()}")
         # QMessageBox.information(
         #     self, 'Success!', f'')
 
@@ -759,7 +816,7 @@ class BadgerOptMonitor(QWidget):
         else:
             try:
                 ts = self.extract_timestamp()
-                value = idx = np.clip(np.round(pos), 0, len(ts) - 1)
+                value = idx = np.clip(np.round(pos), ts.index[0], ts.index[-1])
             except:  # no data
                 value = idx = np.round(pos)
         self.inspector_objective.setValue(value)
@@ -774,10 +831,9 @@ class BadgerOptMonitor(QWidget):
     def closest_ts(self, t):
         # Get the closest timestamp in data regarding t
         ts = self.extract_timestamp()
-        ts -= ts[0]
-        idx = np.argmin(np.abs(ts - t))
+        pos = np.argmin(np.abs(ts.to_numpy() - t))
 
-        return ts[idx], idx
+        return ts.iloc[pos], ts.index[pos]
 
     def reset_env(self):
         reply = QMessageBox.question(
@@ -905,9 +961,10 @@ class BadgerOptMonitor(QWidget):
 
     def jump_to_optimal(self):
         try:
-            best_idx, _, _ = select_best(
-                self.routine.vocs, self.routine.sorted_data, n=1
-            )
+            data = self.routine.sorted_data
+            if self.routine_runner and self.routine_runner.is_windowed():
+                data = self.routine_runner.full_data()
+            best_idx, _, _ = select_best(self.routine.vocs, data, n=1)
             # print(best_idx, _)
             best_idx = int(best_idx[0])
 
@@ -922,8 +979,7 @@ class BadgerOptMonitor(QWidget):
 
     def jump_to_solution(self, idx):
         if self.plot_x_axis:  # x-axis is time
-            ts = self.extract_timestamp()
-            value = ts[idx] - ts[0]
+            value = self.timestamp_at(idx)
         else:
             value = idx
 
@@ -935,13 +991,12 @@ class BadgerOptMonitor(QWidget):
         self.inspector_variable.setValue(value)
 
     def set_vars(self):
-        df = self.routine.sorted_data
         if self.plot_x_axis:  # x-axis is time
             pos, idx = self.closest_ts(self.inspector_objective.value())
         else:
             pos = idx = int(self.inspector_objective.value())
         variable_names = self.vocs.variable_names
-        solution = df[variable_names].to_numpy()[idx]
+        solution = self.get_row(int(idx))[variable_names].to_numpy(dtype=float)
         curr_vars = get_current_vars(self.routine)
 
         reply = QMessageBox.question(
@@ -1001,8 +1056,7 @@ class BadgerOptMonitor(QWidget):
 
         # Update inspector line position
         if i:
-            ts = self.extract_timestamp()
-            value = ts[int(self.inspector_objective.value())] - ts[0]
+            value = self.timestamp_at(int(self.inspector_objective.value()))
         else:
             _, value = self.closest_ts(self.inspector_objective.value())
         self.inspector_objective.setValue(value)
@@ -1103,8 +1157,8 @@ def set_data(names: List[str], curves: dict, data: pd.DataFrame, ts=None):
 
     # Determine x-axis data
     if ts is not None:
-        live_x = [ts[i] for i in live_data.index.tolist()]
-        hist_x = [ts[i] for i in not_live_data.index.tolist()]
+        live_x = ts.loc[live_data.index].to_numpy(dtype=np.double)
+        hist_x = ts.loc[not_live_data.index].to_numpy(dtype=np.double)
     else:
         live_x = live_data.index.to_numpy(dtype=int)
         hist_x = not_live_data.index.to_numpy(dtype=int)
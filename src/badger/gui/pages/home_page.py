@@ -21,7 +21,6 @@ from badger.archive import (
     delete_run,
     get_base_run_filename,
     load_run,
-    get_runs,
     save_tmp_run,
 )
 from badger.gui.components.data_table import (
@@ -284,8 +283,7 @@ class BadgerHomePage(QWidget):
 
     def load_all_runs(self):
         logger.info("Loading all runs into history browser.")
-        runs = get_runs()
-        self.history_browser.updateItems(runs)
+        self.history_browser.loadArchive()
 
     def init_home_page(self):
         logger.info("Initializing home page.")
@@ -584,8 +582,10 @@ class BadgerHomePage(QWidget):
 
     def run_name(self, name):
         logger.info(f"Updating run name: {name}")
-        runs = get_runs()
-        self.history_browser.updateItems(runs)
+        if not name:  # failed to archive
+            return
+
+        self.history_browser.addRun(name)
         self.history_browser._selectItemByRun(name)
 
     def update_status(self, info):
@@ -616,9 +616,8 @@ class BadgerHomePage(QWidget):
             return
 
         delete_run(run_name)
-        runs = get_runs()
         self.history_browser.history_tree_widget.blockSignals(True)
-        self.history_browser.updateItems(runs)
+        self.history_browser.removeRun(run_name)
         self.history_browser.history_tree_widget.blockSignals(False)
         self.go_run(-1)
 
@@ -1,4 +1,5 @@
 from PyQt5.QtWidgets import (
+    QAbstractItemView,
     QDialog,
     QWidget,
     QHBoxLayout,
@@ -7,22 +8,24 @@ from PyQt5.QtWidgets import (
     QLabel,
     QFileDialog,
     QMessageBox,
+    QProgressDialog,
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThread
 import pyqtgraph as pg
 from pyqtgraph.Qt import QtGui, QtCore
 from typing import List, Callable
 import numpy as np
 import pandas as pd
 from badger.archive import (
+    ArchivedRun,
     get_base_run_filename,
-    get_runs,
     load_run,
 )
+from badger.analytics import RUN_COLUMN
 from badger.gui.components.navigators import HistoryNavigator
+from badger.gui.components.run_loader import RunDataLoader
 from badger.settings import init_settings
 from badger.errors import BadgerRoutineError
-from badger.routine import Routine
 from xopt.vocs import VOCS
 
 stylesheet_run = """
@@ -52,7 +55,7 @@ class BadgerLoadDataFromRunDialog(QDialog):
         self,
         parent: QWidget,
         env_vocs: VOCS = None,
-        on_set: Callable[[Routine], None] = None,
+        on_set: Callable[[ArchivedRun], None] = None,
     ):
         """
         Initialize the dialog.
@@ -63,7 +66,7 @@ class BadgerLoadDataFromRunDialog(QDialog):
 
         Attributes:
             data_table (QTableWidget): The data table to update with loaded run data.
-            selected_routine (Optional[Routine]): The currently selected routine.
+            selected_routine (Optional[ArchivedRun]): The currently selected run.
         """
         super().__init__(parent)
         self.setWindowFlags(self.windowFlags() | Qt.WindowMaximizeButtonHint)
@@ -71,6 +74,7 @@ class BadgerLoadDataFromRunDialog(QDialog):
         self.selected_routine = None
         self.env_vocs = env_vocs
         self.on_set = on_set  # function from parent to call when loading data
+        self.loader = None  # loader of the selected runs, while loading
 
         self.init_ui()
         self.config_logic()
@@ -109,8 +113,11 @@ class BadgerLoadDataFromRunDialog(QDialog):
         # History run browser
         self.history_browser = HistoryNavigator()
         self.history_browser.setFixedWidth(360)
-        runs = get_runs()
-        self.history_browser.updateItems(runs)
+        self.history_browser.loadArchive(watch=False)
+        # Several runs can be selected to load their data at once
+        self.history_browser.history_tree_widget.setSelectionMode(
+            QAbstractItemView.ExtendedSelection
+        )
         self.history_browser.history_tree_widget.itemSelectionChanged.connect(
             self.preview_run
         )
@@ -140,7 +147,7 @@ class BadgerLoadDataFromRunDialog(QDialog):
         vbox.addWidget(content_widget)
         vbox.addWidget(button_set)
 
-    def preview_run(self, routine: Routine = None) -> None:
+    def preview_run(self, routine: ArchivedRun = None) -> None:
         """
         Add data to plot to preview the selected run.
         """
@@ -167,7 +174,7 @@ class BadgerLoadDataFromRunDialog(QDialog):
                 routine.vocs.constraint_names,
             )
             self._set_plot_data(
-                routine.vocs.constraint_names, curves_constraint, routine.generator.data
+                routine.vocs.constraint_names, curves_constraint, routine.data
             )
             self.plot_cons.show()
         else:
@@ -178,12 +185,8 @@ class BadgerLoadDataFromRunDialog(QDialog):
             routine.vocs.variable_names,
         )
 
-        self._set_plot_data(
-            routine.vocs.output_names, curves_objective, routine.generator.data
-        )
-        self._set_plot_data(
-            routine.vocs.variable_names, curves_variable, routine.generator.data
-        )
+        self._set_plot_data(routine.vocs.output_names, curves_objective, routine.data)
+        self._set_plot_data(routine.vocs.variable_names, curves_variable, routine.data)
 
     def config_logic(self) -> None:
         self.btn_cancel.clicked.connect(self.cancel_changes)
@@ -194,6 +197,13 @@ class BadgerLoadDataFromRunDialog(QDialog):
         """
         Update the data table with variable and objective data from the selected routine
         """
+        run_names = [
+            get_base_run_filename(text) for text in self.history_browser.selectedTexts()
+        ]
+        if len(run_names) > 1:
+            self.load_runs(run_names)
+            return
+
         # Data from routine to load
         data_keys = list(
             self.selected_routine.vocs.variable_names
@@ -207,6 +217,68 @@ class BadgerLoadDataFromRunDialog(QDialog):
         else:
             self.show_vocs_mismatch_dialog(data_keys, self.env_vocs)
 
+    def load_runs(self, run_names: List[str]) -> None:
+        """
+        Load the data of several runs in the background, in worker
+        processes, then update the data table with all of it.
+        """
+        self.progress_dialog = QProgressDialog(
+            "Loading runs...", "Cancel", 0, len(run_names), self
+        )
+        self.progress_dialog.setWindowModality(Qt.WindowModal)
+        self.progress_dialog.setMinimumDuration(0)
+
+        self.loader_thread = QThread()
+        self.loader = RunDataLoader(run_names)
+        self.loader.moveToThread(self.loader_thread)
+
+        self.loader_thread.started.connect(self.loader.load)
+        self.loader.progress.connect(self.update_loading_progress)
+        self.loader.loaded.connect(self.on_runs_loaded)
+        self.loader.failed.connect(self.on_runs_failed)
+        self.loader.finished.connect(self.loader_thread.quit)
+        self.loader.finished.connect(self.loader.deleteLater)
+        self.loader_thread.finished.connect(self.loader_thread.deleteLater)
+        # The loader thread is busy, cancel from the GUI thread
+        self.progress_dialog.canceled.connect(self.loader.cancel, Qt.DirectConnection)
+
+        self.loader_thread.start()
+
+    def update_loading_progress(self, n_done: int, n_total: int) -> None:
+        self.progress_dialog.setValue(n_done)
+
+    def on_runs_failed(self, message: str) -> None:
+        self.loader = None
+        self.progress_dialog.reset()
+        QMessageBox.critical(self, "Error!", f"Failed to load the runs: {message}")
+
+    def on_runs_loaded(self, data: pd.DataFrame) -> None:
+        self.loader = None
+        self.progress_dialog.reset()
+        if data is None or data.empty:  # cancelled, or nothing to load
+            return
+
+        # Every run must have data for the selected VOCS
+        counts = data.reindex(columns=self.env_vocs).groupby(data[RUN_COLUMN]).count()
+        mismatched = counts.index[(counts == 0).any(axis=1)].tolist()
+        if mismatched:
+            QMessageBox.warning(
+                self,
+                "Warning",
+                "Variables and objectives in data must match currently selected VOCS\n\n"
+                + "Runs that do not match:\n "
+                + "\n ".join(mismatched),
+            )
+            return
+
+        # The VOCS are taken from the first run
+        routine = self.load_data(data[RUN_COLUMN].iloc[0])
+        if routine is None:
+            return
+        routine.data = data
+        self.on_set(routine)
+        self.close()
+
     def load_from_file(self) -> None:
         options = QFileDialog.Options()
         options |= QFileDialog.ReadOnly
@@ -222,7 +294,7 @@ class BadgerLoadDataFromRunDialog(QDialog):
             return
 
         try:
-            routine = load_run(file_path)
+            routine = load_run(file_path, lazy=True)
             self.preview_run(routine)
         except Exception as e:
             raise BadgerRoutineError(f"{e}")
@@ -231,13 +303,16 @@ class BadgerLoadDataFromRunDialog(QDialog):
         """
         Load data from the selected run.
 
+        Only the config and data of the run are read, the routine itself is
+        not built.
+
         Returns:
-            Optional[Routine]: The loaded routine or None if loading fails.
+            Optional[ArchivedRun]: The loaded run or None if loading fails.
         """
         if not run_filename:
             return
         try:
-            routine = load_run(run_filename)
+            routine = load_run(run_filename, lazy=True)
             return routine
         except IndexError:
             return
@@ -395,4 +470,6 @@ class BadgerLoadDataFromRunDialog(QDialog):
         self.close()
 
     def closeEvent(self, event):
+        if self.loader is not None:
+            self.loader.cancel()
         event.accept()
@@ -1,37 +1,32 @@
-import pickle
+import asyncio
+import inspect
 from abc import ABC, abstractmethod
-from typing import Any, ClassVar, Dict, List, TypedDict
+from typing import Any, ClassVar, Dict, List, Optional, TypedDict
 
 from pydantic import BaseModel
 
+from badger.aio import run_in_thread, run_sync
+from badger.cache import ChannelCache
+from badger.recorder import InterfaceRecorder
 from badger.utils import curr_ts
 
 
 def log(func):
+    if inspect.iscoroutinefunction(func):
+        return _log_async(func)
+
     def func_log(*args, **kwargs):
         if func.__name__ == "set_values":
             if "channel_inputs" in kwargs.keys():
                 channel_inputs = kwargs["channel_inputs"]
             else:
                 channel_inputs = args[1]
-            args[0]._logs.append(
-                {
-                    "timestamp": curr_ts().timestamp(),
-                    "action": "set_values",
-                    "channel_inputs": channel_inputs,
-                }
-            )
+            args[0].record("set_values", channel_inputs)
 
             return func(*args, **kwargs)
         elif func.__name__ == "get_values":
             channel_outputs = func(*args, **kwargs)
-            args[0]._logs.append(
-                {
-                    "timestamp": curr_ts().timestamp(),
-                    "action": "get_values",
-                    "channel_outputs": channel_outputs,
-                }
-            )
+            args[0].record("get_values", channel_outputs)
 
             return channel_outputs
         else:
@@ -40,6 +35,96 @@ def log(func):
     return func_log
 
 
+def _log_async(func):
+    async def func_log(*args, **kwargs):
+        if func.__name__ == "aset_values":
+            if "channel_inputs" in kwargs.keys():
+                channel_inputs = kwargs["channel_inputs"]
+            else:
+                channel_inputs = args[1]
+            args[0].record("set_values", channel_inputs)
+
+            return await func(*args, **kwargs)
+        elif func.__name__ == "aget_values":
+            channel_outputs = await func(*args, **kwargs)
+            args[0].record("get_values", channel_outputs)
+
+            return channel_outputs
+        else:
+            return await func(*args, **kwargs)
+
+    return func_log
+
+
+def cached_read(func):
+    """
+    Serve channel reads from the interface cache if it is enabled, only the
+    channels that are missing or expired are read through func. Reads with
+    cached=False go to the control system, and refresh the cache.
+    """
+
+    def get_values(self, channel_names, cached: bool = True, **kwargs):
+        cache = self._cache
+        if cache is None:
+            return func(self, channel_names, **kwargs)
+        if not cached:
+            outputs = func(self, channel_names, **kwargs)
+            cache.store(outputs)
+            return outputs
+
+        channel_outputs, missing = cache.lookup(channel_names)
+        if missing:
+            outputs = func(self, missing, **kwargs)
+            cache.store(outputs)
+            channel_outputs.update(outputs)
+
+        return {
+            channel: channel_outputs[channel]
+            for channel in channel_names
+            if channel in channel_outputs
+        }
+
+    get_values.__name__ = func.__name__
+
+    return get_values
+
+
+def invalidating_write(func):
+    """
+    Invalidate the cached values of the written channels.
+    """
+
+    def _invalidate(self, args, kwargs):
+        if self._cache is None:
+            return
+
+        if "channel_inputs" in kwargs.keys():
+            channel_inputs = kwargs["channel_inputs"]
+        else:
+            channel_inputs = args[0]
+        self._cache.invalidate(list(channel_inputs))
+
+    if inspect.iscoroutinefunction(func):
+
+        async def aset_values(self, *args, **kwargs):
+            try:
+                return await func(self, *args, **kwargs)
+            finally:
+                _invalidate(self, args, kwargs)
+
+        return aset_values
+
+    def set_values(self, *args, **kwargs):
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            _invalidate(self, args, kwargs)
+
+    set_values.__name__ = func.__name__
+
+    return set_values
+
+
 class InterfaceInfo(TypedDict):
     interface: Dict[str, str]
     vars: List[Dict[str, str]]
@@ -47,34 +132,129 @@ class InterfaceInfo(TypedDict):
 
 class Interface(BaseModel, ABC):
     name: ClassVar[str]
+    # Share one instance per set of params across environments and runs in
+    # a process, see badger.pool. Worth it if connecting is costly
+    pooled: ClassVar[bool] = False
     # Put interface params here
     # params: float = Field(..., description='Example intf parameter')
 
     # Private variables
     _logs: List[Dict] = []  # TODO: Add a property for it?
+    _cache: Optional[ChannelCache] = None
+    _recorder: Optional[InterfaceRecorder] = None
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs):
+        super().__pydantic_init_subclass__(**kwargs)
+
+        # Route the channel I/O of the concrete interfaces through the cache
+        if "get_values" in cls.__dict__:
+            cls.get_values = cached_read(cls.__dict__["get_values"])
+        for method in ["set_values", "aset_values"]:
+            if method in cls.__dict__:
+                setattr(cls, method, invalidating_write(cls.__dict__[method]))
 
-    def start_recording(self):
+    def enable_cache(self, default_ttl: float = 1.0, ttls: Optional[Dict] = None):
+        """
+        Enable the read-through cache for channel reads.
+
+        Cached values are served by get_values until their time-to-live runs
+        out, and are invalidated whenever the channel is written through
+        set_values. Reads through aget_values always hit the control system.
+
+        Parameters
+        ----------
+        default_ttl : float
+            Time-to-live in seconds of the channels without a specific ttl,
+            set it to 0 to only cache the channels listed in ttls.
+        ttls : dict of {str: float}, optional
+            Per-channel time-to-live in seconds, merged into the existing
+            ones if the cache is already enabled.
+        """
+        if self._cache is None:
+            self._cache = ChannelCache(default_ttl, ttls)
+        else:  # shared (pooled) interface, keep the cached values
+            self._cache.default_ttl = default_ttl
+            self._cache.ttls.update(ttls or {})
+
+    def disable_cache(self):
+        self._cache = None
+
+    def invalidate_cache(self, channel_names: Optional[List[str]] = None):
+        if self._cache is not None:
+            self._cache.invalidate(channel_names)
+
+    def get_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the hit/miss statistics of the read cache, or None if the
+        cache is not enabled.
+        """
+        if self._cache is None:
+            return None
+
+        return self._cache.get_stats()
+
+    def record(self, action: str, channel_values: Dict[str, Any]):
+        timestamp = curr_ts().timestamp()
+
+        # Stream to the recording file if one is attached, otherwise keep the
+        # records in memory until the recording is dumped
+        if self._recorder is not None:
+            self._recorder.record(action, channel_values, timestamp)
+            return
+
+        key = "channel_inputs" if action == "set_values" else "channel_outputs"
+        self._logs.append(
+            {
+                "timestamp": timestamp,
+                "action": action,
+                key: channel_values,
+            }
+        )
+
+    def _attach_recorder(self, filename) -> InterfaceRecorder:
+        if self._recorder is not None and self._recorder.filename == filename:
+            return self._recorder
+
+        if self._recorder is not None:
+            self._recorder.close()
+        recorder = InterfaceRecorder(filename)
+
+        # Move the records kept in memory so far into the file
+        for entry in self._logs:
+            try:
+                channel_values = entry["channel_inputs"]
+            except KeyError:
+                channel_values = entry["channel_outputs"]
+            recorder.record(entry["action"], channel_values, entry["timestamp"])
+        self._logs = []
+        self._recorder = recorder
+
+        return recorder
+
+    def start_recording(self, filename=None):
         self._logs = []
 
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
+
+        if filename is not None:
+            self._attach_recorder(filename)
+
     def stop_recording(self, filename):
-        # Do not create the pickle file if log is empty
+        # Do not create the recording file if log is empty
         # This usually happens when the log decorator is not used in the
         # specific interface
-        if not self._logs:
-            return
+        recorder = self._attach_recorder(filename)
+        recorder.close()
 
-        with open(filename, "wb") as f:
-            pickle.dump(self._logs, f)
-
-        self._logs = []
+        self._recorder = None
 
     def dump_recording(self, filename):
-        # Dump the logs to disk w/o cleaning up the log history
-        if not self._logs:
-            return
-
-        with open(filename, "wb") as f:
-            pickle.dump(self._logs, f)
+        # Append the new records to disk w/o stopping the recording, the cost
+        # does not grow with the number of calls recorded so far
+        self._attach_recorder(filename).flush()
 
     # Environment should only call this method to get channels
     @abstractmethod
@@ -93,12 +273,35 @@ class Interface(BaseModel, ABC):
         """
         pass
 
+    def check_health(self) -> bool:
+        """
+        Optional; Called before a pooled interface session is reused.
+        Return False if the connection is broken and the interface should
+        be replaced by a new instance.
+        """
+        return True
+
+    def close(self):
+        """
+        Optional; Called when a pooled interface session is evicted.
+        Subclasses should use this to tear down their connections.
+        """
+        pass
+
     def get_value(self, channel_name: str, **kwargs) -> Any:
         return self.get_values([channel_name], **kwargs)[channel_name]
 
     def set_value(self, channel_name: str, channel_value, **kwargs):
         return self.set_values({channel_name: channel_value}, **kwargs)
 
+    # Async counterparts of the channel API, by default the sync methods are
+    # run in a worker thread so async callers never block the event loop
+    async def aget_values(self, channel_names: List[str]) -> Dict[str, Any]:
+        return await run_in_thread(self.get_values, channel_names)
+
+    async def aset_values(self, channel_inputs: Dict[str, Any]):
+        return await run_in_thread(self.set_values, channel_inputs)
+
     def get_info(self, channels: List[str]) -> InterfaceInfo:
         """
         Optional; Returns information about the channels and environment for display
@@ -115,3 +318,60 @@ class Interface(BaseModel, ABC):
             status information for the requested variables.
         """
         return None
+
+
+class AsyncInterface(Interface):
+    """
+    Base class for interfaces whose channel I/O is implemented with coroutines.
+
+    Subclasses implement either the per-channel coroutines `aget_value` and
+    `aset_value`, in which case reads and writes of multiple channels fan out
+    concurrently, or override `aget_values` and `aset_values` directly. The
+    synchronous `get_values` and `set_values` are provided on top of them, so
+    an async interface can be used anywhere a regular interface is expected.
+    A subclass implementing neither of a pair cannot be instantiated.
+    """
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs):
+        super().__pydantic_init_subclass__(**kwargs)
+        # The per-channel coroutines are only abstract if their multi-channel
+        # counterparts are not overridden
+        implemented = {
+            name
+            for name, batch_name in [
+                ("aget_value", "aget_values"),
+                ("aset_value", "aset_values"),
+            ]
+            if getattr(cls, batch_name) is not getattr(AsyncInterface, batch_name)
+        }
+        cls.__abstractmethods__ = cls.__abstractmethods__ - implemented
+
+    @abstractmethod
+    async def aget_value(self, channel_name: str) -> Any:
+        pass
+
+    @abstractmethod
+    async def aset_value(self, channel_name: str, channel_value):
+        pass
+
+    async def aget_values(self, channel_names: List[str]) -> Dict[str, Any]:
+        values = await asyncio.gather(
+            *[self.aget_value(channel) for channel in channel_names]
+        )
+
+        return dict(zip(channel_names, values))
+
+    async def aset_values(self, channel_inputs: Dict[str, Any]):
+        await asyncio.gather(
+            *[
+                self.aset_value(channel, value)
+                for channel, value in channel_inputs.items()
+            ]
+        )
+
+    def get_values(self, channel_names: List[str]) -> Dict[str, Any]:
+        return run_sync(self.aget_values(channel_names))
+
+    def set_values(self, channel_inputs: Dict[str, Any]):
+        return run_sync(self.aset_values(channel_inputs))
@@ -3,19 +3,34 @@ from datetime import datetime
 import logging
 
 from badger.settings import init_settings
-from badger.archive import BADGER_ARCHIVE_ROOT
+from badger.archive import get_archive_root
 from badger.errors import BadgerConfigError, BadgerLogbookError
+from badger.utils import LazyAttributes
 
 logger = logging.getLogger(__name__)
 
-# Check badger logbook root
-config_singleton = init_settings()
-BADGER_LOGBOOK_ROOT = config_singleton.read_value("BADGER_LOGBOOK_ROOT")
-if BADGER_LOGBOOK_ROOT is None:
-    raise BadgerConfigError("Please set the BADGER_LOGBOOK_ROOT env var!")
-elif not os.path.exists(BADGER_LOGBOOK_ROOT):
-    os.makedirs(BADGER_LOGBOOK_ROOT)
-    logger.info(f"Badger logbook root {BADGER_LOGBOOK_ROOT} created")
+
+def init_logbook_root() -> str:
+    """
+    Check the badger logbook root of the settings, and create it if needed.
+    """
+    root = init_settings().read_value("BADGER_LOGBOOK_ROOT")
+    if root is None:
+        raise BadgerConfigError("Please set the BADGER_LOGBOOK_ROOT env var!")
+    elif not os.path.exists(root):
+        os.makedirs(root)
+        logger.info(f"Badger logbook root {root} created")
+
+    return root
+
+
+# Read from the settings on first use rather than on import
+_lazy = LazyAttributes(globals(), {"BADGER_LOGBOOK_ROOT": init_logbook_root})
+__getattr__ = _lazy.load
+
+
+def get_logbook_root() -> str:
+    return _lazy.get("BADGER_LOGBOOK_ROOT")
 
 
 def send_to_logbook(routine, widget=None):
@@ -25,7 +40,7 @@ def send_to_logbook(routine, widget=None):
     log_text = ""
     routine_name = routine.name
     generator_name = routine.generator.name
-    data_path = BADGER_ARCHIVE_ROOT
+    data_path = get_archive_root()
     obj_name = routine.vocs.objective_names[0]
     env_name = routine.environment.name
 
@@ -47,7 +62,7 @@ def send_to_logbook(routine, widget=None):
     log_text += f"Optimization algorithm: {generator_name}\n"
     log_text += f"Data location: {data_path}\n"
     try:
-        log_text += f"Log location: {BADGER_LOGBOOK_ROOT}\n"
+        log_text += f"Log location: {get_logbook_root()}\n"
     except:
         pass
 
@@ -86,7 +101,7 @@ def send_to_logbook(routine, widget=None):
     if text.text == "":
         text.text = " "  # If field is truly empty, ElementTree leaves off tag entirely which causes logbook parser to fail
 
-    fileName = os.path.join(BADGER_LOGBOOK_ROOT, metainfo.text)
+    fileName = os.path.join(get_logbook_root(), metainfo.text)
     fileName = fileName.rstrip(".xml")
     xmlFile = open(fileName + ".xml", "w")
     rawString = ElementTree.tostring(log_entry, "utf-8").decode("utf-8")
@@ -0,0 +1,212 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from badger.interface import Interface
+
+logger = logging.getLogger(__name__)
+
+
+class InterfaceSession:
+    def __init__(self, key: tuple, interface: Interface):
+        self.key = key
+        self.interface = interface
+        self.refcount = 0
+        self.last_used = time.monotonic()
+
+
+class InterfacePool:
+    """
+    Process-wide pool of interface sessions.
+
+    Interfaces that opt in with `pooled = True` are shared by all the
+    environments (and successive runs) in the process that use the same
+    interface name and parameters, so their connection setup is paid once.
+    Sessions are reference counted, health checked before being handed out
+    again, and closed once they have been idle for longer than max_idle_time.
+    Interfaces that do not opt in are simply instantiated on every acquire.
+
+    Parameters
+    ----------
+    max_idle_time : float
+        Time in seconds an unused session is kept alive.
+    """
+
+    def __init__(self, max_idle_time: float = 300.0):
+        self.max_idle_time = max_idle_time
+
+        self._sessions: Dict[tuple, InterfaceSession] = {}
+        self._lock = threading.RLock()
+        self._pid = os.getpid()
+
+    @staticmethod
+    def is_pooled(interface) -> bool:
+        # Works on both interface classes and instances
+        return getattr(interface, "pooled", False) is True
+
+    @staticmethod
+    def get_key(name: str, params: Optional[Dict[str, Any]] = None) -> tuple:
+        return (name, json.dumps(params or {}, sort_keys=True, default=str))
+
+    def _check_fork(self):
+        # Connections inherited through a fork belong to the parent process,
+        # forget about them rather than closing them from the child
+        if self._pid != os.getpid():
+            self._sessions = {}
+            self._pid = os.getpid()
+
+    def acquire(
+        self,
+        name: str,
+        params: Optional[Dict[str, Any]] = None,
+        setup: Optional[Callable[[Interface], None]] = None,
+    ):
+        """
+        Get an interface instance, reusing a pooled session if possible.
+
+        Parameters
+        ----------
+        name : str
+            Name of the interface plugin.
+        params : dict, optional
+            Parameters to instantiate the interface with.
+        setup : callable, optional
+            Called with the new interface instances only, so a pooled session
+            is set up once by the first acquire and shared as is afterwards.
+
+        Returns
+        -------
+        Interface
+            The interface instance. Hand it back with `release` when done.
+        """
+        from badger.factory import get_intf
+
+        Interface, _ = get_intf(name)
+        if not self.is_pooled(Interface):
+            intf = Interface(**(params or {}))
+            if setup is not None:
+                setup(intf)
+
+            return intf
+
+        key = self.get_key(name, params)
+        with self._lock:
+            self._check_fork()
+            self.evict_idle()
+
+            session = self._sessions.get(key)
+            if session is not None and not self._is_healthy(session):
+                logger.info(f"Replacing unhealthy pooled interface session {key}")
+                del self._sessions[key]
+                if session.refcount == 0:
+                    self._close(session)
+                session = None
+
+            if session is None:
+                logger.debug(f"Creating pooled interface session {key}")
+                session = InterfaceSession(key, Interface(**(params or {})))
+                if setup is not None:
+                    setup(session.interface)
+                self._sessions[key] = session
+
+            session.refcount += 1
+            session.last_used = time.monotonic()
+
+            return session.interface
+
+    def release(self, interface: Interface):
+        """
+        Hand back an interface obtained from `acquire`. The session stays in
+        the pool for reuse until it has been idle for max_idle_time.
+        """
+        with self._lock:
+            self._check_fork()
+            for session in self._sessions.values():
+                if session.interface is interface:
+                    session.refcount = max(session.refcount - 1, 0)
+                    session.last_used = time.monotonic()
+                    break
+            else:
+                # Not (or no longer) pooled, e.g. replaced after a failed
+                # health check while still in use
+                if self.is_pooled(interface):
+                    self._close(InterfaceSession(None, interface))
+
+            self.evict_idle()
+
+    def evict_idle(self, max_idle_time: Optional[float] = None) -> int:
+        """
+        Close the unused sessions that have been idle for too long.
+
+        Returns
+        -------
+        int
+            Number of evicted sessions.
+        """
+        if max_idle_time is None:
+            max_idle_time = self.max_idle_time
+
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                key
+                for key, session in self._sessions.items()
+                if session.refcount == 0 and now - session.last_used >= max_idle_time
+            ]
+            for key in expired:
+                self._close(self._sessions.pop(key))
+
+        return len(expired)
+
+    def clear(self):
+        """
+        Close all the idle sessions and forget about the ones in use.
+        """
+        with self._lock:
+            for session in self._sessions.values():
+                if session.refcount == 0:
+                    self._close(session)
+            self._sessions = {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "in_use": sum(1 for s in self._sessions.values() if s.refcount),
+                "refcounts": {
+                    f"{key[0]}{key[1]}": session.refcount
+                    for key, session in self._sessions.items()
+                },
+            }
+
+    @staticmethod
+    def _is_healthy(session: InterfaceSession) -> bool:
+        try:
+            return session.interface.check_health()
+        except Exception as e:
+            logger.warning(f"Health check of interface session failed: {e}")
+            return False
+
+    @staticmethod
+    def _close(session: InterfaceSession):
+        try:
+            session.interface.close()
+        except Exception as e:
+            logger.warning(f"Error closing interface session: {e}")
+
+
+_pool: Optional[InterfacePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_interface_pool() -> InterfacePool:
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = InterfacePool()
+
+        return _pool
@@ -0,0 +1,185 @@
+import gzip
+import json
+import math
+import struct
+import threading
+from typing import Any, Dict, List
+
+import numpy as np
+
+# File layout: MAGIC, then a sequence of chunks, each one a (kind, size)
+# header followed by the payload. "N" chunks extend the channel name
+# dictionary (a json list, ids are assigned in order), "R" chunks hold a
+# block of fixed-size records referring to channels by id.
+RECORDING_EXT = ".rec"
+MAGIC = b"BDGREC01"
+CHUNK_HEADER = struct.Struct("<cQ")
+CHUNK_NAMES = b"N"
+CHUNK_RECORDS = b"R"
+GZIP_MAGIC = b"\x1f\x8b"
+
+ACTIONS = ["get_values", "set_values"]
+RECORD_DTYPE = np.dtype(
+    [
+        ("timestamp", "<f8"),
+        ("call", "<u4"),  # index of the interface call the record belongs to
+        ("action", "u1"),  # index into ACTIONS
+        ("channel", "<u4"),  # index into the channel name dictionary
+        ("value", "<f8"),  # nan if the value is not a scalar number
+    ]
+)
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class InterfaceRecorder:
+    """
+    Streams interface calls to an append-only chunked binary file.
+
+    Each channel read or written becomes one fixed-size record. Records are
+    collected in a bounded buffer that is appended to the file whenever it
+    fills up or `flush` is called, so the memory used and the cost of a flush
+    do not grow with the length of the recording.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the recording file, it is overwritten on the first flush.
+    buffer_size : int
+        Number of records buffered in memory.
+    """
+
+    def __init__(self, filename: str, buffer_size: int = 4096):
+        self.filename = filename
+        self.buffer_size = buffer_size
+
+        self._buffer = np.empty(buffer_size, dtype=RECORD_DTYPE)
+        self._size = 0
+        self._channel_ids: Dict[str, int] = {}
+        self._new_channels: List[str] = []
+        self._n_calls = 0
+        self._started = False
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Locks can not be pickled or deep copied
+        state = self.__dict__.copy()
+        del state["_lock"]
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def record(self, action: str, channel_values: Dict[str, Any], timestamp: float):
+        action_id = ACTIONS.index(action)
+
+        with self._lock:
+            call = self._n_calls
+            self._n_calls += 1
+
+            for channel, value in channel_values.items():
+                if self._size == self.buffer_size:
+                    self._flush()
+
+                channel_id = self._channel_ids.get(channel)
+                if channel_id is None:
+                    channel_id = self._channel_ids[channel] = len(self._channel_ids)
+                    self._new_channels.append(channel)
+
+                self._buffer[self._size] = (
+                    timestamp,
+                    call,
+                    action_id,
+                    channel_id,
+                    _to_float(value),
+                )
+                self._size += 1
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._size and not self._new_channels:
+            return
+
+        # The file is (re)created by the first flush and appended to after
+        with open(self.filename, "ab" if self._started else "wb") as f:
+            if not self._started:
+                f.write(MAGIC)
+                self._started = True
+
+            if self._new_channels:
+                payload = json.dumps(self._new_channels).encode("utf-8")
+                f.write(CHUNK_HEADER.pack(CHUNK_NAMES, len(payload)))
+                f.write(payload)
+                self._new_channels = []
+
+            if self._size:
+                payload = self._buffer[: self._size].tobytes()
+                f.write(CHUNK_HEADER.pack(CHUNK_RECORDS, len(payload)))
+                f.write(payload)
+                self._size = 0
+
+    def close(self):
+        self.flush()
+
+
+def load_recording(filename: str) -> Dict[str, Any]:
+    """
+    Load an interface recording into numpy arrays.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the recording file.
+
+    Returns
+    -------
+    dict
+        The channel name dictionary under "channels", and one array per
+        record field ("timestamp", "call", "action", "channel", "value").
+        Actions and channels are ids, index ACTIONS and "channels" with them.
+    """
+    with open(filename, "rb") as f:
+        raw = f.read()
+
+    if raw.startswith(GZIP_MAGIC):  # compressed by the archive maintenance
+        raw = gzip.decompress(raw)
+    if not raw.startswith(MAGIC):
+        raise ValueError(f"{filename} is not a Badger interface recording")
+
+    channels = []
+    blocks = []
+    view = memoryview(raw)
+    offset = len(MAGIC)
+    while offset + CHUNK_HEADER.size <= len(raw):
+        kind, size = CHUNK_HEADER.unpack_from(raw, offset)
+        offset += CHUNK_HEADER.size
+        if offset + size > len(raw):  # chunk cut short by an interrupted write
+            break
+
+        payload = view[offset : offset + size]
+        if kind == CHUNK_NAMES:
+            channels += json.loads(bytes(payload))
+        elif kind == CHUNK_RECORDS:
+            blocks.append(np.frombuffer(payload, dtype=RECORD_DTYPE))
+        offset += size
+
+    if blocks:
+        records = np.concatenate(blocks)
+    else:
+        records = np.empty(0, dtype=RECORD_DTYPE)
+
+    result = {"channels": channels}
+    for field in RECORD_DTYPE.names:
+        result[field] = records[field]
+
+    return result
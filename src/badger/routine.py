@@ -1,22 +1,23 @@
 import logging
-import json
 from copy import deepcopy
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 from pandas import DataFrame
 from pydantic import (
     ConfigDict,
     Field,
+    PrivateAttr,
     field_validator,
     model_validator,
     SerializeAsAny,
     ValidationInfo,
 )
 from xopt import Evaluator, VOCS, Xopt
-from xopt.generators import get_generator
 from xopt.utils import get_local_region
-from xopt.generators.sequential import SequentialGenerator
+from badger.aio import run_sync
+from badger.arrays import ArrayStore, restore_array_refs
+from badger.serialization import dump_yaml, dumps_json, routine_to_dict
 from badger.utils import curr_ts
 from badger.environment import BaseEnvironment, instantiate_env
 from badger.factory import get_env
@@ -46,14 +47,29 @@ class Routine(Xopt):
     # Other meta data
     badger_version: Optional[str] = Field(None)
     xopt_version: Optional[str] = Field(None)
+    # Array-valued observables, referenced from data (see badger.arrays)
+    arrays: Optional[ArrayStore] = Field(None, exclude=True)
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    # Bumped whenever data is assigned, keys the sorted_data cache
+    _data_version: int = PrivateAttr(0)
+    _sorted_data_cache: Optional[Tuple[tuple, DataFrame]] = PrivateAttr(None)
+
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        if name == "data":
+            self._data_version += 1
+
     @model_validator(mode="before")
     @classmethod
     def validate_model(cls, data: Any):
         logger.info("Validating Routine model from input data.")
         if isinstance(data, dict):
+            # The generator modules are only needed to load a routine
+            from xopt.generators import get_generator
+            from xopt.generators.sequential import SequentialGenerator
+
             logger.debug(f"Routine data dict received: {list(data.keys())}")
             # validate vocs
             vocs_data = None
@@ -98,8 +114,11 @@ class Routine(Xopt):
                     except IndexError:
                         data["data"] = pd.DataFrame(data["data"], index=[0])
 
+                # Data read from a columnar archive comes in as a DataFrame
+                if isinstance(data["data"], pd.DataFrame):
                     data["data"].index = data["data"].index.astype(int)
                     data["data"].sort_index(inplace=True)
+                    restore_array_refs(data["data"])
 
                     # Add data one row at a time to avoid generator issues
                     if isinstance(data["generator"], SequentialGenerator):
@@ -113,23 +132,41 @@ class Routine(Xopt):
             if isinstance(data["environment"], dict):
                 # TODO: Actually we need this interface info, but
                 # should be put somewhere else (in parallel with env?)
-                try:
-                    del data["environment"]["interface"]
-                except KeyError:  # no interface at all, which is good
-                    pass
+                interface = data["environment"].pop("interface", None)
                 name = data["environment"].pop("name")
                 env_class, configs_env = get_env(name)
                 configs_env["params"] |= data["environment"]
+                if isinstance(interface, dict):
+                    # Pooled interface sessions are shared per parameters
+                    configs_env["interface_params"] = {
+                        k: v for k, v in interface.items() if k != "name"
+                    }
                 data["environment"] = instantiate_env(env_class, configs_env)
 
             # create evaluator
             env = data["environment"]
+            if data.get("arrays") is None:
+                data["arrays"] = ArrayStore()
+            arrays = data["arrays"]
 
             def evaluate_point(point: dict):
                 logger.debug(f"Evaluating point: {point}")
                 point = pd.Series(point).explode().to_dict()
-                env.set_variables(point)
-                obs = env.get_observables(data["generator"].vocs.output_names)
+                vocs = data["generator"].vocs
+                output_names = vocs.output_names
+                if env.is_async:
+                    obs = run_sync(evaluate_point_async(env, point, output_names))
+                else:
+                    env.set_variables(point)
+                    obs = env.get_observables(output_names)
+                # Keep array observables out of the DataFrame, objectives and
+                # constraints are left alone so Xopt still explodes them into
+                # one row per measurement
+                scalar_names = vocs.objective_names + vocs.constraint_names
+                arrays.pack(
+                    obs, [n for n in vocs.observable_names if n not in scalar_names]
+                )
+                arrays.flush()
                 ts = curr_ts()
                 obs["timestamp"] = ts.timestamp()
                 obs["live"] = 1
@@ -151,46 +188,90 @@ class Routine(Xopt):
         return v
 
     @property
-    def sorted_data(self):
-        logger.debug("Sorting routine data.")
-        data_copy = deepcopy(self.data)
-        if data_copy is not None:
-            data_copy.index = data_copy.index.astype(int)
-            data_copy.sort_index(inplace=True)
-        return data_copy
+    def data_version(self) -> int:
+        """Counter bumped every time the routine data is replaced"""
+        return self._data_version
+
+    @property
+    def sorted_data(self) -> Optional[DataFrame]:
+        """
+        The routine data sorted by index, treat it as read-only.
+
+        The sorted frame is cached until the data is assigned, swapped or
+        grown. Edits made to data in place, that keep its shape (such as
+        routine.data.loc[i, name] = value), are not seen: assign the edited
+        frame back to routine.data instead. Every access returns a shallow
+        copy of the cache, that copy-on-write (pandas 3) keeps from writing
+        through. Use copy_sorted_data to get a copy that is safe to modify.
+        """
+        if self.data is None:
+            return None
+
+        # The shape and identity catch the data being swapped or grown
+        # without going through the attribute
+        key = (self._data_version, id(self.data), self.data.shape)
+        if self._sorted_data_cache is None or self._sorted_data_cache[0] != key:
+            logger.debug("Sorting routine data.")
+            data = self.data.copy()
+            data.index = data.index.astype(int)
+            data.sort_index(inplace=True)
+            self._sorted_data_cache = (key, data)
+
+        return self._sorted_data_cache[1].copy(deep=False)
+
+    def copy_sorted_data(self) -> Optional[DataFrame]:
+        """
+        A deep copy of sorted_data, for callers that modify it.
+        """
+        data = self.sorted_data
+
+        return None if data is None else deepcopy(data)
+
+    def get_array(self, index: int, name: str) -> np.ndarray:
+        """
+        Get the value of an array-valued observable.
+
+        Parameters
+        ----------
+        index : int
+            Index of the row in data.
+        name : str
+            Name of the observable.
+
+        Returns
+        -------
+        np.ndarray
+            The array, read-only if it has been written to disk.
+        """
+        return self.arrays.get(self.data.loc[index, name])
 
     def json(self, **kwargs) -> str:
+        """Serialize the routine config and data, see routine_to_dict"""
         logger.info("Serializing Routine to JSON.")
-        """Handle custom serialization of environment"""
-
-        result = super().json(**kwargs)
-        dict_result = json.loads(result)
-
-        # Remove extra fields
-        fields_to_be_removed = [
-            "dump_file",
-            "evaluator",
-            "max_evaluations",
-            "serialize_inline",
-            "serialize_torch",
-            "strict",
-        ]
-        for field in fields_to_be_removed:
-            dict_result.pop(field, None)
-
-        dict_result["environment"] = {"name": self.environment.name} | dict_result[
-            "environment"
-        ]
-        try:
-            dict_result["environment"]["interface"] = {
-                "name": self.environment.interface.name
-            } | dict_result["environment"]["interface"]
-        except KeyError:
-            pass
-        except AttributeError:
-            pass
 
-        return json.dumps(dict_result)
+        return dumps_json(routine_to_dict(self, **kwargs))
+
+    def yaml(self, **kwargs) -> str:
+        logger.info("Serializing Routine to YAML.")
+
+        return dump_yaml(
+            routine_to_dict(
+                self,
+                serialize_torch=self.serialize_torch,
+                serialize_inline=self.serialize_inline,
+                **kwargs,
+            )
+        )
+
+
+async def evaluate_point_async(
+    env: BaseEnvironment, point: dict, observable_names: List[str]
+) -> dict:
+    # Drive one evaluation from the event loop so the channel I/O of an
+    # async environment can fan out concurrently
+    await env.aset_variables(point)
+
+    return await env.aget_observables(observable_names)
 
 
 def calculate_variable_bounds(limit_options, vocs, env):
@@ -0,0 +1,146 @@
+import pickle
+from multiprocessing.reduction import ForkingPickler
+from typing import TYPE_CHECKING, Any, Optional
+
+import orjson
+import yaml
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+# The C implementations of the yaml loader and dumper are an order of
+# magnitude faster, they are used whenever PyYAML was built with libyaml
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Xopt fields that are runtime state rather than routine config
+ROUTINE_EXCLUDED_FIELDS = {
+    "data",  # serialized on its own, see routine_to_dict
+    "dump_file",
+    "evaluator",
+    "max_evaluations",
+    "serialize_inline",
+    "serialize_torch",
+    "strict",
+}
+
+
+def _json_default(obj: Any) -> Any:
+    # Xopt (and torch through it) is only imported once something needs it,
+    # so that loading and dumping plain yaml stays cheap
+    from xopt.pydantic import JSON_ENCODERS, custom_pydantic_encoder
+
+    return custom_pydantic_encoder(JSON_ENCODERS, obj)
+
+
+def load_yaml(stream) -> Any:
+    """
+    Parse a yaml document from a string or a file object.
+    """
+    return yaml.load(stream, Loader=YamlLoader)
+
+
+def dump_yaml(content: Any, stream=None, **kwargs) -> Optional[str]:
+    """
+    Dump plain data (dicts, lists, strings, numbers) to yaml, written to
+    stream if given, returned as a string otherwise.
+    """
+    return yaml.dump(content, stream, Dumper=YamlDumper, **kwargs)
+
+
+def dumps_json(content: Any) -> str:
+    return orjson.dumps(content, default=_json_default).decode()
+
+
+def model_to_dict(model: BaseModel) -> dict:
+    """
+    A pydantic model as json-compatible data.
+    """
+    return orjson.loads(model.model_dump_json())
+
+
+def data_to_dict(data: "DataFrame") -> dict:
+    """
+    A DataFrame as json-compatible data, in the {column: {index: value}}
+    layout of the yaml archives.
+    """
+    return orjson.loads(data.to_json())
+
+
+def routine_to_dict(
+    routine,
+    serialize_torch: bool = False,
+    serialize_inline: bool = False,
+    include_data: bool = True,
+) -> dict:
+    """
+    Serialize a routine to json-compatible data in a single pass.
+
+    The result is the same as json.loads(routine.json()), but the data is
+    serialized once instead of three times, and the rest of the routine goes
+    through one C-level json round trip instead of several Python ones.
+
+    Parameters
+    ----------
+    routine : Routine
+        The routine to serialize.
+    serialize_torch : bool
+        Keep the torch modules of the generator.
+    serialize_inline : bool
+        Store the torch modules inline (base64) rather than in side files.
+    include_data : bool
+        Include the routine data, under "data".
+
+    Returns
+    -------
+    dict
+    """
+    from xopt.pydantic import recursive_serialize
+    from xopt.utils import get_generator_name
+
+    result = recursive_serialize(
+        routine.model_dump(exclude=ROUTINE_EXCLUDED_FIELDS),
+        serialize_torch=serialize_torch,
+        serialize_inline=serialize_inline,
+    )
+    result = orjson.loads(orjson.dumps(result, default=_json_default))
+
+    # Same layout as Xopt.json
+    if not isinstance(result["generator"], dict):  # may return as module.path
+        result["generator"] = {"name": result["generator"]}
+    result["generator"] = {"name": get_generator_name(routine.generator)} | result[
+        "generator"
+    ]
+    if result.get("stopping_condition") is not None:
+        result["stopping_condition"] = {
+            "name": routine.stopping_condition.__class__.__name__
+        } | result["stopping_condition"]
+
+    # And Routine.json
+    result["environment"] = {"name": routine.environment.name} | result["environment"]
+    interface = result["environment"].get("interface")
+    if isinstance(interface, dict) and routine.environment.interface is not None:
+        result["environment"]["interface"] = {
+            "name": routine.environment.interface.name
+        } | interface
+
+    if include_data:
+        data = routine.data
+        result["data"] = data_to_dict(data) if data is not None else None
+
+    return result
+
+
+def pack(obj: Any) -> bytes:
+    """
+    Serialize an object for another Badger process, such as the results the
+    run subprocess sends to the GUI. Uses the latest pickle protocol and the
+    multiprocessing reducers, so torch tensors keep being shared through
+    shared memory when that is enabled.
+    """
+    return bytes(ForkingPickler.dumps(obj, pickle.HIGHEST_PROTOCOL))
+
+
+def unpack(payload: bytes) -> Any:
+    return pickle.loads(payload)
@@ -29,7 +29,7 @@ class Setting(BaseModel):
 
     display_name: str
     description: str
-    value: Optional[Union[str, int, bool, None]] = Field(
+    value: Optional[Union[str, int, float, bool, None]] = Field(
         None, description="The value of the setting which can be of different types."
     )
     is_path: bool
@@ -53,8 +53,22 @@ class BadgerConfig(BaseModel):
         Setting for the logging level.
     BADGER_LOG_DIRECTORY : Setting
         Setting for the location of logfile.
+    BADGER_ARCHIVE_COLD_DAYS : Setting
+        Setting for the age (in days) after which archived runs are compacted.
+    BADGER_ARCHIVE_MAX_AGE : Setting
+        Setting for the age (in days) after which archived runs are deleted.
+    BADGER_ARCHIVE_MAX_SIZE : Setting
+        Setting for the size (in MB) the archive is pruned down to.
+    BADGER_ARCHIVE_MAINTENANCE_RATE : Setting
+        Setting for the maximum I/O rate (in MB/s) of the archive maintenance.
     BADGER_DATA_DUMP_PERIOD : Setting
         Setting for the minimum time interval between data dumps (in seconds).
+    BADGER_DATA_MEMORY_BUDGET : Setting
+        Setting for the memory (in MB) the GUI keeps the data of a live run in.
+    BADGER_DATA_OVERVIEW_POINTS : Setting
+        Setting for the number of points of the overview of a long live run.
+    BADGER_CHANNEL_CACHE_TTL : Setting
+        Setting for the time-to-live of cached variable channel reads (in seconds).
     BADGER_THEME : Setting
         Setting for the GUI theme.
     BADGER_ENABLE_ADVANCED : Setting
@@ -87,6 +101,30 @@ class BadgerConfig(BaseModel):
         value=None,
         is_path=True,
     )
+    BADGER_ARCHIVE_COLD_DAYS: Setting = Setting(
+        display_name="archive cold days",
+        description="Archived runs older than this are compacted and compressed in the background, unit is day",
+        value=30,
+        is_path=False,
+    )
+    BADGER_ARCHIVE_MAX_AGE: Setting = Setting(
+        display_name="archive max age",
+        description="Archived runs older than this are deleted, unit is day, 0 keeps them forever",
+        value=0,
+        is_path=False,
+    )
+    BADGER_ARCHIVE_MAX_SIZE: Setting = Setting(
+        display_name="archive max size",
+        description="The oldest archived runs are deleted to keep the archive under this size, unit is MB, 0 for no limit",
+        value=0,
+        is_path=False,
+    )
+    BADGER_ARCHIVE_MAINTENANCE_RATE: Setting = Setting(
+        display_name="archive maintenance rate",
+        description="Maximum I/O rate of the background archive maintenance, unit is MB/s, 0 for no limit",
+        value=20,
+        is_path=False,
+    )
     BADGER_LOG_LEVEL: Setting = Setting(
         display_name="logging level",
         description="Logging level for the Badger logger",
@@ -105,6 +143,24 @@ class BadgerConfig(BaseModel):
         value=1,
         is_path=False,
     )
+    BADGER_DATA_MEMORY_BUDGET: Setting = Setting(
+        display_name="data memory budget",
+        description="Memory the GUI keeps the data of a live run in, unit is MB, 0 for no limit. Beyond it, only the latest points are kept, along with an overview of the others",
+        value=256,
+        is_path=False,
+    )
+    BADGER_DATA_OVERVIEW_POINTS: Setting = Setting(
+        display_name="data overview points",
+        description="Number of points of the overview of the data that does not fit in the memory budget",
+        value=2000,
+        is_path=False,
+    )
+    BADGER_CHANNEL_CACHE_TTL: Setting = Setting(
+        display_name="channel cache ttl",
+        description="Time-to-live of cached variable channel reads, unit is second, 0 disables the cache",
+        value=0,
+        is_path=False,
+    )
     BADGER_THEME: Setting = Setting(
         display_name="theme",
         description="Theme for the Badger GUI",
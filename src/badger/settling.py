@@ -0,0 +1,221 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Callable, Dict, List, Literal, Optional
+
+import numpy as np
+from pydantic import BaseModel, Field, PositiveFloat
+
+
+class SettlingConfig(BaseModel):
+    """
+    How to tell that the readbacks of the variables have settled after a
+    write. A variable has settled once its readback is within tolerance of
+    the setpoint and the last `window` readbacks vary by less than max_std.
+    The readbacks are polled at an adaptive rate: fast right after the write,
+    then spaced out according to how quickly the remaining error shrinks.
+    The tolerance has no default: it has to leave room for the noise of the
+    readbacks, or they never settle.
+    """
+
+    readbacks: Dict[str, str] = Field(
+        {}, description="Readback channel of each variable, defaults to itself"
+    )
+    tolerance: PositiveFloat = Field(description="Max distance to the setpoint")
+    tolerances: Dict[str, PositiveFloat] = Field(
+        {}, description="Per-variable tolerance"
+    )
+    window: int = Field(3, description="Number of readbacks in the variance window")
+    max_std: Optional[float] = Field(
+        None, description="Max standard deviation over the window, None to skip"
+    )
+    timeout: float = Field(10.0, description="Max time to wait, in seconds")
+    timeouts: Dict[str, float] = Field({}, description="Per-variable timeout")
+    on_timeout: Literal["warn", "raise"] = "warn"
+    min_interval: float = Field(0.01, description="Min time between polls")
+    max_interval: float = Field(1.0, description="Max time between polls")
+    backoff: float = Field(1.5, description="Growth of the interval between polls")
+
+    def get_readback(self, name: str) -> str:
+        return self.readbacks.get(name, name)
+
+    def get_tolerance(self, name: str) -> float:
+        return self.tolerances.get(name, self.tolerance)
+
+    def get_timeout(self, name: str) -> float:
+        return self.timeouts.get(name, self.timeout)
+
+
+class SettlingTracker:
+    """
+    Keeps track of the readbacks of a set of variables after a write, and
+    decides which ones have settled and when to poll next.
+
+    Parameters
+    ----------
+    config : SettlingConfig
+        The settling criteria.
+    setpoints : dict of {str: float}
+        The values just written to the variables.
+    start : float, optional
+        Time of the write, as given by time.monotonic.
+    """
+
+    def __init__(
+        self,
+        config: SettlingConfig,
+        setpoints: Dict[str, float],
+        start: Optional[float] = None,
+    ):
+        self.config = config
+        self.setpoints = setpoints
+        self.start = time.monotonic() if start is None else start
+
+        # The readbacks of the variance window
+        self.history: Dict[str, deque] = {
+            name: deque(maxlen=config.window) for name in setpoints
+        }
+        # variable -> time it took to settle, nan if it timed out
+        self.settle_times: Dict[str, float] = {}
+        self.interval = config.min_interval
+        self._last_poll: Optional[float] = None
+        self._last_errors: Dict[str, float] = {}
+
+    @property
+    def pending(self) -> List[str]:
+        return [name for name in self.setpoints if name not in self.settle_times]
+
+    @property
+    def timed_out(self) -> List[str]:
+        return [name for name, t in self.settle_times.items() if math.isnan(t)]
+
+    def is_settled(self, name: str) -> bool:
+        values = self.history[name]
+        if not values:
+            return False
+
+        if abs(values[-1] - self.setpoints[name]) > self.config.get_tolerance(name):
+            return False
+
+        if self.config.max_std is not None:
+            if len(values) < self.config.window:
+                return False
+            if np.std(values) > self.config.max_std:
+                return False
+
+        return True
+
+    def update(self, readbacks: Dict[str, float], now: Optional[float] = None):
+        """
+        Feed the readbacks of the pending variables.
+
+        Returns
+        -------
+        float or None
+            Time to wait before the next poll, None if no variable is pending.
+        """
+        if now is None:
+            now = time.monotonic()
+        elapsed = now - self.start
+
+        # Predict how long until the slowest variable is within tolerance,
+        # assuming the error keeps shrinking exponentially
+        predicted = 0.0
+        for name in self.pending:
+            value = float(readbacks[name])
+            self.history[name].append(value)
+
+            if self.is_settled(name):
+                self.settle_times[name] = elapsed
+                continue
+            if elapsed >= self.config.get_timeout(name):
+                self.settle_times[name] = math.nan
+                continue
+
+            error = abs(value - self.setpoints[name])
+            tolerance = self.config.get_tolerance(name)
+            last_error = self._last_errors.get(name)
+            self._last_errors[name] = error
+            if (
+                self._last_poll is not None
+                and last_error is not None
+                and tolerance < error < last_error
+            ):
+                rate = math.log(last_error / error) / (now - self._last_poll)
+                predicted = max(predicted, math.log(error / tolerance) / rate)
+            else:
+                predicted = math.inf
+
+        self._last_poll = now
+        if not self.pending:
+            return None
+
+        if math.isfinite(predicted):
+            # Aim a bit short of the prediction, it will be refined next poll
+            self.interval = 0.5 * predicted
+        else:
+            self.interval *= self.config.backoff
+        self.interval = min(
+            max(self.interval, self.config.min_interval), self.config.max_interval
+        )
+
+        # Do not sleep past the earliest timeout
+        deadline = min(self.config.get_timeout(name) for name in self.pending)
+
+        return max(min(self.interval, deadline - elapsed), 0.0)
+
+
+def wait_for_settling(
+    read: Callable[[List[str]], Dict[str, float]],
+    config: SettlingConfig,
+    setpoints: Dict[str, float],
+) -> SettlingTracker:
+    """
+    Poll the readbacks through read until all the variables have settled or
+    timed out.
+
+    Parameters
+    ----------
+    read : callable
+        Reads a list of channels, returns a dict of {channel: value}.
+    config : SettlingConfig
+        The settling criteria.
+    setpoints : dict of {str: float}
+        The values just written to the variables.
+
+    Returns
+    -------
+    SettlingTracker
+        The tracker, see its settle_times and timed_out attributes.
+    """
+    tracker = SettlingTracker(config, setpoints)
+    delay = 0.0
+    while delay is not None:
+        time.sleep(delay)
+        outputs = read(_channels(config, tracker))
+        delay = tracker.update(_read_readbacks(outputs, config, tracker))
+
+    return tracker
+
+
+async def await_settling(read, config: SettlingConfig, setpoints: Dict[str, float]):
+    """
+    Same as wait_for_settling, with read a coroutine function.
+    """
+    tracker = SettlingTracker(config, setpoints)
+    delay = 0.0
+    while delay is not None:
+        await asyncio.sleep(delay)
+        outputs = await read(_channels(config, tracker))
+        delay = tracker.update(_read_readbacks(outputs, config, tracker))
+
+    return tracker
+
+
+def _channels(config: SettlingConfig, tracker: SettlingTracker) -> List[str]:
+    return [config.get_readback(name) for name in tracker.pending]
+
+
+def _read_readbacks(outputs, config: SettlingConfig, tracker: SettlingTracker):
+    return {name: outputs[config.get_readback(name)] for name in tracker.pending}
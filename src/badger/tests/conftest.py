@@ -62,13 +62,22 @@ def config_test_settings(
 
 @pytest.fixture(scope="module", autouse=True)
 def clean_up(
-    mock_template_root, mock_logbook_root, mock_archive_root, mock_log_directory
+    mock_plugin_root,
+    mock_template_root,
+    mock_logbook_root,
+    mock_archive_root,
+    mock_log_directory,
 ):
+    # The plugin manifest cache
+    manifest_file = os.path.join(mock_plugin_root, ".manifests.json")
+
     # Clean before tests
     shutil.rmtree(mock_template_root, True)  # ignore errors
     shutil.rmtree(mock_logbook_root, True)
     shutil.rmtree(mock_archive_root, True)
     shutil.rmtree(mock_log_directory, True)
+    if os.path.exists(manifest_file):
+        os.remove(manifest_file)
 
     yield
 
@@ -77,6 +86,8 @@ def clean_up(
     shutil.rmtree(mock_logbook_root, True)
     shutil.rmtree(mock_archive_root, True)
     shutil.rmtree(mock_log_directory, True)
+    if os.path.exists(manifest_file):
+        os.remove(manifest_file)
 
 
 @pytest.fixture(scope="module")
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+
+def test_summarize_history():
+    from badger.analytics import summarize_history
+    from badger.tests.utils import create_routine
+
+    routine = create_routine()  # maximize f, subject to c > 0
+    data = pd.DataFrame(
+        {
+            "f": [1.0, 5.0, 9.0, 7.95, 8.0],
+            "c": [1.0, 1.0, -1.0, 1.0, 1.0],
+            "xopt_error": [False, False, False, True, False],
+            "timestamp": [10.0, 11.0, 12.0, 13.0, 20.0],
+        }
+    )
+    summary = summarize_history(routine.vocs, data)
+
+    assert summary["objective"] == "f"
+    assert summary["direction"] == "MAXIMIZE"
+    assert summary["n_feasible"] == 4
+    assert summary["n_errors"] == 1
+    assert summary["duration"] == 10.0
+    # 9 is infeasible, the best is 8 and 7.95 is within 1% of the improvement
+    assert summary["evals_to_best"] == 5
+    assert summary["evals_to_converge"] == 4
+
+    assert summarize_history(routine.vocs, data.iloc[:0]) == {}
+
+
+def test_aggregate(mock_archive_root):
+    from badger.analytics import aggregate, query_summaries
+    from badger.archive import ARCHIVE_INDEX, archive_run
+    from badger.tests.utils import create_routine, fix_path_issues
+
+    fix_path_issues()
+    for ts, n in [
+        ("2024-01-01-000000", 3),
+        ("2024-01-02-000000", 5),
+        ("2024-02-01-000000", 4),
+    ]:
+        routine = create_routine()
+        routine.creation_ts = ts
+        routine.evaluate_data(
+            pd.DataFrame({f"x{i}": np.linspace(-0.5, 0.5, n) for i in range(4)})
+        )
+        archive_run(routine)
+
+    summaries = query_summaries(workers=1)
+    assert len(summaries) == 3
+    assert summaries["n_points"].tolist() == [3, 5, 4]
+    assert (summaries["objective"] == "f").all()
+    assert summaries["month"].tolist() == ["2024-01", "2024-01", "2024-02"]
+    assert summaries["week"].tolist()[0] == "2024-W01"
+
+    # Summaries are cached, only the runs changed since are summarized again
+    assert ARCHIVE_INDEX.stale_summaries() == []
+
+    result = aggregate("n_points", by=["month"], agg="sum", refresh=False)
+    assert result["month"].tolist() == ["2024-01", "2024-02"]
+    assert result["n_points"].tolist() == [8, 4]
+    assert result["n_runs"].tolist() == [2, 1]
+
+    result = aggregate("n_points", agg="max", since="2024-01-02", until="2024-01")
+    assert result["n_points"].tolist() == [5]
+
+
+def test_load_runs_data(mock_archive_root):
+    import threading
+
+    from badger.analytics import RUN_COLUMN, load_runs_data
+    from badger.archive import archive_run, get_run_filename
+    from badger.tests.utils import create_routine, fix_path_issues
+
+    fix_path_issues()
+    runs = []
+    for i, n in enumerate([2, 3, 4, 5]):
+        routine = create_routine()
+        routine.creation_ts = f"2024-03-01-00000{i}"
+        routine.evaluate_data(
+            pd.DataFrame({f"x{j}": np.linspace(-0.5, 0.5, n) for j in range(4)})
+        )
+        runs.append(archive_run(routine)["filename"])
+
+    progress = []
+    data = load_runs_data(
+        runs, workers=2, on_progress=lambda *args: progress.append(args)
+    )
+    assert len(data) == 14
+    assert data.columns[0] == RUN_COLUMN
+    assert data[RUN_COLUMN].tolist() == sum(
+        [[run] * n for run, n in zip(runs, [2, 3, 4, 5])], []
+    )
+    assert progress[-1] == (4, 4)
+
+    # Same result in this process, from the paths, with a subset of columns
+    serial = load_runs_data(
+        [get_run_filename(run) for run in runs], columns=["x0", "f", "y"], workers=1
+    )
+    assert serial.columns.tolist() == [RUN_COLUMN, "x0", "f"]
+    pd.testing.assert_frame_equal(serial, data[serial.columns])
+
+    # Missing runs are left out
+    assert load_runs_data(runs[:1] + ["missing-2024-03-01-000000.yaml"]).shape[0] == 2
+
+    stop_event = threading.Event()
+    stop_event.set()
+    assert load_runs_data(runs, workers=2, stop_event=stop_event) is None
@@ -0,0 +1,391 @@
+import os
+
+import numpy as np
+import pandas as pd
+import yaml
+
+
+def make_points(n):
+    values = np.linspace(-0.5, 0.5, n)
+    return pd.DataFrame({f"x{i}": values for i in range(4)})
+
+
+def test_columnar_data_roundtrip(tmp_path):
+    from badger.arrays import ArrayRef
+    from badger.columnar import load_data, save_data
+
+    data = pd.DataFrame(
+        {
+            "x": [0.5, np.nan, 1.5],
+            "live": [1, 0, 1],
+            "xopt_error": [False, True, False],
+            "xopt_error_str": ["", "Traceback", ""],
+            "wave": [ArrayRef.from_key(0), np.nan, ArrayRef.from_key(1)],
+        },
+        index=[2, 0, 1],
+    )
+    filename = str(tmp_path / "run.npz")
+    save_data(data, filename)
+    loaded = load_data(filename)
+
+    assert loaded.index.tolist() == [0, 1, 2]
+    assert loaded.columns.tolist() == data.columns.tolist()
+    pd.testing.assert_frame_equal(
+        loaded[["x", "live", "xopt_error"]],
+        data[["x", "live", "xopt_error"]].sort_index(),
+    )
+    assert loaded["xopt_error_str"].tolist() == ["Traceback", "", ""]
+    assert loaded.loc[2, "wave"] == "array:0"
+    assert np.isnan(loaded.loc[0, "wave"])
+
+
+def test_archive_run(mock_archive_root):
+    from badger.archive import archive_run, load_run
+    from badger.columnar import DATA_EXT
+    from badger.tests.utils import create_routine, fix_path_issues
+
+    fix_path_issues()
+    routine = create_routine()
+    routine.creation_ts = "2024-01-01-000000"
+    routine.evaluate_data(routine.initial_points)
+    routine.evaluate_data(make_points(5))
+
+    run = archive_run(routine)
+    filename = os.path.join(run["path"], run["filename"])
+
+    # The routine config is stored without its data
+    with open(filename) as f:
+        config = yaml.safe_load(f)
+    assert "data" not in config
+    assert os.path.exists(os.path.splitext(filename)[0] + DATA_EXT)
+
+    loaded = load_run(run["filename"])
+    assert loaded.vocs == routine.vocs
+    pd.testing.assert_frame_equal(
+        loaded.sorted_data, routine.sorted_data, check_dtype=False
+    )
+    # The generator sees the data too
+    assert len(loaded.generator.data) == 6
+
+
+def test_migrate_run(mock_archive_root):
+    from badger.archive import load_run, migrate_archive, migrate_run
+    from badger.columnar import DATA_EXT
+    from badger.tests.utils import create_routine, fix_path_issues
+
+    fix_path_issues()
+    routine = create_routine()
+    routine.evaluate_data(make_points(3))
+
+    # A run archived the old way, routine and data in one yaml file
+    path = os.path.join(mock_archive_root, "2024", "2024-01", "2024-01-02")
+    os.makedirs(path, exist_ok=True)
+    fname = f"{routine.environment.name}-2024-01-02-030405.yaml"
+    filename = os.path.join(path, fname)
+    routine.dump(filename)
+
+    legacy = load_run(fname)
+    assert migrate_archive() >= 1
+    assert not migrate_run(filename)  # already converted
+
+    with open(filename) as f:
+        assert "data" not in yaml.safe_load(f)
+    assert os.path.exists(os.path.splitext(filename)[0] + DATA_EXT)
+
+    migrated = load_run(fname)
+    pd.testing.assert_frame_equal(
+        migrated.sorted_data, legacy.sorted_data, check_dtype=False
+    )
+
+
+def test_run_log(mock_archive_root):
+    from badger.archive import archive_run, get_run_location, load_run, start_run_log
+    from badger.columnar import DATA_EXT, DATA_LOG_EXT, load_data_log
+    from badger.tests.utils import create_routine, fix_path_issues
+
+    fix_path_issues()
+    routine = create_routine()
+    routine.creation_ts = "2024-01-03-000000"
+    routine.evaluate_data(make_points(2))
+    run_log = start_run_log(routine)
+
+    path, fname = get_run_location(routine)
+    stem = os.path.join(path, os.path.splitext(fname)[0])
+    assert os.path.exists(stem + DATA_LOG_EXT)
+    assert not os.path.exists(stem + DATA_EXT)
+
+    # Each append writes the new rows only
+    sizes = []
+    for x in [0.1, 0.2, 0.3]:
+        routine.evaluate_data(make_points(1) + x)
+        size = os.path.getsize(stem + DATA_LOG_EXT)
+        assert run_log.append(routine.data) == 1
+        sizes.append(os.path.getsize(stem + DATA_LOG_EXT) - size)
+        assert run_log.append(routine.data) == 0
+    assert sizes[0] == sizes[-1]
+
+    # A run in progress can be loaded from the log
+    pd.testing.assert_frame_equal(
+        load_data_log(stem + DATA_LOG_EXT), routine.data, check_dtype=False
+    )
+    assert len(load_run(fname).data) == 5
+
+    # Replaced data starts the log over
+    routine.data = routine.data.iloc[:1]
+    run_log.append(routine.data)
+    assert len(load_data_log(stem + DATA_LOG_EXT)) == 1
+
+    # The final archive compacts the log into the data file
+    routine.evaluate_data(make_points(1))
+    archive_run(routine)
+    assert not os.path.exists(stem + DATA_LOG_EXT)
+    assert len(load_run(fname).data) == 2
+
+
+def test_lazy_load_run(mock_archive_root):
+    from badger.archive import archive_run, load_run
+    from badger.routine import Routine
+    from badger.tests.utils import create_routine, fix_path_issues
+
+    fix_path_issues()
+    routine = create_routine()
+    routine.creation_ts = "2024-01-04-000000"
+    routine.evaluate_data(make_points(4))
+    run = archive_run(routine)
+
+    handle = load_run(run["filename"], lazy=True)
+    assert handle.name == routine.name
+    assert handle.environment_name == routine.environment.name
+    assert handle.vocs == routine.vocs
+    pd.testing.assert_frame_equal(
+        handle.sorted_data, routine.sorted_data, check_dtype=False
+    )
+    # Nothing but the config and the data was read so far
+    assert not handle.is_loaded
+
+    # The routine is built on the first access to what needs it
+    assert handle.generator.name == routine.generator.name
+    assert handle.is_loaded
+    assert isinstance(handle.routine, Routine)
+    assert len(handle.routine.generator.data) == 4
+
+    # By path too, such as of a run copied out of the archive
+    path = os.path.join(run["path"], run["filename"])
+    assert load_run(path, lazy=True).name == routine.name
+
+
+def test_archive_index(mock_archive_root):
+    from badger.archive import (
+        ARCHIVE_INDEX,
+        archive_run,
+        delete_run,
+        get_runs,
+        query_runs,
+        rebuild_index,
+        walk_runs,
+    )
+    from badger.archive_index import INDEX_FILENAME
+    from badger.tests.utils import create_routine, fix_path_issues
+
+    fix_path_issues()
+    routine = create_routine()
+    routine.creation_ts = "2024-02-01-000000"
+    routine.evaluate_data(make_points(3))
+    run = archive_run(routine)
+    filename = os.path.join(run["path"], run["filename"])
+
+    assert get_runs() == walk_runs()
+    (entry,) = query_runs(since="2024-02", until="2024-02-01")
+    assert entry["fullpath"] == filename
+    assert entry["environment"] == routine.environment.name
+    assert entry["routine_id"] == routine.id
+    assert entry["n_points"] == 3
+    feasible = routine.data[routine.data["c"] > 0]
+    assert entry["best"] == feasible["f"].max()
+    assert not query_runs(environment="nonexistent")
+
+    # A run copied into the archive is listed once the index is rebuilt
+    copied = filename.replace("2024-02-01-000000", "2024-02-01-000001")
+    routine.dump(copied)
+    assert copied not in get_runs()
+    assert rebuild_index() == len(walk_runs())
+    assert get_runs()[0] == copied
+    assert query_runs(limit=1)[0]["n_points"] == 3
+
+    delete_run(os.path.basename(copied))
+    assert copied not in get_runs()
+    assert get_runs() == walk_runs()
+
+    # One connection per thread, reopened if the index is removed
+    assert ARCHIVE_INDEX._connect() is ARCHIVE_INDEX._connect()
+    os.remove(os.path.join(mock_archive_root, INDEX_FILENAME))
+    assert ARCHIVE_INDEX.count() == 0
+
+
+def test_archive_changes(mock_archive_root):
+    from badger.archive import ARCHIVE_INDEX, archive_run, delete_run, rebuild_index
+    from badger.archive_index import ADDED, MODIFIED, REMOVED, RESET
+    from badger.tests.utils import create_routine, fix_path_issues
+
+    fix_path_issues()
+    routine = create_routine()
+    routine.creation_ts = "2024-03-01-000000"
+    routine.evaluate_data(make_points(2))
+
+    seq = ARCHIVE_INDEX.last_change
+    run = archive_run(routine)
+    routine.evaluate_data(make_points(1))
+    archive_run(routine)
+
+    seq, changes = ARCHIVE_INDEX.changes(seq)
+    assert [kind for kind, _ in changes] == [ADDED, MODIFIED]
+    # The changes come with the latest state of the runs
+    assert changes[0][1]["filename"] == run["filename"]
+    assert changes[0][1]["n_points"] == 3
+    assert ARCHIVE_INDEX.changes(seq) == (seq, [])
+
+    delete_run(run["filename"])
+    seq, changes = ARCHIVE_INDEX.changes(seq)
+    assert [kind for kind, _ in changes] == [REMOVED]
+    assert changes[0][1]["fullpath"] == os.path.join(run["path"], run["filename"])
+
+    rebuild_index()
+    assert ARCHIVE_INDEX.changes(seq)[1] == [(RESET, None)]
+    # A reader that fell behind the log starts over
+    assert ARCHIVE_INDEX.changes(-5)[1] == [(RESET, None)]
+
+
+def test_history_navigator(qtbot, mock_archive_root):
+    from badger.archive import archive_run, delete_run, get_run_periods
+    from badger.gui.components.navigators import HistoryNavigator, POPULATED_ROLE
+    from badger.tests.utils import create_routine, fix_path_issues
+
+    fix_path_issues()
+    routine = create_routine()
+    routine.evaluate_data(make_points(2))
+    runs = []
+    for ts in ["2025-06-01-000000", "2025-06-02-000000"]:
+        routine.creation_ts = ts
+        runs.append(archive_run(routine)["filename"])
+
+    navigator = HistoryNavigator()
+    qtbot.addWidget(navigator)
+    navigator.loadArchive()
+    tree = navigator.history_tree_widget
+
+    # Only the latest branch is filled in
+    assert [tree.topLevelItem(i).text(0) for i in range(tree.topLevelItemCount())] == (
+        get_run_periods()
+    )
+    year = tree.topLevelItem(0)
+    day = year.child(0).child(0)
+    assert day.text(0) == "2025-06-02"
+    assert day.child(0).text(0) == runs[1]
+    assert not tree.topLevelItem(1).data(0, POPULATED_ROLE)
+
+    # Runs archived or deleted, here or by another instance, are picked up
+    routine.creation_ts = "2025-07-01-000000"
+    new_run = archive_run(routine)["filename"]
+    navigator.watcher.poll()
+    assert year.child(0).text(0) == "2025-07"
+    assert year.child(0).child(0).child(0).text(0) == new_run
+
+    navigator._selectItemByRun(runs[0])
+    assert navigator.currentText() == runs[0]
+
+    delete_run(new_run)
+    navigator.watcher.poll()
+    assert year.child(0).text(0) == "2025-06"
+    assert navigator.currentText() == runs[0]
+
+
+def test_maintain_archive(mock_archive_root, tmp_path, monkeypatch):
+    import badger.db as db
+    from badger.archive import (
+        ARCHIVE_INDEX,
+        get_run_filename,
+        get_runs,
+        load_run,
+        rebuild_index,
+        save_tmp_run,
+    )
+    from badger.archive_maintenance import maintain_archive, prune_runs
+    from badger.arrays import ARRAYS_EXT, ArrayStore
+    from badger.columnar import DATA_EXT
+    from badger.database import Database
+    from badger.recorder import GZIP_MAGIC, RECORDING_EXT, InterfaceRecorder
+    from badger.recorder import load_recording
+    from badger.tests.utils import create_routine, fix_path_issues
+
+    fix_path_issues()
+    routine = create_routine()
+    routine.evaluate_data(make_points(3))
+
+    monkeypatch.setattr(
+        db, "BADGER_DB", Database(str(tmp_path / db.DB_FILENAME), db.SCHEMA)
+    )
+
+    # Two old runs archived the old way, with arrays
+    waveform = np.linspace(0, 1, 1000)
+    fnames = []
+    for ts in ["2020-01-01-000000", "2020-01-01-000001"]:
+        fname = f"{routine.environment.name}-{ts}.yaml"
+        filename = get_run_filename(fname)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        routine.dump(filename)
+        recorder = InterfaceRecorder(os.path.splitext(filename)[0] + RECORDING_EXT)
+        recorder.record("get_values", {"x0": 0.5, "x1": 1.5}, 0.0)
+        recorder.close()
+        store = ArrayStore(os.path.splitext(filename)[0] + ARRAYS_EXT)
+        ref = store.put(waveform)
+        store.flush()
+        fnames.append(fname)
+        with db.get_db().transaction() as con:
+            con.execute("insert into run (filename) values (?)", (fname,))
+    legacy = load_run(fnames[0])
+    recording = load_recording(os.path.splitext(filename)[0] + RECORDING_EXT)
+
+    tmp_filename = os.path.join(mock_archive_root, ".tmp", save_tmp_run(routine))
+    os.utime(tmp_filename, (0, 0))
+    rebuild_index()
+
+    report = maintain_archive(cold_days=30)
+    assert report["tmp_removed"] == 1
+    assert report["compacted"] >= 2
+    assert report["bytes_saved"] > 0
+    assert not os.path.exists(tmp_filename)
+
+    # Compacted and compressed, but loaded the same
+    filenames = [get_run_filename(fname) for fname in fnames]
+    stems = [os.path.splitext(filename)[0] for filename in filenames]
+    assert os.path.exists(stems[0] + DATA_EXT)
+    for ext in [RECORDING_EXT, ARRAYS_EXT]:
+        with open(stems[0] + ext, "rb") as f:
+            assert f.read(2) == GZIP_MAGIC
+    store = ArrayStore(stems[1] + ARRAYS_EXT)
+    np.testing.assert_equal(store.get(ref), waveform)
+    # Written back uncompressed when appended to
+    new_ref = store.put(-waveform)
+    store.flush()
+    store = ArrayStore(stems[1] + ARRAYS_EXT)
+    np.testing.assert_equal(store.get(ref), waveform)
+    np.testing.assert_equal(store.get(new_ref), -waveform)
+    pd.testing.assert_frame_equal(
+        load_run(fnames[0]).sorted_data, legacy.sorted_data, check_dtype=False
+    )
+    np.testing.assert_equal(load_recording(stems[1] + RECORDING_EXT), recording)
+    (run,) = ARCHIVE_INDEX.select("filename = ?", [fnames[0]])
+    assert run["maintained"] is not None
+    assert run["size"] == sum(
+        os.path.getsize(stems[0] + ext)
+        for ext in [".yaml", DATA_EXT, RECORDING_EXT, ARRAYS_EXT]
+    )
+
+    # Nothing left to do
+    assert maintain_archive(cold_days=30)["compacted"] == 0
+
+    # Retention
+    assert sorted(prune_runs(max_age=5 * 365)) == fnames
+    assert not any(os.path.exists(filename) for filename in filenames)
+    assert not set(filenames) & set(get_runs())
+    assert db.get_runs() == []
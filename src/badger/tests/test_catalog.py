@@ -0,0 +1,121 @@
+import re
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture(scope="module")
+def names():
+    rng = np.random.default_rng(0)
+    devices = ["QUAD", "BEND", "XCOR", "YCOR", "BPMS"]
+    areas = ["LI", "LTU", "IN", "BSY"]
+    attrs = ["BACT", "BCTRL", "BDES", "X", "Y", "TMIT"]
+
+    return list(
+        dict.fromkeys(
+            f"{rng.choice(devices)}:{rng.choice(areas)}{rng.integers(10, 30)}:"
+            f"{rng.integers(100, 999)}:{rng.choice(attrs)}"
+            for _ in range(20000)
+        )
+    )
+
+
+@pytest.fixture(scope="module")
+def catalog(names):
+    from badger.catalog import ChannelCatalog
+
+    catalog = ChannelCatalog()
+    catalog.update(names)
+
+    return catalog
+
+
+def test_literal_runs():
+    from badger.catalog import get_literal_runs
+
+    assert get_literal_runs("QUAD:LI21") == ["QUAD:LI21"]
+    assert get_literal_runs("^QUAD.*BACT$") == ["QUAD", "BACT"]
+    assert get_literal_runs("ab*cd+ef") == ["a", "cd", "ef"]
+    assert get_literal_runs("x{2}yz[abc]\\.def") == ["yz", ".def"]
+    assert get_literal_runs("(QUAD|BEND):LI") is None
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "QUAD:LI2?:201",
+        "BACT$",
+        "^XCOR:LTU1",
+        "LI21.*TMIT",
+        "^B",
+        "X",
+        "QUAD.*:1?5:BDES",
+        "(QUAD|BEND):IN1",
+        "NOPE",
+        "[",
+    ],
+)
+def test_catalog_search(names, catalog, pattern):
+    try:
+        regex = re.compile(pattern.replace("?", "."))
+        expected = [name for name in names if regex.search(name)]
+    except re.error:
+        expected = []
+
+    assert sorted(catalog.search(pattern)) == sorted(expected)
+    assert len(catalog.search(pattern, limit=5)) == min(5, len(expected))
+
+
+def test_catalog_update(names):
+    from badger.catalog import ChannelCatalog
+
+    catalog = ChannelCatalog()
+    assert catalog.is_stale()
+    assert catalog.update(names[:100]) == 100
+    assert not catalog.is_stale()
+    assert catalog.search(names[150]) == []
+
+    # New names are added incrementally
+    assert catalog.add(names[:200]) == 100
+    assert catalog.search(names[150]) == [names[150]]
+
+    # Removed names trigger a rebuild
+    assert catalog.update(names[50:200]) == 150
+    assert len(catalog) == 150
+    assert catalog.search(names[0]) == []
+
+
+def test_archive_search_widget(qtbot, names):
+    from badger.catalog import get_channel_catalog
+    from badger.gui.components.archive_search import ArchiveSearchWidget
+
+    class Env:
+        name = "catalog_test"
+
+        def search(self, keyword, callback):
+            regex = re.compile(keyword)
+            callback([name for name in names if regex.search(name)])
+
+    widget = ArchiveSearchWidget(environment=Env())
+    qtbot.addWidget(widget)
+    assert len(get_channel_catalog("catalog_test")) == len(names)
+
+    # Results show up as the user types, and are loaded in batches
+    model = widget.results_table_model
+    widget.search_box.setText("X")
+    n_matches = sum("X" in name for name in names)
+    assert n_matches > model.batch_size
+    assert model.rowCount(None) == model.batch_size
+    assert model.canFetchMore(None)
+    model.fetchMore(None)
+    assert model.rowCount(None) == 2 * model.batch_size
+
+    model.sort(0)
+    assert model.rowCount(None) == n_matches
+    assert not model.canFetchMore(None)
+    assert model.results_list == sorted(name for name in names if "X" in name)
+
+    widget.search_box.setText("QUAD:LI2?:2")
+    assert model.results_list == [
+        name for name in names if re.search("QUAD:LI2.:2", name)
+    ]
@@ -1,6 +1,10 @@
+import json
 import subprocess
+import sys
 from importlib import metadata
 
+IMPORT_TIME_BUDGET = 1.0  # unit is second
+
 
 def capture(command):
     proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
@@ -62,3 +66,22 @@ def test_list_algo():
 #     # Check table header
 #     assert outlines[1] == '|    iter    |     l2     ' \
 #         + '|     q1     |     q2     |'
+
+
+def test_cli_import_time():
+    # The CLI and the plugin factory start without Qt, nor xopt and torch
+    script = (
+        "import json, sys, time\n"
+        "t0 = time.perf_counter()\n"
+        "import badger.__main__, badger.factory\n"
+        "print(json.dumps({\n"
+        "    'time': time.perf_counter() - t0,\n"
+        "    'heavy': [m for m in ('PyQt5', 'torch', 'xopt') if m in sys.modules],\n"
+        "}))\n"
+    )
+    out, err, exitcode = capture([sys.executable, "-c", script])
+
+    assert exitcode == 0, err
+    report = json.loads(out)
+    assert report["heavy"] == []
+    assert report["time"] < IMPORT_TIME_BUDGET
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def make_rows(start, n, **extra):
+    return pd.DataFrame(
+        {
+            "x": np.arange(start, start + n, dtype=float),
+            "live": [1] * n,
+            "xopt_error": [False] * n,
+            "xopt_error_str": [""] * n,
+            **extra,
+        },
+        index=np.arange(start, start + n),
+    )
+
+
+def test_column_store(tmp_path):
+    from badger.column_store import ColumnStore
+
+    path = str(tmp_path / "run.cols")
+    writer = ColumnStore(path, mode="a", chunk_rows=4)
+    reader = ColumnStore(path)
+    assert len(reader) == 0
+
+    writer.append(make_rows(0, 3))
+    # Rows cross chunk boundaries, a column shows up mid-way
+    writer.append(make_rows(3, 7, f=np.arange(7) ** 2.0, wave=["array:0"] * 7))
+    writer.append(make_rows(10, 1).drop(columns=["live"]))
+
+    # Readers see the rows once committed
+    assert len(reader) == 0
+    assert reader.refresh() == 11
+
+    data = reader.read()
+    assert data.index.tolist() == list(range(11))
+    assert data["x"].tolist() == list(range(11))
+    assert data.columns.tolist() == [
+        "x",
+        "live",
+        "xopt_error",
+        "xopt_error_str",
+        "f",
+        "wave",
+    ]
+    assert data["f"].isna().tolist() == [True] * 3 + [False] * 7 + [True]
+    assert data["f"].iloc[3:10].tolist() == (np.arange(7) ** 2.0).tolist()
+    assert data["wave"].isna().tolist() == [True] * 3 + [False] * 7 + [True]
+    assert data["wave"].iloc[3] == "array:0"
+    # Integer columns missing from the rows are widened to hold NaN
+    assert data["live"].dtype == np.float64
+    assert data["live"].iloc[:10].tolist() == [1] * 10
+    assert np.isnan(data["live"].iloc[10])
+    assert data["xopt_error_str"].iloc[:10].tolist() == [""] * 10
+
+    window = reader.read(5, 9, columns=["x", "wave"])
+    assert window.index.tolist() == [5, 6, 7, 8]
+    assert window.columns.tolist() == ["x", "wave"]
+    assert reader.tail(2)["x"].tolist() == [9.0, 10.0]
+
+    # At most that many points, the last one included
+    overview = reader.overview(4)
+    assert overview.index.tolist() == [0, 3, 6, 9, 10]
+    assert reader.overview(4, stop=6).index.tolist() == [0, 2, 4, 5]
+    assert reader.overview(100).index.tolist() == list(range(11))
+
+    # Reopened for appending, the store goes on
+    ColumnStore(path, mode="a").append(make_rows(11, 2))
+    assert reader.refresh() == 13
+    assert reader.tail(1).index.tolist() == [12]
+
+    with pytest.raises(ValueError):
+        reader.append(make_rows(13, 1))
+
+    assert reader.window_rows(reader.row_nbytes * 5) == 5
+    assert reader.window_rows(0) == 13
+
+    reader.remove()
+    assert not (tmp_path / "run.cols").exists()
+
+
+def test_column_store_widen(tmp_path):
+    from badger.column_store import ColumnStore
+
+    path = str(tmp_path / "run.cols")
+    writer = ColumnStore(path, mode="a", chunk_rows=2)
+    reader = ColumnStore(path)
+
+    # Integer and boolean columns widened to float by the values not fitting
+    writer.append(pd.DataFrame({"f": [1, 2, 3], "g": [1, 2, 3], "ok": [True] * 3}))
+    reader.refresh()
+    assert reader.read()["f"].tolist() == [1, 2, 3]  # mapped before widening
+
+    writer.append(pd.DataFrame({"f": [1.7], "g": [4], "ok": [False]}, index=[3]))
+    writer.append(
+        pd.DataFrame({"f": [np.nan], "g": [np.nan], "ok": [np.nan]}, index=[4])
+    )
+    reader.refresh()
+    data = reader.read()
+    assert data["f"].tolist()[:4] == [1.0, 2.0, 3.0, 1.7]
+    assert data["g"].tolist()[:4] == [1.0, 2.0, 3.0, 4.0]
+    assert data[["f", "g", "ok"]].iloc[4].isna().all()
+    assert data["ok"].tolist()[:4] == [1.0, 1.0, 1.0, 0.0]
+
+    # Reopened, the store goes on with the widened columns
+    ColumnStore(path, mode="a").append(pd.DataFrame({"g": [0.5]}, index=[5]))
+    reader.refresh()
+    assert reader.tail(1)["g"].tolist() == [0.5]
@@ -0,0 +1,390 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
+
+def test_connection_per_thread(tmp_path):
+    from badger.database import Database
+
+    db = Database(os.path.join(tmp_path, "test.db"), "create table if not exists t (x)")
+    con = db.connection()
+    assert db.connection() is con
+    assert con.execute("pragma journal_mode").fetchone()[0] == "wal"
+
+    others = []
+    thread = threading.Thread(target=lambda: others.append(db.connection()))
+    thread.start()
+    thread.join()
+    assert others[0] is not con
+
+    db.close()
+    assert db.connection() is not con
+
+
+def test_transaction(tmp_path):
+    from badger.database import Database
+
+    db = Database(os.path.join(tmp_path, "test.db"), "create table if not exists t (x)")
+
+    with db.transaction() as con:
+        con.execute("insert into t values (1)")
+        with db.transaction():  # part of the outer one
+            con.execute("insert into t values (2)")
+    assert db.query("select x from t order by x") == [(1,), (2,)]
+
+    with pytest.raises(ValueError):
+        with db.transaction() as con:
+            con.execute("insert into t values (3)")
+            with db.transaction():
+                con.execute("insert into t values (4)")
+            raise ValueError
+    assert db.query("select x from t order by x") == [(1,), (2,)]
+
+    # Writers of several threads
+    def write(i):
+        with db.transaction() as con:
+            con.execute("insert into t values (?)", (i,))
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(10, 20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(db.query("select x from t")) == 12
+
+
+def test_migrations(tmp_path):
+    from badger.database import Database
+
+    path = os.path.join(tmp_path, "test.db")
+    con = sqlite3.connect(path)
+    con.execute("create table t (x)")
+    con.commit()
+    con.close()
+
+    applied = []
+
+    def add_y(con):
+        applied.append("add_y")
+        con.execute("alter table t add column y")
+
+    def fill_y(con):
+        applied.append("fill_y")
+        con.execute("update t set y = 0")
+
+    schema = (
+        "create table if not exists t (x, y); create index if not exists t_y on t (y)"
+    )
+
+    # Only the migrations the database is missing are applied
+    con = sqlite3.connect(path)
+    con.execute("pragma user_version = 1")
+    con.close()
+    db = Database(path, schema, migrations=[add_y, fill_y])
+    with pytest.raises(sqlite3.OperationalError):  # y was never added
+        db.connection()
+    assert applied == ["fill_y"]
+
+    applied.clear()
+    con = sqlite3.connect(path)
+    con.execute("pragma user_version = 0")
+    con.close()
+    db = Database(path, schema, migrations=[add_y, fill_y])
+    db.connection()
+    assert applied == ["add_y", "fill_y"]
+    assert db.query("pragma user_version") == [(2,)]
+    assert db.query("select name from sqlite_master where type = 'index'") == [("t_y",)]
+
+    # Once per process, and never on a new database
+    applied.clear()
+    db.close()
+    db.connection()
+    new_db = Database(os.path.join(tmp_path, "new.db"), schema, [add_y, fill_y])
+    new_db.connection()
+    assert not applied
+    assert new_db.query("pragma user_version") == [(2,)]
+
+
+@pytest.fixture
+def routine_db(tmp_path, monkeypatch):
+    from badger.tests.utils import fix_path_issues
+
+    fix_path_issues()
+
+    import badger.db as db
+    from badger.database import Database
+
+    def connect():
+        badger_db = Database(os.path.join(tmp_path, db.DB_FILENAME), db.SCHEMA)
+        monkeypatch.setattr(db, "BADGER_DB", badger_db)
+        monkeypatch.setattr(db, "_migrator", None)
+        monkeypatch.setattr(db, "_migration_checked", False)
+        return db
+
+    return connect
+
+
+def test_list_routine(routine_db):
+    from badger.tests.utils import create_routine
+
+    db = routine_db()
+    routines = []
+    for name, description, tags in [
+        ("quad scan", "Scan the quadrupoles", ["linac", "daily"]),
+        ("undulator taper", "Taper the undulators", ["fel"]),
+        ("quad tune", None, ["linac"]),
+    ]:
+        routine = create_routine()
+        routine.name = name
+        routine.description = description
+        routine.tags = tags
+        db.save_routine(routine)
+        routines.append(routine)
+
+    ids, names, timestamps, environments, descriptions = db.list_routine()
+    assert names == ["quad tune", "undulator taper", "quad scan"]
+    assert environments == ["test"] * 3
+    assert descriptions == ["", "Taper the undulators", "Scan the quadrupoles"]
+
+    assert db.list_routine("qua")[1] == ["quad tune", "quad scan"]
+    assert db.list_routine("undulators")[1] == ["undulator taper"]
+    assert db.list_routine("quad sc")[1] == ["quad scan"]
+    assert db.list_routine(tags=["linac"])[1] == ["quad tune", "quad scan"]
+    assert db.list_routine(tags=["linac", "daily"])[1] == ["quad scan"]
+    assert db.list_routine("quad", tags=["fel"])[1] == []
+    assert db.list_routine(generator="random")[1] == names
+    assert db.list_routine(environment="other")[1] == []
+
+    # Indexes follow the updates and removals
+    routines[1].name = "wiggler taper"
+    routines[1].tags = ["fel", "linac"]
+    db.update_routine(routines[1])
+    assert db.list_routine("undulator")[1] == ["wiggler taper"]
+    assert db.list_routine("wig")[1] == ["wiggler taper"]
+    assert len(db.list_routine(tags=["linac"])[1]) == 3
+
+    db.remove_routine(routines[0].id)
+    assert db.list_routine(tags=["linac"])[1] == ["wiggler taper", "quad tune"]
+    assert db.BADGER_DB.query("select count(*) from routine_tag") == [(3,)]
+
+
+def test_save_run(routine_db):
+    from badger.tests.utils import create_routine
+
+    db = routine_db()
+    routine = create_routine()
+    db.save_routine(routine)
+
+    data = {
+        "x0": [0.1, 0.2, 0.3, 0.4],
+        "f": [1.0, 3.0, 2.0, 5.0],
+        "c": [1.0, 1.0, 1.0, -1.0],  # last point infeasible
+        "timestamp": [100.0, 101.0, 102.0, 110.0],
+        "xopt_error": [False, False, True, False],
+    }
+    run = {"routine": routine, "filename": "run-a.yaml", "data": data}
+    rid = db.save_run(run)
+
+    (stats,) = db.get_run_stats(routine.id)
+    assert stats["run_id"] == rid
+    assert stats["filename"] == "run-a.yaml"
+    assert stats["n_evaluations"] == 4
+    assert stats["n_errors"] == 1
+    assert stats["n_feasible"] == 3
+    assert stats["feasibility_rate"] == 0.75
+    assert stats["objective"] == "f"
+    assert stats["direction"] == "MAXIMIZE"
+    assert stats["best"] == 3.0
+    assert stats["evals_to_best"] == 2
+    assert stats["duration"] == 10.0
+
+    # Saved again as the run goes on
+    data["f"].append(4.0)
+    data["c"].append(1.0)
+    data["timestamp"].append(120.0)
+    data["x0"].append(0.5)
+    data["xopt_error"].append(False)
+    assert db.save_run(run) == rid
+    (stats,) = db.get_run_stats()
+    assert (stats["n_evaluations"], stats["best"]) == (5, 4.0)
+
+    # A run of a routine missing from the database is kept unlinked
+    other = create_routine()
+    other.id = "missing"
+    db.save_run({"routine": other, "filename": "run-b.yaml", "data": data})
+    assert [stats["routine_id"] for stats in db.get_run_stats()] == [
+        None,
+        routine.id,
+    ]
+
+    db.remove_routine(routine.id)
+    assert db.get_runs() == ["run-b.yaml"]
+    assert db.BADGER_DB.query("select count(*) from run_stats") == [(1,)]
+
+
+def create_legacy_databases(tmp_path, keyed_by_name=False):
+    from badger.tests.utils import create_routine
+
+    routine = create_routine()
+    routine.tags = {"area": "linac"}
+    con = sqlite3.connect(os.path.join(tmp_path, "routines.db"))
+    if keyed_by_name:
+        con.execute("create table routine (name text primary key, config, savedAt)")
+    else:
+        con.execute(
+            "create table routine "
+            "(id text primary key, name text, config, savedAt timestamp)"
+        )
+    for i in range(3):
+        record = (f"routine {i}", routine.yaml(), f"2024-01-0{i + 1} 00:00:00")
+        if not keyed_by_name:
+            record = (f"legacy-{i}",) + record
+        con.execute(
+            f"insert into routine values ({', '.join('?' * len(record))})", record
+        )
+    con.commit()
+    con.close()
+
+    con = sqlite3.connect(os.path.join(tmp_path, "runs.db"))
+    key = "routine" if keyed_by_name else "routine_id"
+    con.execute(
+        "create table run (id integer primary key, savedAt timestamp, "
+        f"finishedAt timestamp, {key}, filename)"
+    )
+    con.executemany(
+        "insert into run values (?, ?, ?, ?, ?)",
+        [
+            (
+                1,
+                "2024-01-01",
+                "2024-01-01",
+                "routine 0" if keyed_by_name else "legacy-0",
+                "run-a.yaml",
+            ),
+            (2, "2024-01-02", "2024-01-02", "deleted", "run-b.yaml"),
+        ],
+    )
+    con.commit()
+    con.close()
+
+    return routine
+
+
+def test_migrate_legacy_databases(tmp_path, routine_db):
+    routine = create_legacy_databases(tmp_path)
+    db = routine_db()
+
+    assert db.legacy_migration_pending()
+    report = db.migrate_legacy_databases(dry_run=True)
+    assert report == {"routines": 3, "runs": 2, "run_files": 0}
+    assert db.BADGER_DB.query("select count(*) from routine") == [(0,)]
+
+    # Interrupted after the first batch
+    stop_event = threading.Event()
+    progress = []
+
+    def on_progress(n_done, n_total):
+        progress.append((n_done, n_total))
+        stop_event.set()
+
+    report = db.migrate_legacy_databases(
+        batch_size=2, on_progress=on_progress, stop_event=stop_event
+    )
+    assert report["routines"] == 2
+    assert progress == [(2, 5)]
+    assert db.migration_state() == {"routines": 2, "runs": 0, "done": 0}
+    assert db.legacy_migration_pending()
+
+    # Resumed
+    report = db.migrate_legacy_databases(batch_size=2)
+    assert report == {"routines": 1, "runs": 2, "run_files": 0}
+    assert not db.legacy_migration_pending()
+
+    assert db.list_routine("routine", tags={"area": "linac"})[1] == [
+        "routine 2",
+        "routine 1",
+        "routine 0",
+    ]
+    assert db.BADGER_DB.query(
+        "select environment, generator, createdAt from routine where id = 'legacy-0'"
+    ) == [("test", routine.generator.name, routine.creation_ts)]
+    assert db.get_runs_by_routine("legacy-0") == ["run-a.yaml"]
+    assert db.get_runs() == ["run-b.yaml", "run-a.yaml"]
+
+
+def test_migrate_legacy_databases_by_name(tmp_path, routine_db, monkeypatch):
+    create_legacy_databases(tmp_path, keyed_by_name=True)
+    db = routine_db()
+
+    rewritten = []
+
+    def set_runs_routine_id(filenames, id):
+        # Once the batch is committed
+        assert not db.BADGER_DB.connection().in_transaction
+        rewritten.append(id)
+
+    monkeypatch.setattr(db, "set_runs_routine_id", set_runs_routine_id)
+    assert db.migrate_legacy_databases(dry_run=True)["run_files"] == 2
+    db.migrate_legacy_databases()
+
+    id = db.legacy_routine_id("routine 0")
+    assert rewritten == [id, db.legacy_routine_id("deleted")]
+    assert db.get_runs_by_routine(id) == ["run-a.yaml"]
+    assert db.BADGER_DB.query("select name from routine where id = ?", (id,)) == [
+        ("routine 0",)
+    ]
+
+
+def test_legacy_migration_in_background(tmp_path, routine_db):
+    from badger.errors import BadgerDBError
+    from badger.tests.utils import create_routine
+
+    create_legacy_databases(tmp_path)
+    db = routine_db()
+
+    proceed = threading.Event()
+    migrator = db.start_legacy_migration(
+        batch_size=1, on_progress=lambda n_done, n_total: proceed.wait(10)
+    )
+    assert migrator is not None
+    assert db.start_legacy_migration() is migrator
+
+    # Read-only meanwhile
+    db.list_routine()
+    with pytest.raises(BadgerDBError):
+        db.save_routine(create_routine())
+
+    proceed.set()
+    migrator.join(10)
+    assert migrator.report == {"routines": 3, "runs": 2, "run_files": 0}
+    assert db.migration_status() == {
+        "running": False,
+        "done": 5,
+        "total": 5,
+        "error": None,
+    }
+    assert db.wait_for_migration()
+    assert len(db.list_routine()[0]) == 3
+    db.save_routine(create_routine())
+    assert db.start_legacy_migration() is None
+
+
+def test_failed_legacy_migration(tmp_path, routine_db, monkeypatch):
+    create_legacy_databases(tmp_path)
+    db = routine_db()
+
+    def fail(**kwargs):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(db, "migrate_legacy_databases", fail)
+    migrator = db.start_legacy_migration()
+    migrator.join(10)
+    assert str(db.migration_status()["error"]) == "disk full"
+
+    # Not restarted by the reads, until the next process
+    assert db.start_legacy_migration() is None
+    db.list_routine()
+    assert db._migrator is migrator
+    assert db.legacy_migration_pending()
@@ -164,3 +164,62 @@ def testget_observables():
     env.set_variables(variable_inputs)
     variable_outputs = env.get_observables(["f"])
     assert variable_outputs == {"f": 6.5}
+
+
+def test_plugin_manifest_cache(mocker):
+    import os
+
+    from badger import factory
+    from badger.factory import get_env
+
+    Environment, configs = get_env("test")
+    _, cached = get_env("test", lazy=True)
+    for key in ["name", "params", "variables", "observations"]:
+        assert cached[key] == configs[key]
+    assert os.path.exists(
+        os.path.join(factory.BADGER_PLUGIN_ROOT, factory.MANIFEST_FILENAME)
+    )
+
+    # Served from the cache without loading the plugin, also after a rescan
+    factory.BADGER_FACTORY = factory.scan_plugins(factory.BADGER_PLUGIN_ROOT)
+    load_plugin = mocker.spy(factory, "load_plugin")
+
+    def n_loads():
+        return [call.args[2] for call in load_plugin.call_args_list].count(
+            "environment"
+        )
+
+    proxy, cached = get_env("test", lazy=True)
+    assert cached["variables"] == configs["variables"]
+    assert n_loads() == 0
+
+    cached["params"]["flag"] = 1  # a copy
+    assert get_env("test", lazy=True)[1]["params"]["flag"] == 0
+
+    # The plugin is loaded when the class is used
+    env = proxy(flag=1)
+    assert isinstance(env, Environment)
+    assert proxy.variables == Environment.variables
+    assert n_loads() == 1
+
+    # and when it changes
+    config_file = os.path.join(
+        factory.BADGER_PLUGIN_ROOT, "environments", "test", "configs.yaml"
+    )
+    stat = os.stat(config_file)
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    factory.BADGER_FACTORY["environment"]["test"] = None
+    get_env("test", lazy=True)
+    assert n_loads() == 2
+    get_env("test", lazy=True)
+    assert n_loads() == 2
+
+    # and when its interface changes
+    intf_file = os.path.join(
+        factory.BADGER_PLUGIN_ROOT, "interfaces", "test", "__init__.py"
+    )
+    stat = os.stat(intf_file)
+    os.utime(intf_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    factory.BADGER_FACTORY["environment"]["test"] = None
+    get_env("test", lazy=True)
+    assert n_loads() == 3
@@ -423,3 +423,166 @@ class TestEnvironment:
         env = instantiate_env(TestEnv, configs_no_intf)
         assert env.test_param == 3.0
         assert env.interface is None
+
+    def test_async_environment(self):
+        """Test the async API and its adapters to and from the sync API."""
+        from badger.aio import run_sync
+
+        class SyncEnv(BaseEnvironment):
+            name = "test"
+            variables = {"x1": [-1, 1]}
+            observables = ["f", "g"]
+
+            def get_variables(self, variable_names: List[str]) -> Dict[str, float]:
+                return {name: 0.0 for name in variable_names}
+
+            def set_variables(self, variable_inputs: Dict[str, float]):
+                pass
+
+            def get_observables(self, observable_names: List[str]) -> Dict[str, float]:
+                return {name: {"f": 2.0, "g": 3.0}[name] for name in observable_names}
+
+        class AsyncEnv(BaseEnvironment):
+            name = "test"
+            variables = {"x1": [-1, 1]}
+            observables = ["f", "g"]
+
+            async def aget_variables(self, variable_names):
+                return {name: 0.0 for name in variable_names}
+
+            async def aset_variables(self, variable_inputs):
+                self._last_set = variable_inputs
+
+            async def aget_observables(self, observable_names):
+                return {name: {"f": 2.0, "g": 3.0}[name] for name in observable_names}
+
+        env = SyncEnv()
+        assert not env.is_async
+        result = run_sync(env.aget_observables(["`f` + `g`"]))
+        assert result == {"`f` + `g`": 5.0}
+        with pytest.raises(BadgerEnvVarError):
+            run_sync(env.aset_variables({"x1": 2.0}))
+
+        # Sync API generated from the async one, keeping validation and formulas
+        env = AsyncEnv()
+        assert env.is_async
+        assert env.get_variables(["x1"]) == {"x1": 0.0}
+        env.set_variable("x1", 0.5)
+        assert env._last_set == {"x1": 0.5}
+        assert env.get_observables(["`f` * `g`", "g"]) == {"`f` * `g`": 6.0, "g": 3.0}
+        with pytest.raises(BadgerEnvVarError):
+            env.set_variables({"x1": 2.0})
+
+    def test_environment_with_async_interface(self):
+        """Test that Environment uses the async channel API of its interface."""
+        from badger.aio import run_sync
+        from badger.interface import AsyncInterface
+
+        class TestIntf(AsyncInterface):
+            name = "test"
+
+            async def aget_value(self, channel_name):
+                return 0.5
+
+            async def aset_value(self, channel_name, channel_value):
+                pass
+
+        class TestEnv(Environment):
+            name = "test"
+            variables = {"x1": [-1, 1]}
+            observables = ["f"]
+
+        class SyncTestEnv(TestEnv):
+            def get_observables(self, observable_names):
+                return {name: 1.0 for name in observable_names}
+
+        env = TestEnv(interface=TestIntf())
+        assert env.is_async
+        assert run_sync(env.aget_observables(["f"])) == {"f": 0.5}
+        assert env.get_variables(["x1"]) == {"x1": 0.5}
+
+        # Overridden sync methods take precedence over the interface I/O
+        env = SyncTestEnv(interface=TestIntf())
+        assert run_sync(env.aget_observables(["f"])) == {"f": 1.0}
+
+    def test_readback_settling(self):
+        """Test that set_variables waits for the readbacks to settle."""
+        import importlib
+        import time
+
+        from badger.aio import run_sync
+        from badger.errors import BadgerEnvSettlingError
+        from badger.settling import SettlingConfig
+
+        simulator = importlib.import_module(
+            "badger.built_in_plugins.interfaces.simulator"
+        )
+
+        class TestEnv(Environment):
+            name = "test"
+            variables = {"x1": [-1, 1], "x2": [-1, 1]}
+            observables = ["f"]
+            settling = SettlingConfig(tolerance=1e-3, timeout=2.0)
+
+        intf = simulator.Interface(n_channels=0, settle_time=0.05)
+        # The readbacks bypass the cache, which they keep fresh
+        intf.enable_cache(default_ttl=60)
+        env = TestEnv(interface=intf)
+
+        t0 = time.perf_counter()
+        env.set_variables({"x1": 0.5, "x2": -0.5})
+        elapsed = time.perf_counter() - t0
+        # About 0.05 * ln(500) ~ 0.3 s to get within tolerance, far from the
+        # timeout
+        assert 0.25 < elapsed < 1.5
+        assert env.get_variables(["x1"])["x1"] == pytest.approx(0.5, abs=1e-3)
+        assert intf.get_cache_stats()["invalidations"] == 0
+        settle_times = env.get_settle_times()[-1]
+        assert set(settle_times) == {"x1", "x2"}
+        assert all(0.25 < t < 1.5 for t in settle_times.values())
+
+        run_sync(env.aset_variables({"x1": -0.5}))
+        assert len(env.get_settle_times()) == 2
+        assert env.get_variables(["x1"])["x1"] == pytest.approx(-0.5, abs=1e-3)
+
+        # Per-variable timeout
+        class SlowEnv(TestEnv):
+            settling = SettlingConfig(
+                tolerance=1e-3, timeouts={"x1": 0.1}, on_timeout="raise"
+            )
+
+        env = SlowEnv(interface=simulator.Interface(n_channels=0, settle_time=1.0))
+        t0 = time.perf_counter()
+        with pytest.raises(BadgerEnvSettlingError):
+            env.set_variables({"x1": 0.5})
+        assert time.perf_counter() - t0 < 0.5
+        assert np.isnan(env.get_settle_times()[-1]["x1"])
+
+    def test_settling_variance_window(self):
+        """Test the variance window and the adaptive poll interval."""
+        from pydantic import ValidationError
+
+        from badger.settling import SettlingConfig, SettlingTracker
+
+        # Noisy readbacks never settle exactly on the setpoint
+        with pytest.raises(ValidationError):
+            SettlingConfig()
+        with pytest.raises(ValidationError):
+            SettlingConfig(tolerance=0.0)
+
+        config = SettlingConfig(
+            tolerance=0.1, window=3, max_std=0.01, min_interval=0.01
+        )
+        tracker = SettlingTracker(config, {"x": 1.0}, start=0.0)
+
+        # Exponential approach, the next poll is predicted from the rate
+        assert tracker.update({"x": 0.0}, now=0.1) == pytest.approx(0.015)
+        delay = tracker.update({"x": 1 - np.exp(-1)}, now=0.2)
+        assert delay == pytest.approx(0.5 * 0.1 * np.log(np.exp(-1) / 0.1))
+        # Within tolerance but still moving
+        assert tracker.update({"x": 0.95}, now=0.3) is not None
+        assert tracker.update({"x": 1.0}, now=0.4) is not None
+        assert tracker.update({"x": 1.0}, now=0.5) is not None
+        assert tracker.pending == ["x"]
+        assert tracker.update({"x": 1.0}, now=0.6) is None
+        assert tracker.settle_times == {"x": pytest.approx(0.6)}
@@ -1,3 +1,6 @@
+import pytest
+
+
 def test_find_intf():
     from badger.factory import get_intf, list_intf
 
@@ -79,6 +82,162 @@ def test_recording():
     assert record["channel_outputs"] == {"x1": 3, "x2": 4, "x3": 5}
 
 
+def test_async_interface_fan_out():
+    import asyncio
+    import time
+
+    from badger import interface
+
+    class SlowInterface(interface.AsyncInterface):
+        name = "slow"
+
+        async def aget_value(self, channel_name):
+            await asyncio.sleep(0.1)
+            return 1.0
+
+        async def aset_value(self, channel_name, channel_value):
+            await asyncio.sleep(0.1)
+
+    intf = SlowInterface()
+
+    t0 = time.perf_counter()
+    channel_outputs = intf.get_values([f"x{i}" for i in range(20)])
+    assert channel_outputs == {f"x{i}": 1.0 for i in range(20)}
+    intf.set_values({f"x{i}": 0.0 for i in range(20)})
+    # Channels are read and written concurrently, not one after another
+    assert time.perf_counter() - t0 < 1.0
+
+
+def test_async_adapters():
+    from badger import interface
+    from badger.aio import run_sync
+    from badger.factory import get_intf
+
+    # Sync interface driven through the async API
+    Interface, _ = get_intf("test")
+    intf = Interface()
+
+    run_sync(intf.aset_values({"x1": 3}))
+    assert run_sync(intf.aget_values(["x1", "x2"])) == {"x1": 3, "x2": 0.5}
+
+    # Async interface driven through the sync API, with recording
+    class DictInterface(interface.AsyncInterface):
+        name = "dict"
+
+        @interface.log
+        async def aget_values(self, channel_names):
+            return {channel: 1.0 for channel in channel_names}
+
+        async def aset_values(self, channel_inputs):
+            pass
+
+    intf = DictInterface()
+    assert intf.get_value("x1") == 1.0
+    assert len(intf._logs) == 1
+    assert intf._logs[0]["action"] == "get_values"
+
+    # The channel I/O has to be implemented one way or the other
+    class ReadOnlyInterface(interface.AsyncInterface):
+        name = "read_only"
+
+        async def aget_value(self, channel_name):
+            return 1.0
+
+    with pytest.raises(TypeError, match="aset_value"):
+        ReadOnlyInterface()
+
+
+def test_read_cache():
+    from badger import interface
+
+    class CountingInterface(interface.Interface):
+        name = "counting"
+
+        _states: dict = {}
+        _reads: list = []
+
+        def get_values(self, channel_names):
+            self._reads.append(list(channel_names))
+            return {
+                channel: self._states.get(channel, 0.0) for channel in channel_names
+            }
+
+        def set_values(self, channel_inputs):
+            self._states.update(channel_inputs)
+
+    intf = CountingInterface()
+    assert intf.get_cache_stats() is None
+
+    intf.enable_cache(default_ttl=0, ttls={"x1": 60, "x2": 60})
+    assert intf.get_values(["x1", "x2", "f"]) == {"x1": 0.0, "x2": 0.0, "f": 0.0}
+    # Only the uncached (ttl 0) channel is read again
+    assert intf.get_values(["x1", "x2", "f"]) == {"x1": 0.0, "x2": 0.0, "f": 0.0}
+    assert intf._reads == [["x1", "x2", "f"], ["f"]]
+
+    # Writes invalidate the affected channels only
+    intf.set_value("x1", 1.0)
+    assert intf.get_values(["x1", "x2"]) == {"x1": 1.0, "x2": 0.0}
+    assert intf._reads[-1] == ["x1"]
+
+    stats = intf.get_cache_stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 5
+    assert stats["invalidations"] == 1
+
+    intf.disable_cache()
+    intf.get_values(["x2"])
+    assert intf._reads[-1] == ["x2"]
+
+
+def test_read_cache_expiry():
+    import time
+
+    from badger.factory import get_intf
+
+    Interface, _ = get_intf("test")
+    intf = Interface()
+    intf.enable_cache(default_ttl=0.05)
+
+    intf.get_values(["x1"])
+    intf._states["x1"] = 2.0  # changed behind the interface's back
+    assert intf.get_value("x1") == 0.5
+    time.sleep(0.1)
+    assert intf.get_value("x1") == 2.0
+
+
+def test_streaming_recording(tmp_path):
+    import numpy as np
+
+    from badger.factory import get_intf
+    from badger.recorder import ACTIONS, load_recording
+
+    Interface, _ = get_intf("test")
+    intf = Interface()
+    filename = str(tmp_path / "test.rec")
+
+    # Records made before the recording file is known are moved into it
+    intf.set_values({"x1": 3, "x2": 4})
+    intf.dump_recording(filename)
+    intf._recorder.buffer_size = 2  # bounded buffer, spills to the file
+    intf.get_values(["x1", "x2", "x3"])
+    intf.set_value("x3", "not a number")
+    assert intf._logs == []
+    intf.stop_recording(filename)
+
+    recording = load_recording(filename)
+    assert recording["channels"] == ["x1", "x2", "x3"]
+    assert list(recording["call"]) == [0, 0, 1, 1, 1, 2]
+    actions = [ACTIONS[i] for i in recording["action"]]
+    assert actions == ["set_values"] * 2 + ["get_values"] * 3 + ["set_values"]
+    assert list(recording["channel"]) == [0, 1, 0, 1, 2, 2]
+    np.testing.assert_array_equal(recording["value"][:5], [3, 4, 3, 4, 0.5])
+    assert np.isnan(recording["value"][5])
+
+    # Nothing recorded, no file created
+    intf.stop_recording(str(tmp_path / "empty.rec"))
+    assert not (tmp_path / "empty.rec").exists()
+
+
 # def test_run(mock_config_root):
 #     from coolname import generate_slug
 #     from badger.log import config_log
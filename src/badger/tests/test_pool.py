@@ -0,0 +1,129 @@
+import pytest
+
+from badger import interface
+
+
+class PooledInterface(interface.Interface):
+    name = "pooled"
+    pooled = True
+    flag: int = 0
+
+    _healthy: bool = True
+    _closed: bool = False
+
+    def get_values(self, channel_names):
+        return {channel: 0.0 for channel in channel_names}
+
+    def set_values(self, channel_inputs):
+        pass
+
+    def check_health(self):
+        return self._healthy
+
+    def close(self):
+        self._closed = True
+
+
+@pytest.fixture
+def pool(mocker):
+    from badger.pool import InterfacePool
+
+    mocker.patch(
+        "badger.factory.get_intf", return_value=(PooledInterface, {"params": {}})
+    )
+
+    return InterfacePool(max_idle_time=60)
+
+
+def test_sessions_are_shared(pool):
+    intf = pool.acquire("pooled")
+    assert pool.acquire("pooled") is intf
+    assert pool.acquire("pooled", {"flag": 1}) is not intf
+
+    stats = pool.get_stats()
+    assert stats["sessions"] == 2
+    assert stats["in_use"] == 2
+
+
+def test_release_and_idle_eviction(pool):
+    intf = pool.acquire("pooled")
+    pool.acquire("pooled")
+
+    pool.release(intf)
+    assert pool.evict_idle(max_idle_time=0) == 0  # still referenced
+
+    pool.release(intf)
+    assert not intf._closed
+    # Idle sessions are reused until they are evicted
+    assert pool.acquire("pooled") is intf
+    pool.release(intf)
+
+    assert pool.evict_idle(max_idle_time=0) == 1
+    assert intf._closed
+    assert pool.acquire("pooled") is not intf
+
+
+def test_unhealthy_session_is_replaced(pool):
+    intf = pool.acquire("pooled")
+    intf._healthy = False
+
+    new_intf = pool.acquire("pooled")
+    assert new_intf is not intf
+    assert not intf._closed  # still in use
+
+    pool.release(intf)
+    assert intf._closed
+
+
+def test_unpooled_interface_is_not_shared():
+    from badger.pool import InterfacePool
+
+    pool = InterfacePool()
+    intf = pool.acquire("test")
+    assert pool.acquire("test") is not intf
+    assert pool.get_stats()["sessions"] == 0
+
+
+def test_env_releases_session(pool, mocker):
+    import gc
+
+    from badger.environment import Environment, instantiate_env
+
+    mocker.patch("badger.pool.get_interface_pool", return_value=pool)
+
+    class TestEnv(Environment):
+        name = "test"
+        variables = {"x1": [-1, 1]}
+        observables = ["f"]
+
+    env = instantiate_env(TestEnv, {"interface": ["pooled"], "params": {}})
+    env_other = instantiate_env(TestEnv, {"interface": ["pooled"], "params": {}})
+    assert env.interface is env_other.interface
+    assert pool.get_stats()["in_use"] == 1
+
+    del env, env_other
+    gc.collect()
+    assert pool.get_stats()["in_use"] == 0
+
+
+def test_env_session_per_interface_params(pool, mocker):
+    from badger.environment import Environment, instantiate_env
+
+    mocker.patch("badger.pool.get_interface_pool", return_value=pool)
+    enable_cache = mocker.patch("badger.environment.enable_variable_cache")
+
+    class TestEnv(Environment):
+        name = "test"
+        variables = {"x1": [-1, 1]}
+        observables = ["f"]
+
+    configs = {"interface": ["pooled"], "params": {}}
+    env = instantiate_env(TestEnv, configs)
+    env_same = instantiate_env(TestEnv, configs)
+    env_other = instantiate_env(TestEnv, configs | {"interface_params": {"flag": 1}})
+    assert env.interface is env_same.interface
+    assert env_other.interface is not env.interface
+    assert env_other.interface.flag == 1
+
+    # The cache is configured once per pooled session
+    assert enable_cache.call_count == 2
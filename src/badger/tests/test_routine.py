@@ -43,6 +43,147 @@ class TestRoutine:
         routine_re = Routine.from_yaml(routine_str)
         assert routine_re.environment.flag == 1
 
+    def test_array_observables(self, tmp_path):
+        import json
+
+        import numpy as np
+        import pandas as pd
+        from xopt import VOCS
+        from xopt.generators.random import RandomGenerator
+
+        from badger.arrays import ArrayRef, ArrayStore, restore_array_refs
+        from badger.environment import BaseEnvironment
+        from badger.routine import Routine
+
+        class WaveEnv(BaseEnvironment):
+            name = "wave"
+            variables = {"x": [0, 1]}
+            observables = ["f", "wave"]
+
+            _x: float = 0.0
+
+            def get_variables(self, variable_names):
+                return {"x": self._x}
+
+            def set_variables(self, variable_inputs):
+                self._x = variable_inputs["x"]
+
+            def get_observables(self, observable_names):
+                wave = np.full(1000, self._x)
+                return {"f": self._x, "wave": wave}
+
+        vocs = VOCS(
+            variables={"x": [0, 1]},
+            objectives={"mean(`wave`)": "MAXIMIZE"},
+            observables=["wave", "f"],
+        )
+        routine = Routine(
+            name="test",
+            generator=RandomGenerator(vocs=vocs),
+            environment=WaveEnv(),
+        )
+        routine.evaluate_data(pd.DataFrame({"x": [0.25]}))
+        routine.evaluate_data(pd.DataFrame({"x": [0.5]}))
+
+        # One row per evaluation, formulas still reduce the arrays
+        assert len(routine.data) == 2
+        assert routine.data["mean(`wave`)"].tolist() == [0.25, 0.5]
+        assert isinstance(routine.data.loc[1, "wave"], ArrayRef)
+        assert np.isnan(routine.data["wave"].to_numpy(dtype=float)).all()
+        np.testing.assert_array_equal(routine.get_array(1, "wave"), np.full(1000, 0.5))
+
+        # The arrays go to a binary file next to the yaml dump
+        filename = str(tmp_path / "run.arr")
+        routine.arrays.save(filename)
+        assert os.path.getsize(filename) < 2 * 1000 * 8 + 200
+
+        routine.evaluate_data(pd.DataFrame({"x": [0.75]}))
+        assert routine.get_array(2, "wave")[0] == 0.75
+
+        # Another process can read them from the file, zero copy
+        store = ArrayStore(filename)
+        wave = store.get(routine.data.loc[2, "wave"])
+        assert not wave.flags.writeable
+        np.testing.assert_array_equal(wave, np.full(1000, 0.75))
+
+        # References survive the serialization of the routine
+        data = pd.DataFrame(json.loads(routine.json())["data"])
+        data.index = data.index.astype(int)
+        restore_array_refs(data)
+        assert isinstance(data.loc[0, "wave"], ArrayRef)
+        np.testing.assert_array_equal(
+            store.get(data.loc[0, "wave"]), np.full(1000, 0.25)
+        )
+
+    def test_array_store_reattach(self, tmp_path):
+        import numpy as np
+        import pandas as pd
+
+        from badger.arrays import ArrayStore, find_array_refs
+
+        # Data kept from a first run, with its arrays in the run file
+        store = ArrayStore(str(tmp_path / "run-1.arr"))
+        refs = [store.put(np.full(3, i)) for i in range(3)]
+        store.flush()
+        data = pd.DataFrame({"wave": refs[1:]}, dtype=object)
+
+        # Re-run: the referenced arrays are carried to the new run file
+        store.attach(str(tmp_path / "run-2.arr"), keep=find_array_refs(data))
+        np.testing.assert_array_equal(store.get(data.loc[1, "wave"]), np.full(3, 2))
+        assert len(store) == 2
+        new_ref = store.put(np.zeros(3))
+        assert new_ref not in refs
+        store.flush()
+
+        other = ArrayStore(str(tmp_path / "run-2.arr"))
+        np.testing.assert_array_equal(other.get(refs[1]), np.full(3, 1))
+        np.testing.assert_array_equal(other.get(new_ref), np.zeros(3))
+
+        # A fresh store never reuses the keys of the data it is given
+        fresh = ArrayStore()
+        fresh.attach(str(tmp_path / "run-3.arr"), keep=refs)
+        assert fresh.put(np.zeros(3)).key == 3
+
+    def test_sorted_data_cache(self):
+        import pandas as pd
+
+        from badger.tests.utils import create_routine
+
+        routine = create_routine()
+        assert routine.sorted_data is None
+
+        routine.evaluate_data(
+            pd.DataFrame({"x0": [0.3], "x1": [0.1], "x2": [0], "x3": [0]})
+        )
+        version = routine.data_version
+        data = routine.sorted_data
+
+        # Cached between accesses, shares the underlying arrays
+        assert routine.sorted_data.equals(data)
+        assert routine._sorted_data_cache[1] is not data
+        assert routine.data_version == version
+
+        # Writing into the returned frame does not reach the cache
+        data["x0"] = -1.0
+        data["extra"] = 1
+        assert routine.sorted_data["x0"].tolist() == [0.3]
+        assert "extra" not in routine.sorted_data.columns
+
+        copied = routine.copy_sorted_data()
+        copied.loc[0, "x1"] = -1.0
+        assert routine.sorted_data.loc[0, "x1"] == 0.1
+
+        # New data invalidates the cache
+        routine.evaluate_data(
+            pd.DataFrame({"x0": [0.5], "x1": [0.2], "x2": [0], "x3": [0]})
+        )
+        assert routine.data_version > version
+        assert routine.sorted_data["x0"].tolist() == [0.3, 0.5]
+
+        # And so does replacing the data out of order
+        routine.data = routine.data.iloc[::-1]
+        assert routine.sorted_data.index.tolist() == [0, 1]
+
     @pytest.fixture(scope="module", autouse=True)
     def clean_up(self):
         yield
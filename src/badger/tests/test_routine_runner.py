@@ -87,6 +87,49 @@ class TestRoutineRunner:
         # instance.stop_routine()
         # assert len(sig_progress_spy) > 0
 
+    def test_read_live_data(self, instance):
+        import os
+
+        import numpy as np
+        import pandas as pd
+
+        from badger.column_store import ColumnStore
+
+        def make_rows(start, n):
+            index = np.arange(start, start + n)
+            return pd.DataFrame({"x0": index * 0.1, "f": index * 1.0}, index=index)
+
+        instance.open_data_store()
+        writer = ColumnStore(instance.data_store.path, mode="a")
+        writer.append(make_rows(0, 10))
+        instance.routine.data = instance.read_live_data()
+        assert instance.routine.data.index.tolist() == list(range(10))
+        assert not instance.is_windowed()
+
+        # Only the latest rows that fit in the budget are kept
+        instance.memory_budget = writer.row_nbytes * 4
+        writer.append(make_rows(10, 5))
+        instance.routine.data = instance.read_live_data()
+        assert instance.routine.data.index.tolist() == [11, 12, 13, 14]
+        assert instance.is_windowed()
+
+        instance.overview_points = 5
+        overview = instance.overview()
+        assert overview.index.tolist() == [0, 3, 6, 9, 10]
+
+        # The whole run, for the analysis extensions, read back incrementally
+        assert instance.full_data().index.tolist() == list(range(15))
+        writer.append(make_rows(15, 2))
+        instance.routine.data = instance.read_live_data()
+        assert instance.full_data()["f"].tolist() == list(range(17))
+
+        instance.load_full_data()
+        assert instance.routine.data["f"].tolist() == list(range(17))
+
+        path = instance.data_store.path
+        instance.remove_data_store()
+        assert not os.path.exists(path)
+
     def test_setup_timer(self, instance):
         instance.setup_timer()
         assert isinstance(instance.timer, QTimer)
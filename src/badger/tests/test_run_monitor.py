@@ -242,6 +242,33 @@ class TestRunMonitor:
         monitor.cb_plot_x.setCurrentIndex(1)
         assert current_index == monitor.inspector_variable.value()
 
+    def test_windowed_data(self, qtbot, monitor, mocker):
+        self.add_data(monitor)
+        full = monitor.routine.data.copy()
+
+        # Only the latest rows are in memory, the older ones are decimated
+        runner = mocker.MagicMock()
+        runner.is_windowed.return_value = True
+        runner.overview.return_value = full.iloc[[0, 3]]
+        runner.full_data.return_value = full
+        monitor.routine_runner = runner
+        monitor.routine.data = full.iloc[6:]
+
+        ts = monitor.extract_timestamp()
+        assert ts.index.tolist() == [0, 3, 6, 7, 8, 9]
+        assert ts.iloc[0] == 0
+
+        monitor.cb_plot_x.setCurrentIndex(1)
+        t = full["timestamp"] - full["timestamp"].iloc[0]
+        assert monitor.timestamp_at(7) == t.loc[7]
+        assert monitor.closest_ts(t.loc[8]) == (t.loc[8], 8)
+
+        # Rows out of the window are read back from the data store
+        variable_names = monitor.vocs.variable_names
+        row = monitor.get_row(1)
+        assert row[variable_names].tolist() == full.loc[1, variable_names].tolist()
+        assert monitor.get_row(8).equals(full.loc[8])
+
     def test_y_axis_specification(self, qtbot, monitor):
         monitor.termination_condition = {
             "tc_idx": 0,
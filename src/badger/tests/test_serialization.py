@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+
+def test_routine_to_dict():
+    from xopt import Xopt
+
+    from badger.routine import Routine
+    from badger.serialization import (
+        ROUTINE_EXCLUDED_FIELDS,
+        load_yaml,
+        routine_to_dict,
+    )
+    from badger.tests.utils import create_routine
+
+    routine = create_routine()
+    routine.evaluate_data(routine.initial_points)
+    routine.evaluate_data(pd.DataFrame({f"x{i}": [0.1 * i] for i in range(4)}))
+
+    result = routine_to_dict(routine)
+    reference = json.loads(Xopt.json(routine))
+    for name in ROUTINE_EXCLUDED_FIELDS - {"data"}:
+        assert name not in result
+        reference.pop(name, None)
+    reference["environment"] = {"name": routine.environment.name} | reference[
+        "environment"
+    ]
+    reference["environment"]["interface"] = {
+        "name": routine.environment.interface.name
+    } | reference["environment"]["interface"]
+    assert result == reference
+    assert list(result["generator"])[0] == "name"
+    assert list(result["environment"])[0] == "name"
+
+    assert "data" not in routine_to_dict(routine, include_data=False)
+    assert json.loads(routine.json()) == result
+
+    # The yaml round trip gives the same routine back
+    loaded = Routine.from_yaml(routine.yaml())
+    assert load_yaml(loaded.yaml()) == load_yaml(routine.yaml())
+    pd.testing.assert_frame_equal(
+        loaded.sorted_data, routine.sorted_data, check_dtype=False, check_like=True
+    )
+
+
+def test_pack():
+    from badger.serialization import pack, unpack
+
+    data = pd.DataFrame({"x": np.arange(5.0), "live": [1] * 5})
+    payload = pack((data, {"a": [1, 2]}))
+    assert isinstance(payload, bytes)
+
+    data_copy, other = unpack(payload)
+    pd.testing.assert_frame_equal(data_copy, data)
+    assert other == {"a": [1, 2]}
@@ -0,0 +1,91 @@
+import asyncio
+import importlib
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def simulator():
+    return importlib.import_module("badger.built_in_plugins.interfaces.simulator")
+
+
+def test_channels_and_latency(simulator):
+    intf = simulator.Interface(n_channels=2000, read_latency=0.05)
+    channels = intf.list_channels()
+    assert len(channels) == 2000
+
+    t0 = time.perf_counter()
+    values = intf.get_values(channels[:500])
+    # Reads are concurrent, so the latency does not add up over channels
+    assert time.perf_counter() - t0 < 1.0
+    assert values == {ch: 0.0 for ch in channels[:500]}
+
+
+def test_latency_distributions(simulator):
+    for dist in ["constant", "uniform", "exponential", "lognormal"]:
+        system = simulator.SimulatedControlSystem(
+            n_channels=0, latency_distribution=dist, seed=0
+        )
+        samples = [system.sample_latency(0.01) for _ in range(2000)]
+        assert min(samples) >= 0
+        assert sum(samples) / len(samples) == pytest.approx(0.01, rel=0.2)
+
+
+def test_settling_and_noise(simulator):
+    intf = simulator.Interface(n_channels=0, settle_time=0.05)
+    intf.set_value("x", 1.0)
+    assert intf.get_value("x") < 0.9  # still settling
+    time.sleep(0.5)
+    assert intf.get_value("x") == pytest.approx(1.0, abs=1e-3)
+
+    intf = simulator.Interface(n_channels=0, noise=0.1, seed=0)
+    values = [intf.get_value("x") for _ in range(50)]
+    assert len(set(values)) == 50
+
+
+def test_channel_failures(simulator):
+    from badger.errors import BadgerInterfaceChannelError
+
+    intf = simulator.Interface(n_channels=0, failure_rate=1.0)
+    with pytest.raises(BadgerInterfaceChannelError):
+        intf.get_value("x")
+
+
+def test_server_mode(simulator):
+    from badger.aio import run_sync
+    from badger.errors import BadgerInterfaceChannelError
+
+    system = simulator.SimulatedControlSystem(n_channels=10)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = asyncio.run_coroutine_threadsafe(
+        simulator.start_server(system, "localhost", 0), loop
+    ).result()
+    port = server.port
+
+    try:
+        intf = simulator.Interface(address=f"localhost:{port}")
+        assert intf.check_health()
+        assert len(intf.list_channels()) == 10
+
+        intf.set_values({"SIM:00001": 2.0, "y": 3.0})
+        assert intf.get_values(["SIM:00001", "y"]) == {"SIM:00001": 2.0, "y": 3.0}
+
+        # Bad requests are reported, the connection goes on
+        with pytest.raises(BadgerInterfaceChannelError, match="Invalid request"):
+            run_sync(intf._request({"op": "get"}))
+        assert intf.check_health()
+    finally:
+        # The connection of the interface is ended by the server
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        loop.close()
+
+    assert not intf.check_health()
+    intf.close()
+    intf = simulator.Interface(address=f"localhost:{port}")
+    assert not intf.check_health()
@@ -1,25 +1,27 @@
 from importlib import metadata
-import json
 import logging
 import os
 import sys
 import pathlib
 from datetime import datetime
 from types import TracebackType
-from typing import Iterable, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Optional
 
 import yaml
 
 from badger.errors import BadgerLoadConfigError
-from PyQt5.QtWidgets import QWidget, QLayout
+from badger.serialization import data_to_dict, dump_yaml, load_yaml, model_to_dict
+
+if TYPE_CHECKING:  # Qt is not needed by the CLI and the run subprocesses
+    from PyQt5.QtWidgets import QWidget, QLayout
 
 logger = logging.getLogger(__name__)
 
 
 class BlockSignalsContext:
-    widgets: Iterable[QWidget | QLayout]
+    widgets: Iterable["QWidget | QLayout"]
 
-    def __init__(self, widgets: QWidget | QLayout | Iterable[QWidget | QLayout]):
+    def __init__(self, widgets: "QWidget | QLayout | Iterable[QWidget | QLayout]"):
         if isinstance(widgets, Iterable):
             self.widgets = widgets
         else:
@@ -47,6 +49,44 @@ class BlockSignalsContext:
             widget.blockSignals(False)
 
 
+class LazyAttributes:
+    """
+    Module attributes computed on first use rather than on import, so that
+    importing the module is cheap and does not read the settings or touch
+    the file system:
+
+        _lazy = LazyAttributes(globals(), {"ROOT": init_root})
+        __getattr__ = _lazy.load
+
+    Within the module, the attributes are read with _lazy.get("ROOT"), as
+    module globals are looked up without going through __getattr__. Once
+    computed, or assigned, an attribute is a plain module global.
+    """
+
+    def __init__(
+        self, namespace: Dict[str, Any], initializers: Dict[str, Callable[[], Any]]
+    ):
+        self.namespace = namespace
+        self.initializers = initializers
+
+    def load(self, name: str) -> Any:
+        try:
+            init = self.initializers[name]
+        except KeyError:
+            raise AttributeError(
+                f"module {self.namespace['__name__']!r} has no attribute {name!r}"
+            )
+
+        value = self.namespace[name] = init()
+        return value
+
+    def get(self, name: str) -> Any:
+        try:
+            return self.namespace[name]
+        except KeyError:
+            return self.load(name)
+
+
 # https://stackoverflow.com/a/39681672/4263605
 # https://github.com/yaml/pyyaml/issues/234#issuecomment-765894586
 class Dumper(yaml.Dumper):
@@ -94,7 +134,7 @@ def load_config(fname):
     # if fname is a yaml string
     if not os.path.exists(fname):
         try:
-            configs = yaml.safe_load(fname)  # A string is also a valid yaml
+            configs = load_yaml(fname)  # A string is also a valid yaml
             if type(configs) is str:
                 raise BadgerLoadConfigError(
                     f"Error loading config {fname}: file not found"
@@ -107,7 +147,7 @@ def load_config(fname):
 
     with open(fname, "r") as f:
         try:
-            configs = yaml.safe_load(f)
+            configs = load_yaml(f)
         except yaml.YAMLError:
             err_msg = f"Error loading config {fname}: invalid yaml"
             raise BadgerLoadConfigError(err_msg)
@@ -301,7 +341,7 @@ def dump_state(dump_file, generator, data):
     if dump_file is not None:
         output = state_to_dict(generator, data)
         with open(dump_file, "w") as f:
-            yaml.dump(output, f)
+            dump_yaml(output, f)
         logger.debug(f"Dumped state to YAML file: {dump_file}")
 
 
@@ -310,12 +350,12 @@ def state_to_dict(generator, data, include_data=True):
     output = {
         "generator": {
             "name": type(generator).name,
-            type(generator).name: json.loads(generator.model_dump_json()),
+            type(generator).name: model_to_dict(generator),
         },
-        "vocs": json.loads(generator.vocs.model_dump_json()),
+        "vocs": model_to_dict(generator.vocs),
     }
     if include_data:
-        output["data"] = json.loads(data.to_json())
+        output["data"] = data_to_dict(data)
 
     return output
 